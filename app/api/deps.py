@@ -1,12 +1,13 @@
 from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from jose.exceptions import JWTClaimsError, ExpiredSignatureError
 
 from app.core.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.crud.user import get_user_by_phone_number, get_user_by_id, is_token_blacklisted, has_any_admin
 
@@ -16,12 +17,9 @@ security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Annotated[Session, Depends(get_db)]
-) -> User:
+def authenticate_token(db: Session, token: str) -> User:
     """
-    Получение текущего пользователя из JWT токена
+    Пользователь по JWT токену (синхронно: общий код для get_db и get_async_db)
     Защита от невалидных токенов и ошибок декодирования
     """
     credentials_exception = HTTPException(
@@ -31,8 +29,6 @@ async def get_current_user(
     )
     
     try:
-        token = credentials.credentials
-        
         # Проверяем, не находится ли токен в черном списке
         if is_token_blacklisted(db, token):
             print("Authentication error: Token is blacklisted")
@@ -125,13 +121,28 @@ async def get_current_user(
         raise credentials_exception
 
 
-async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)]
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[Session, Depends(get_db)]
 ) -> User:
     """
-    Получение активного пользователя
-    Проверка статуса активности и блокировки пользователя
+    Получение текущего пользователя из JWT токена
+    """
+    return authenticate_token(db, credentials.credentials)
+
+
+async def get_current_user_async(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[AsyncSession, Depends(get_async_db)]
+) -> User:
     """
+    Получение текущего пользователя из JWT токена через асинхронную сессию
+    """
+    return await db.run_sync(authenticate_token, credentials.credentials)
+
+
+def _ensure_active(current_user: User) -> User:
+    """Проверка статуса активности и блокировки пользователя"""
     if not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -147,6 +158,33 @@ async def get_current_active_user(
     return current_user
 
 
+def _ensure_admin(current_user: User) -> User:
+    """Проверка прав администратора"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Admin rights required."
+        )
+    return current_user
+
+
+async def get_current_active_user(
+    current_user: Annotated[User, Depends(get_current_user)]
+) -> User:
+    """
+    Получение активного пользователя
+    Проверка статуса активности и блокировки пользователя
+    """
+    return _ensure_active(current_user)
+
+
+async def get_current_active_user_async(
+    current_user: Annotated[User, Depends(get_current_user_async)]
+) -> User:
+    """Получение активного пользователя (асинхронная сессия)"""
+    return _ensure_active(current_user)
+
+
 async def get_current_admin_user(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ) -> User:
@@ -154,12 +192,14 @@ async def get_current_admin_user(
     Получение текущего администратора
     Проверка прав администратора
     """
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied. Admin rights required."
-        )
-    return current_user
+    return _ensure_admin(current_user)
+
+
+async def get_current_admin_user_async(
+    current_user: Annotated[User, Depends(get_current_active_user_async)]
+) -> User:
+    """Получение текущего администратора (асинхронная сессия)"""
+    return _ensure_admin(current_user)
 
 
 async def get_current_user_optional(
@@ -24,6 +24,7 @@ from app.api.v1 import (
     admin_advertisements,
     electric_stations,
     admin_electric_stations,
+    search,
     drivers,
     admin_drivers,
     regions,
@@ -61,6 +62,7 @@ api_router.include_router(advertisements.router, prefix="/advertisements", tags=
 api_router.include_router(admin_advertisements.router, prefix="/admin/advertisements", tags=["Админ: Реклама"])
 api_router.include_router(electric_stations.router, prefix="/electric-stations", tags=["Электрозаправки"])
 api_router.include_router(admin_electric_stations.router, prefix="/admin/electric-stations", tags=["Админ: Электрозаправки"])
+api_router.include_router(search.router, prefix="/search", tags=["Поиск"])
 api_router.include_router(drivers.router, tags=["Водители"])
 api_router.include_router(admin_drivers.router, tags=["Админ: Водители"])
 api_router.include_router(regions.router, tags=["Регионы"])
@@ -5,6 +5,8 @@ from jose import JWTError, jwt
 from jose.exceptions import JWTClaimsError, ExpiredSignatureError
 
 from app.database import get_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
 from app.schemas.user import (
     UserDeleteRequest,
@@ -191,9 +193,10 @@ def build_profile_response(user: User, db: Session) -> ProfileWithUserDataRespon
 class UsersListResponse(BaseModel):
     """Ответ со списком пользователей с полной информацией профиля"""
     users: List[ProfileWithUserDataResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 @router.get("/users", response_model=UsersListResponse)
@@ -204,7 +207,9 @@ async def get_all_users_endpoint(
     limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
     is_admin: Optional[bool] = Query(None, description="Фильтр по статусу администратора"),
     is_blocked: Optional[bool] = Query(None, description="Фильтр по статусу блокировки"),
-    is_active: Optional[bool] = Query(None, description="Фильтр по статусу активности")
+    is_active: Optional[bool] = Query(None, description="Фильтр по статусу активности"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
     """
     Получение списка всех пользователей с полной информацией профиля
@@ -220,7 +225,9 @@ async def get_all_users_endpoint(
             limit=limit,
             is_admin=is_admin,
             is_blocked=is_blocked,
-            is_active=is_active
+            is_active=is_active,
+            cursor=cursor,
+            count=count
         )
         
         # Строим полные профили для каждого пользователя
@@ -230,8 +237,11 @@ async def get_all_users_endpoint(
             users=profiles,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(users, limit)
         )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         import traceback
         print(f"Error getting users list: {str(e)}")
@@ -8,6 +8,7 @@ from pathlib import Path
 import uuid
 
 from app.database import get_db
+from app.core.counting import CountMode
 from app.models.user import User
 from app.api.deps import get_current_admin_user
 from app.services.car_wash_service.crud import (
@@ -99,7 +100,8 @@ async def admin_list_car_washes(
     has_vacuum: Optional[bool] = Query(None),
     has_drying: Optional[bool] = Query(None),
     has_self_service: Optional[bool] = Query(None),
-    search_query: Optional[str] = Query(None)
+    search_query: Optional[str] = Query(None),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
     """Получение списка всех автомоек (включая ожидающие модерации)"""
     filters = CarWashFilter(
@@ -120,7 +122,7 @@ async def admin_list_car_washes(
         status=status
     )
     
-    car_washes, total = get_car_washes(db, skip=skip, limit=limit, filters=filters)
+    car_washes, total = get_car_washes(db, skip=skip, limit=limit, filters=filters, count=count)
     
     car_wash_responses = []
     for car_wash in car_washes:
@@ -154,7 +156,7 @@ async def admin_get_car_wash(
     
     # Получаем отзывы
     from app.services.car_wash_service.crud import get_reviews_by_car_wash
-    reviews, _ = get_reviews_by_car_wash(db, car_wash_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_car_wash(db, car_wash_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
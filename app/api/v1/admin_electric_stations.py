@@ -8,6 +8,7 @@ from pathlib import Path
 import uuid
 
 from app.database import get_db
+from app.core.counting import CountMode
 from app.models.user import User
 from app.api.deps import get_current_admin_user
 from app.services.electric_station_service.crud import (
@@ -104,7 +105,8 @@ async def admin_list_electric_stations(
     has_available_points: Optional[bool] = Query(None),
     operator: Optional[str] = Query(None),
     network: Optional[str] = Query(None),
-    search_query: Optional[str] = Query(None)
+    search_query: Optional[str] = Query(None),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
     """Получение списка всех электрозаправок (включая ожидающие модерации)"""
     filters = ElectricStationFilter(
@@ -130,7 +132,7 @@ async def admin_list_electric_stations(
         status=status
     )
     
-    stations, total = get_electric_stations(db, skip=skip, limit=limit, filters=filters)
+    stations, total = get_electric_stations(db, skip=skip, limit=limit, filters=filters, count=count)
     
     station_responses = []
     for station in stations:
@@ -164,7 +166,7 @@ async def admin_get_electric_station(
     
     # Получаем отзывы
     from app.services.electric_station_service.crud import get_reviews_by_station
-    reviews, _ = get_reviews_by_station(db, station_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_station(db, station_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
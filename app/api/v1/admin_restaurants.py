@@ -8,6 +8,7 @@ from pathlib import Path
 import uuid
 
 from app.database import get_db
+from app.core.counting import CountMode
 from app.models.user import User
 from app.api.deps import get_current_admin_user
 from app.services.restaurant_service.crud import (
@@ -113,7 +114,8 @@ async def admin_list_restaurants(
     has_delivery: Optional[bool] = Query(None),
     has_parking: Optional[bool] = Query(None),
     has_wifi: Optional[bool] = Query(None),
-    search_query: Optional[str] = Query(None)
+    search_query: Optional[str] = Query(None),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
     """Получение списка всех ресторанов (включая ожидающие модерации)"""
     filters = RestaurantFilter(
@@ -131,7 +133,7 @@ async def admin_list_restaurants(
         status=status
     )
     
-    restaurants, total = get_restaurants(db, skip=skip, limit=limit, filters=filters)
+    restaurants, total = get_restaurants(db, skip=skip, limit=limit, filters=filters, count=count)
     
     restaurant_responses = []
     for restaurant in restaurants:
@@ -165,7 +167,7 @@ async def admin_get_restaurant(
     
     # Получаем отзывы
     from app.services.restaurant_service.crud import get_reviews_by_restaurant
-    reviews, _ = get_reviews_by_restaurant(db, restaurant_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_restaurant(db, restaurant_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
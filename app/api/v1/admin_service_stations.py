@@ -8,6 +8,7 @@ from pathlib import Path
 import uuid
 
 from app.database import get_db
+from app.core.counting import CountMode
 from app.models.user import User
 from app.api.deps import get_current_admin_user
 from app.services.service_station_service.crud import (
@@ -96,7 +97,8 @@ async def admin_list_service_stations(
     has_waiting_room: Optional[bool] = Query(None),
     has_cafe: Optional[bool] = Query(None),
     accepts_cards: Optional[bool] = Query(None),
-    search_query: Optional[str] = Query(None)
+    search_query: Optional[str] = Query(None),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
     """Получение списка всех СТО (включая ожидающие модерации)"""
     filters = ServiceStationFilter(
@@ -114,7 +116,7 @@ async def admin_list_service_stations(
         status=status
     )
     
-    stations, total = get_service_stations(db, skip=skip, limit=limit, filters=filters)
+    stations, total = get_service_stations(db, skip=skip, limit=limit, filters=filters, count=count)
     
     station_responses = []
     for station in stations:
@@ -148,7 +150,7 @@ async def admin_get_service_station(
     
     # Получаем отзывы
     from app.services.service_station_service.crud import get_reviews_by_station
-    reviews, _ = get_reviews_by_station(db, station_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_station(db, station_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
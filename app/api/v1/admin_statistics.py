@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.api.deps import get_current_admin_user
+from app.core.pool_metrics import pool_metrics
 from app.schemas.admin_statistics import (
     DashboardResponse,
     KPIsResponse,
@@ -21,7 +22,8 @@ from app.schemas.admin_statistics import (
     CategoryCompletenessResponse,
     RecentActionsResponse,
     OrderStatisticsResponse,
-    SystemActivityResponse
+    SystemActivityResponse,
+    DbPoolStatsResponse
 )
 from app.services.admin_statistics_service.crud import (
     get_kpis,
@@ -302,3 +304,20 @@ async def get_system_activity_endpoint(
     """Получение активности системы"""
     return get_system_activity(db, start_date, end_date)
 
+
+@router.get("/db-pool", response_model=DbPoolStatsResponse)
+async def get_db_pool_stats(
+    current_admin: Annotated[User, Depends(get_current_admin_user)],
+    reset: bool = Query(False, description="Сбросить накопленные счетчики после чтения")
+):
+    """
+    Метрики пулов соединений БД текущего воркера
+
+    - ожидание соединения (гистограмма) и таймауты пула
+    - занятые, свободные и overflow соединения
+    - время удержания соединений по маршрутам (сначала самые "тяжелые")
+    """
+    snapshot = pool_metrics.snapshot()
+    if reset:
+        pool_metrics.reset()
+    return snapshot
@@ -5,7 +5,7 @@ from typing import Annotated, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.api.deps import get_current_user_optional
 from app.services.advertisement_service.crud import (
@@ -28,7 +28,7 @@ router = APIRouter()
 async def get_advertisements(
     position: AdvertisementPositionEnum = Query(..., description="Позиция рекламы в приложении"),
     current_user: Annotated[Optional[User], Depends(get_current_user_optional)] = None,
-    db: Annotated[Session, Depends(get_db)] = None
+    db: Annotated[Session, Depends(get_read_db)] = None
 ):
     """
     Получение активных рекламных блоков для определенной позиции
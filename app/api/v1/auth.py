@@ -1,16 +1,20 @@
+"""
+Авторизация: SMS-коды, JWT, выход
+Эндпоинты работают через асинхронную сессию (get_async_db), CRUD вызывается через run_sync
+"""
 from datetime import timedelta
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.security import create_access_token
 from app.core.sms_service import SMSService
 from app.core.utils import generate_verification_code, get_code_expiration_time
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.user import (
     PhoneNumberRequest,
     VerifyCodeRequest,
@@ -30,7 +34,7 @@ from app.crud.user import (
     delete_verification_code,
     add_token_to_blacklist,
 )
-from app.api.deps import get_current_active_user, get_current_admin_user
+from app.api.deps import get_current_active_user_async, get_current_admin_user_async
 from app.models.user import User
 from app.core.security import verify_password
 from app.messages.auth import SMS_MESSAGE
@@ -44,7 +48,7 @@ sms_service = SMSService()
 @router.post("/send-code", response_model=CodeSentResponse, status_code=status.HTTP_200_OK)
 async def send_verification_code(
     request: PhoneNumberRequest,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Отправка SMS кода на номер телефона
@@ -67,8 +71,8 @@ async def send_verification_code(
             print(f"[SMS] Sending code to {phone_number}, code: {verification_code}")
         
         # Сохраняем код в базе данных
-        code_record = create_verification_code(
-            db=db,
+        code_record = await db.run_sync(
+            create_verification_code,
             phone_number=phone_number,
             code=verification_code
         )
@@ -112,7 +116,7 @@ async def send_verification_code(
 @router.post("/verify-code", response_model=VerifyCodeResponse)
 async def verify_verification_code(
     request: VerifyCodeRequest,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Верификация SMS кода и автоматическая регистрация/авторизация
@@ -135,8 +139,8 @@ async def verify_verification_code(
         if bypass:
             verification = True
         else:
-            verification = verify_code(
-                db=db,
+            verification = await db.run_sync(
+                verify_code,
                 phone_number=phone_number,
                 code=code
             )
@@ -148,11 +152,11 @@ async def verify_verification_code(
             )
         
         # Проверяем, существует ли пользователь
-        user = get_user_by_phone_number(db, phone_number)
+        user = await db.run_sync(get_user_by_phone_number, phone_number)
         
         # Если пользователь не существует - автоматически регистрируем
         if not user:
-            user = create_user(db=db, phone_number=phone_number)
+            user = await db.run_sync(create_user, phone_number=phone_number)
         
         # Проверяем, не заблокирован ли пользователь
         if user.is_blocked:
@@ -163,7 +167,7 @@ async def verify_verification_code(
         
         # Удаляем использованный код (кроме обхода для тестового номера)
         if not bypass:
-            delete_verification_code(db, phone_number)
+            await db.run_sync(delete_verification_code, phone_number)
         
         # Создаем JWT токен
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -203,7 +207,7 @@ async def verify_verification_code(
 @router.post("/login", response_model=Token)
 async def login(
     request: VerifyCodeRequest,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Авторизация пользователя по коду (альтернативный эндпоинт)
@@ -223,7 +227,7 @@ async def login(
         if bypass:
             verification = True
         else:
-            verification = verify_code(db=db, phone_number=phone_number, code=code)
+            verification = await db.run_sync(verify_code, phone_number=phone_number, code=code)
         
         if not verification:
             raise HTTPException(
@@ -233,7 +237,7 @@ async def login(
             )
         
         # Проверяем существование пользователя
-        user = get_user_by_phone_number(db, phone_number)
+        user = await db.run_sync(get_user_by_phone_number, phone_number)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -254,7 +258,7 @@ async def login(
         
         # Удаляем использованный код (кроме обхода для тестового номера)
         if not bypass:
-            delete_verification_code(db, phone_number)
+            await db.run_sync(delete_verification_code, phone_number)
         
         # Создаем токен
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -283,7 +287,7 @@ async def login(
 @router.post("/check-registration", response_model=UserRegisteredResponse)
 async def check_user_registration(
     request: PhoneNumberRequest,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Проверка регистрации пользователя по номеру телефона
@@ -299,7 +303,7 @@ async def check_user_registration(
         
         # Проверяем наличие пользователя в базе данных
         try:
-            user = get_user_by_phone_number(db, phone_number)
+            user = await db.run_sync(get_user_by_phone_number, phone_number)
             is_registered = user is not None
         except Exception as db_error:
             # Ошибка подключения к базе данных
@@ -361,7 +365,7 @@ async def check_user_registration(
 )
 async def admin_login(
     request: AdminLoginRequest,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Авторизация администратора по логину и паролю
@@ -380,7 +384,7 @@ async def admin_login(
         print(f"[Admin Login] Attempting login for: {login}")
         
         # Получаем пользователя по логину
-        user = get_user_by_login(db, login)
+        user = await db.run_sync(get_user_by_login, login)
         
         if not user:
             print(f"[Admin Login] User not found for login: {login}")
@@ -471,9 +475,9 @@ async def admin_login(
 
 @router.post("/logout", response_model=LogoutResponse, status_code=status.HTTP_200_OK)
 async def user_logout(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[User, Depends(get_current_active_user_async)],
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Выход пользователя из системы
@@ -485,7 +489,7 @@ async def user_logout(
         token = credentials.credentials
         
         # Добавляем токен в черный список
-        add_token_to_blacklist(db, token, user_id=current_user.id)
+        await db.run_sync(add_token_to_blacklist, token, user_id=current_user.id)
         
         return LogoutResponse(
             message="Вы успешно вышли из системы",
@@ -504,9 +508,9 @@ async def user_logout(
 
 @router.post("/admin/logout", response_model=LogoutResponse, status_code=status.HTTP_200_OK)
 async def admin_logout(
-    current_admin: Annotated[User, Depends(get_current_admin_user)],
+    current_admin: Annotated[User, Depends(get_current_admin_user_async)],
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_async_db)]
 ):
     """
     Выход администратора из системы
@@ -518,7 +522,7 @@ async def admin_logout(
         token = credentials.credentials
         
         # Добавляем токен в черный список
-        add_token_to_blacklist(db, token, user_id=current_admin.id)
+        await db.run_sync(add_token_to_blacklist, token, user_id=current_admin.id)
         
         return LogoutResponse(
             message="Вы успешно вышли из системы",
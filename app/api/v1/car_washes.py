@@ -2,18 +2,22 @@
 API эндпоинты для автомоек (пользовательские)
 """
 from typing import Annotated, Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response, Header
 from sqlalchemy.orm import Session
 from pathlib import Path
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
 from app.api.deps import get_current_active_user
 from app.services.car_wash_service.crud import (
     create_car_wash,
     get_car_wash_by_id,
     get_car_washes,
+    get_nearest_car_washes,
+    get_car_wash_clusters,
     create_review,
     get_reviews_by_car_wash,
     update_review,
@@ -30,6 +34,7 @@ from app.schemas.car_wash import (
     CarWashCreate,
     CarWashResponse,
     CarWashDetailResponse,
+    CarWashReviewListResponse,
     CarWashListResponse,
     CarWashFilter,
     CarWashServiceCreate,
@@ -40,8 +45,11 @@ from app.schemas.car_wash import (
     CarWashPhotoResponse,
     BulkCarWashServiceUpdate,
 )
+from app.schemas.geo import MapCluster, MapClusterResponse
 from app.core.config import settings
-from app.models.car_wash import CarWashStatus
+from app.core.response_cache import response_cache
+from app.core.etag import content_etag, etag_matches, json_response, not_modified
+from app.models.car_wash import CarWash, CarWashStatus
 
 router = APIRouter()
 
@@ -104,7 +112,9 @@ async def list_car_washes(
     search_query: Optional[str] = Query(None),
     latitude: Optional[float] = Query(None, ge=-90, le=90),
     longitude: Optional[float] = Query(None, ge=-180, le=180),
-    radius_km: Optional[float] = Query(None, gt=0)
+    radius_km: Optional[float] = Query(None, gt=0),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение списка автомоек с фильтрацией"""
     filters = CarWashFilter(
@@ -127,7 +137,21 @@ async def list_car_washes(
         radius_km=radius_km
     )
     
-    car_washes, total = get_car_washes(db, skip=skip, limit=limit, filters=filters)
+    # Ответ зависит только от фильтров: пока версия категории не изменилась,
+    # отдаем 304 по ETag или готовый JSON из кеша. Сессия - основной БД, не реплики:
+    # ответ отстающей реплики закрепился бы в кеше под новой версией
+    cache_key = await response_cache.key_async(
+        CarWash.__tablename__,
+        {"skip": skip, "limit": limit, "count": count.value, **filters.model_dump(mode="json")}
+    )
+    etag = response_cache.etag(cache_key)
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    cached = await response_cache.get_async(cache_key)
+    if cached is not None:
+        return json_response(cached, etag, if_none_match)
+    
+    car_washes, total = get_car_washes(db, skip=skip, limit=limit, filters=filters, count=count)
     
     # Преобразуем в ответы
     car_wash_responses = []
@@ -139,11 +163,65 @@ async def list_car_washes(
             car_wash_dict["main_photo"] = main_photo.photo_url
         car_wash_responses.append(CarWashResponse(**car_wash_dict))
     
-    return CarWashListResponse(
+    payload = CarWashListResponse(
         car_washes=car_wash_responses,
         total=total,
         skip=skip,
         limit=limit
+    ).model_dump_json()
+    await response_cache.set_async(cache_key, payload)
+    return json_response(payload, etag, if_none_match)
+
+
+@router.get("/nearest", response_model=CarWashListResponse)
+async def list_nearest_car_washes(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100, description="Количество ближайших мест"),
+):
+    """Получение k ближайших автомоек (по расстоянию, без радиуса)"""
+    nearest = get_nearest_car_washes(db, latitude, longitude, k=k)
+    
+    car_wash_responses = []
+    for car_wash, distance_km in nearest:
+        car_wash_dict = CarWashResponse.model_validate(car_wash).model_dump()
+        main_photo = next((p for p in car_wash.photos if p.is_main), None)
+        if main_photo:
+            car_wash_dict["main_photo"] = main_photo.photo_url
+        car_wash_dict["distance_km"] = round(distance_km, 3)
+        car_wash_responses.append(CarWashResponse(**car_wash_dict))
+    
+    return CarWashListResponse(
+        car_washes=car_wash_responses,
+        total=len(car_wash_responses),
+        skip=0,
+        limit=k
+    )
+
+
+@router.get("/clusters", response_model=MapClusterResponse)
+async def list_car_wash_clusters(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=20, description="Уровень масштаба карты"),
+):
+    """Кластеры автомоек для видимой области карты (количество, центроид)"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректная область карты"
+        )
+    clusters = get_car_wash_clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+    return MapClusterResponse(
+        clusters=[MapCluster(**cluster) for cluster in clusters],
+        total=sum(cluster["count"] for cluster in clusters),
+        zoom=zoom
     )
 
 
@@ -246,7 +324,9 @@ async def remove_car_wash_from_favorites(
 async def get_car_wash(
     car_wash_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение детальной информации об автомойке"""
     car_wash = get_car_wash_by_id(db, car_wash_id)
@@ -263,7 +343,7 @@ async def get_car_wash(
         )
     
     # Получаем отзывы
-    reviews, _ = get_reviews_by_car_wash(db, car_wash_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_car_wash(db, car_wash_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
@@ -277,13 +357,20 @@ async def get_car_wash(
     
     car_wash_dict = CarWashDetailResponse.model_validate(car_wash).model_dump()
     car_wash_dict["reviews"] = review_responses
+    car_wash_dict["reviews_next_cursor"] = next_cursor(reviews, 50)
     
     # Находим главную фотографию
     main_photo = next((p for p in car_wash.photos if p.is_main), None)
     if main_photo:
         car_wash_dict["main_photo"] = main_photo.photo_url
     
-    return CarWashDetailResponse(**car_wash_dict)
+    # ETag по содержимому: карточка включает отзывы и имена их авторов
+    detail = CarWashDetailResponse(**car_wash_dict)
+    etag = content_etag(detail)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return detail
 
 
 @router.post("/{car_wash_id}/photos", response_model=CarWashPhotoResponse, status_code=status.HTTP_201_CREATED)
@@ -400,6 +487,43 @@ async def update_car_wash_services(
     return [CarWashServiceResponse.model_validate(s) for s in updated_services]
 
 
+@router.get("/{car_wash_id}/reviews", response_model=CarWashReviewListResponse)
+async def get_car_wash_reviews(
+    car_wash_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+):
+    """Отзывы автомойки, новые сверху"""
+    car_wash = get_car_wash_by_id(db, car_wash_id)
+    if not car_wash or car_wash.status != CarWashStatus.APPROVED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Автомойка не найдена"
+        )
+    
+    try:
+        reviews, total = get_reviews_by_car_wash(db, car_wash_id, skip=skip, limit=limit, cursor=cursor, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    from app.services.user_service.crud import get_user_extended_by_id
+    items = []
+    for review in reviews:
+        review_dict = CarWashReviewResponse.model_validate(review).model_dump()
+        user_extended = get_user_extended_by_id(db, review.user_id)
+        if user_extended:
+            review_dict["user_name"] = user_extended.name
+        items.append(CarWashReviewResponse(**review_dict))
+    
+    return CarWashReviewListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor(reviews, limit)
+    )
+
+
 @router.post("/{car_wash_id}/reviews", response_model=CarWashReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_car_wash_review(
     car_wash_id: int,
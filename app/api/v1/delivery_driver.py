@@ -3,9 +3,12 @@ API доставки для водителя: заказы, принять/от
 """
 from typing import Annotated, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from starlette.status import HTTP_400_BAD_REQUEST  # параметр status в списках заказов перекрывает модуль
 from sqlalchemy.orm import Session
 
 from app.database import get_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.api.deps import get_current_active_user
 from app.models.user import User
 from app.models.driver import Driver
@@ -37,9 +40,16 @@ async def driver_orders(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     status: Optional[DeliveryOrderStatus] = None,
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
 ):
     """Заказы, назначенные на текущего водителя."""
-    items, total = get_orders_for_driver(db, driver.id, skip=skip, limit=limit, status=status)
+    try:
+        items, total = get_orders_for_driver(
+            db, driver.id, skip=skip, limit=limit, status=status, cursor=cursor, count=count
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=str(e))
     out_items = []
     for o in items:
         try:
@@ -47,7 +57,9 @@ async def driver_orders(
         except Exception:
             # Пропускаем некорректные записи (с NULL в обязательных полях)
             continue
-    return DeliveryOrderListResponse(items=out_items, total=total, skip=skip, limit=limit)
+    return DeliveryOrderListResponse(
+        items=out_items, total=total, skip=skip, limit=limit, next_cursor=next_cursor(items, limit)
+    )
 
 
 @router.get("/orders/{order_id}", response_model=DeliveryOrderResponse)
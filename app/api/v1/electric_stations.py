@@ -2,18 +2,23 @@
 API эндпоинты для электрозаправок (пользовательские)
 """
 from typing import Annotated, Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response, Header
 from sqlalchemy.orm import Session
 from pathlib import Path
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
 from app.api.deps import get_current_active_user
 from app.services.electric_station_service.crud import (
     create_electric_station,
     get_electric_station_by_id,
     get_electric_stations,
+    get_nearest_electric_stations,
+    get_electric_station_clusters,
+    get_electric_stations_along_route,
     create_review,
     get_reviews_by_station,
     update_review,
@@ -29,6 +34,7 @@ from app.schemas.electric_station import (
     ElectricStationCreate,
     ElectricStationResponse,
     ElectricStationDetailResponse,
+    ElectricStationReviewListResponse,
     ElectricStationListResponse,
     ElectricStationFilter,
     ChargingPointCreate,
@@ -39,8 +45,11 @@ from app.schemas.electric_station import (
     ElectricStationPhotoResponse,
     BulkChargingPointUpdate,
 )
+from app.schemas.geo import MapCluster, MapClusterResponse, RouteCorridorRequest
 from app.core.config import settings
-from app.models.electric_station import ElectricStationStatus
+from app.core.response_cache import response_cache
+from app.core.etag import content_etag, etag_matches, json_response, not_modified
+from app.models.electric_station import ElectricStation, ElectricStationStatus, ConnectorType
 
 router = APIRouter()
 
@@ -108,7 +117,9 @@ async def list_electric_stations(
     search_query: Optional[str] = Query(None),
     latitude: Optional[float] = Query(None, ge=-90, le=90),
     longitude: Optional[float] = Query(None, ge=-180, le=180),
-    radius_km: Optional[float] = Query(None, gt=0)
+    radius_km: Optional[float] = Query(None, gt=0),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение списка электрозаправок с фильтрацией"""
     filters = ElectricStationFilter(
@@ -136,7 +147,21 @@ async def list_electric_stations(
         radius_km=radius_km
     )
     
-    stations, total = get_electric_stations(db, skip=skip, limit=limit, filters=filters)
+    # Ответ зависит только от фильтров: пока версия категории не изменилась,
+    # отдаем 304 по ETag или готовый JSON из кеша. Сессия - основной БД, не реплики:
+    # ответ отстающей реплики закрепился бы в кеше под новой версией
+    cache_key = await response_cache.key_async(
+        ElectricStation.__tablename__,
+        {"skip": skip, "limit": limit, "count": count.value, **filters.model_dump(mode="json")}
+    )
+    etag = response_cache.etag(cache_key)
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    cached = await response_cache.get_async(cache_key)
+    if cached is not None:
+        return json_response(cached, etag, if_none_match)
+    
+    stations, total = get_electric_stations(db, skip=skip, limit=limit, filters=filters, count=count)
     
     # Преобразуем в ответы
     station_responses = []
@@ -148,11 +173,112 @@ async def list_electric_stations(
             station_dict["main_photo"] = main_photo.photo_url
         station_responses.append(ElectricStationResponse(**station_dict))
     
-    return ElectricStationListResponse(
+    payload = ElectricStationListResponse(
         electric_stations=station_responses,
         total=total,
         skip=skip,
         limit=limit
+    ).model_dump_json()
+    await response_cache.set_async(cache_key, payload)
+    return json_response(payload, etag, if_none_match)
+
+
+@router.get("/nearest", response_model=ElectricStationListResponse)
+async def list_nearest_electric_stations(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100, description="Количество ближайших мест"),
+):
+    """Получение k ближайших электрозаправок (по расстоянию, без радиуса)"""
+    nearest = get_nearest_electric_stations(db, latitude, longitude, k=k)
+    
+    station_responses = []
+    for station, distance_km in nearest:
+        station_dict = ElectricStationResponse.model_validate(station).model_dump()
+        main_photo = next((p for p in station.photos if p.is_main), None)
+        if main_photo:
+            station_dict["main_photo"] = main_photo.photo_url
+        station_dict["distance_km"] = round(distance_km, 3)
+        station_responses.append(ElectricStationResponse(**station_dict))
+    
+    return ElectricStationListResponse(
+        electric_stations=station_responses,
+        total=len(station_responses),
+        skip=0,
+        limit=k
+    )
+
+
+@router.get("/clusters", response_model=MapClusterResponse)
+async def list_electric_station_clusters(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=20, description="Уровень масштаба карты"),
+):
+    """Кластеры электрозаправок для видимой области карты (количество, центроид)"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректная область карты"
+        )
+    clusters = get_electric_station_clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+    return MapClusterResponse(
+        clusters=[MapCluster(**cluster) for cluster in clusters],
+        total=sum(cluster["count"] for cluster in clusters),
+        zoom=zoom
+    )
+
+
+@router.post("/along-route", response_model=ElectricStationListResponse)
+async def list_electric_stations_along_route(
+    route: RouteCorridorRequest,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    connector_type: Optional[str] = Query(None, description="Тип разъема"),
+    min_power_kw: Optional[float] = Query(None, gt=0),
+):
+    """
+    Одобренные электрозаправки вдоль маршрута (коридор buffer_km вокруг полилинии)
+    в порядке следования; distance_km - расстояние до маршрута, route_km - от начала маршрута
+    """
+    connector_type_enum = None
+    if connector_type:
+        try:
+            connector_type_enum = ConnectorType(connector_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Неизвестный тип разъема"
+            )
+    
+    found = get_electric_stations_along_route(
+        db,
+        [(point.latitude, point.longitude) for point in route.points],
+        route.buffer_km,
+        limit=route.limit, connector_type=connector_type_enum, min_power_kw=min_power_kw
+    )
+    
+    station_responses = []
+    for station, distance_km, route_km in found:
+        station_dict = ElectricStationResponse.model_validate(station).model_dump()
+        main_photo = next((p for p in station.photos if p.is_main), None)
+        if main_photo:
+            station_dict["main_photo"] = main_photo.photo_url
+        station_dict["distance_km"] = round(distance_km, 3)
+        station_dict["route_km"] = round(route_km, 3)
+        station_responses.append(ElectricStationResponse(**station_dict))
+    
+    return ElectricStationListResponse(
+        electric_stations=station_responses,
+        total=len(station_responses),
+        skip=0,
+        limit=route.limit
     )
 
 
@@ -255,7 +381,9 @@ async def remove_electric_station_from_favorites(
 async def get_electric_station(
     station_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение детальной информации об электрозаправке"""
     station = get_electric_station_by_id(db, station_id)
@@ -272,7 +400,7 @@ async def get_electric_station(
         )
     
     # Получаем отзывы
-    reviews, _ = get_reviews_by_station(db, station_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_station(db, station_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
@@ -286,13 +414,20 @@ async def get_electric_station(
     
     station_dict = ElectricStationDetailResponse.model_validate(station).model_dump()
     station_dict["reviews"] = review_responses
+    station_dict["reviews_next_cursor"] = next_cursor(reviews, 50)
     
     # Находим главную фотографию
     main_photo = next((p for p in station.photos if p.is_main), None)
     if main_photo:
         station_dict["main_photo"] = main_photo.photo_url
     
-    return ElectricStationDetailResponse(**station_dict)
+    # ETag по содержимому: карточка включает отзывы и имена их авторов
+    detail = ElectricStationDetailResponse(**station_dict)
+    etag = content_etag(detail)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return detail
 
 
 @router.post("/{station_id}/photos", response_model=ElectricStationPhotoResponse, status_code=status.HTTP_201_CREATED)
@@ -407,6 +542,43 @@ async def update_charging_points(
     return [ChargingPointResponse.model_validate(p) for p in updated_points]
 
 
+@router.get("/{station_id}/reviews", response_model=ElectricStationReviewListResponse)
+async def get_station_reviews(
+    station_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+):
+    """Отзывы электрозаправки, новые сверху"""
+    station = get_electric_station_by_id(db, station_id)
+    if not station or station.status != ElectricStationStatus.APPROVED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Электрозаправка не найдена"
+        )
+    
+    try:
+        reviews, total = get_reviews_by_station(db, station_id, skip=skip, limit=limit, cursor=cursor, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    from app.services.user_service.crud import get_user_extended_by_id
+    items = []
+    for review in reviews:
+        review_dict = ElectricStationReviewResponse.model_validate(review).model_dump()
+        user_extended = get_user_extended_by_id(db, review.user_id)
+        if user_extended:
+            review_dict["user_name"] = user_extended.name
+        items.append(ElectricStationReviewResponse(**review_dict))
+    
+    return ElectricStationReviewListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor(reviews, limit)
+    )
+
+
 @router.post("/{station_id}/reviews", response_model=ElectricStationReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_electric_station_review(
     station_id: int,
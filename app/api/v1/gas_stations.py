@@ -2,18 +2,24 @@
 API эндпоинты для заправочных станций (пользовательские)
 """
 from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pathlib import Path
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_async_db, get_read_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_current_active_user_async
 from app.services.gas_station_service.crud import (
     create_gas_station,
     get_gas_station_by_id,
     get_gas_stations,
+    get_nearest_gas_stations,
+    get_gas_station_clusters,
+    get_gas_stations_along_route,
     update_gas_station,
     create_review,
     get_reviews_by_station,
@@ -31,6 +37,7 @@ from app.schemas.gas_station import (
     GasStationUpdate,
     GasStationResponse,
     GasStationDetailResponse,
+    ReviewListResponse,
     GasStationListResponse,
     GasStationFilter,
     FuelPriceCreate,
@@ -41,8 +48,11 @@ from app.schemas.gas_station import (
     GasStationPhotoResponse,
     BulkFuelPriceUpdate,
 )
+from app.schemas.geo import MapCluster, MapClusterResponse, RouteCorridorRequest
 from app.core.config import settings
-from app.models.gas_station import StationStatus
+from app.core.response_cache import response_cache
+from app.core.etag import content_etag, etag_matches, json_response, not_modified
+from app.models.gas_station import GasStation, StationStatus, FuelType
 
 router = APIRouter()
 
@@ -86,8 +96,8 @@ async def create_station(
 
 @router.get("/", response_model=GasStationListResponse)
 async def list_stations(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user_async)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     fuel_type: Optional[str] = Query(None, description="Тип топлива: AI-80, AI-91, AI-95, AI-98, Дизель, Газ"),
@@ -98,7 +108,9 @@ async def list_stations(
     search_query: Optional[str] = Query(None),
     latitude: Optional[float] = Query(None, ge=-90, le=90),
     longitude: Optional[float] = Query(None, ge=-180, le=180),
-    radius_km: Optional[float] = Query(None, gt=0)
+    radius_km: Optional[float] = Query(None, gt=0),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение списка заправочных станций с фильтрацией"""
     filters = GasStationFilter(
@@ -113,23 +125,152 @@ async def list_stations(
         radius_km=radius_km
     )
     
-    stations, total = get_gas_stations(db, skip=skip, limit=limit, filters=filters)
+    # Ответ зависит только от фильтров: пока версия категории не изменилась,
+    # отдаем 304 по ETag или готовый JSON из кеша. Сессия - основной БД, не реплики:
+    # ответ отстающей реплики закрепился бы в кеше под новой версией
+    cache_key = await response_cache.key_async(
+        GasStation.__tablename__,
+        {"skip": skip, "limit": limit, "count": count.value, **filters.model_dump(mode="json")}
+    )
+    etag = response_cache.etag(cache_key)
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    cached = await response_cache.get_async(cache_key)
+    if cached is not None:
+        return json_response(cached, etag, if_none_match)
+    
+    def build_payload(session: Session) -> str:
+        # Запросы и ленивая загрузка фотографий - внутри run_sync, вне event loop
+        stations, total = get_gas_stations(session, skip=skip, limit=limit, filters=filters, count=count)
+        
+        # Преобразуем в ответы
+        station_responses = []
+        for station in stations:
+            station_dict = GasStationResponse.model_validate(station).model_dump()
+            # Находим главную фотографию
+            main_photo = next((p for p in station.photos if p.is_main), None)
+            if main_photo:
+                station_dict["main_photo"] = main_photo.photo_url
+            station_responses.append(GasStationResponse(**station_dict))
+        
+        return GasStationListResponse(
+            stations=station_responses,
+            total=total,
+            skip=skip,
+            limit=limit
+        ).model_dump_json()
+    
+    payload = await db.run_sync(build_payload)
+    await response_cache.set_async(cache_key, payload)
+    return json_response(payload, etag, if_none_match)
+
+
+@router.get("/nearest", response_model=GasStationListResponse)
+async def list_nearest_stations(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100, description="Количество ближайших мест"),
+):
+    """Получение k ближайших заправочных станций (по расстоянию, без радиуса)"""
+    nearest = get_nearest_gas_stations(db, latitude, longitude, k=k)
     
-    # Преобразуем в ответы
     station_responses = []
-    for station in stations:
+    for station, distance_km in nearest:
         station_dict = GasStationResponse.model_validate(station).model_dump()
-        # Находим главную фотографию
         main_photo = next((p for p in station.photos if p.is_main), None)
         if main_photo:
             station_dict["main_photo"] = main_photo.photo_url
+        station_dict["distance_km"] = round(distance_km, 3)
         station_responses.append(GasStationResponse(**station_dict))
     
     return GasStationListResponse(
         stations=station_responses,
-        total=total,
-        skip=skip,
-        limit=limit
+        total=len(station_responses),
+        skip=0,
+        limit=k
+    )
+
+
+@router.get("/clusters", response_model=MapClusterResponse)
+async def list_station_clusters(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=20, description="Уровень масштаба карты"),
+    fuel_type: Optional[str] = Query(None, description="Тип топлива для минимальной цены: AI-80, AI-91, AI-95, AI-98, Дизель, Газ"),
+):
+    """Кластеры заправочных станций для видимой области карты (количество, центроид, минимальная цена)"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректная область карты"
+        )
+    fuel_type_enum = None
+    if fuel_type:
+        try:
+            fuel_type_enum = FuelType(fuel_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Неизвестный тип топлива"
+            )
+    
+    clusters = get_gas_station_clusters(db, min_lat, min_lon, max_lat, max_lon, zoom, fuel_type=fuel_type_enum)
+    return MapClusterResponse(
+        clusters=[MapCluster(**cluster) for cluster in clusters],
+        total=sum(cluster["count"] for cluster in clusters),
+        zoom=zoom
+    )
+
+
+@router.post("/along-route", response_model=GasStationListResponse)
+async def list_stations_along_route(
+    route: RouteCorridorRequest,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    fuel_type: Optional[str] = Query(None, description="Тип топлива: AI-80, AI-91, AI-95, AI-98, Дизель, Газ"),
+):
+    """
+    Одобренные заправочные станции вдоль маршрута (коридор buffer_km вокруг полилинии)
+    в порядке следования; distance_km - расстояние до маршрута, route_km - от начала маршрута
+    """
+    fuel_type_enum = None
+    if fuel_type:
+        try:
+            fuel_type_enum = FuelType(fuel_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Неизвестный тип топлива"
+            )
+    
+    found = get_gas_stations_along_route(
+        db,
+        [(point.latitude, point.longitude) for point in route.points],
+        route.buffer_km,
+        limit=route.limit, fuel_type=fuel_type_enum
+    )
+    
+    station_responses = []
+    for station, distance_km, route_km in found:
+        station_dict = GasStationResponse.model_validate(station).model_dump()
+        main_photo = next((p for p in station.photos if p.is_main), None)
+        if main_photo:
+            station_dict["main_photo"] = main_photo.photo_url
+        station_dict["distance_km"] = round(distance_km, 3)
+        station_dict["route_km"] = round(route_km, 3)
+        station_responses.append(GasStationResponse(**station_dict))
+    
+    return GasStationListResponse(
+        stations=station_responses,
+        total=len(station_responses),
+        skip=0,
+        limit=route.limit
     )
 
 
@@ -253,7 +394,9 @@ async def update_station(
 async def get_station(
     station_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение детальной информации о заправочной станции"""
     station = get_gas_station_by_id(db, station_id)
@@ -270,7 +413,7 @@ async def get_station(
         )
     
     # Получаем отзывы
-    reviews, _ = get_reviews_by_station(db, station_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_station(db, station_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
@@ -284,13 +427,20 @@ async def get_station(
     
     station_dict = GasStationDetailResponse.model_validate(station).model_dump()
     station_dict["reviews"] = review_responses
+    station_dict["reviews_next_cursor"] = next_cursor(reviews, 50)
     
     # Находим главную фотографию
     main_photo = next((p for p in station.photos if p.is_main), None)
     if main_photo:
         station_dict["main_photo"] = main_photo.photo_url
     
-    return GasStationDetailResponse(**station_dict)
+    # ETag по содержимому: карточка включает отзывы и имена их авторов
+    detail = GasStationDetailResponse(**station_dict)
+    etag = content_etag(detail)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return detail
 
 
 @router.post("/{station_id}/photos", response_model=GasStationPhotoResponse, status_code=status.HTTP_201_CREATED)
@@ -385,6 +535,43 @@ async def update_fuel_prices(
     return [FuelPriceResponse.model_validate(p) for p in updated_prices]
 
 
+@router.get("/{station_id}/reviews", response_model=ReviewListResponse)
+async def get_station_reviews(
+    station_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+):
+    """Отзывы заправочной станции, новые сверху"""
+    station = get_gas_station_by_id(db, station_id)
+    if not station or station.status != StationStatus.APPROVED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Заправочная станция не найдена"
+        )
+    
+    try:
+        reviews, total = get_reviews_by_station(db, station_id, skip=skip, limit=limit, cursor=cursor, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    from app.services.user_service.crud import get_user_extended_by_id
+    items = []
+    for review in reviews:
+        review_dict = ReviewResponse.model_validate(review).model_dump()
+        user_extended = get_user_extended_by_id(db, review.user_id)
+        if user_extended:
+            review_dict["user_name"] = user_extended.name
+        items.append(ReviewResponse(**review_dict))
+    
+    return ReviewListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor(reviews, limit)
+    )
+
+
 @router.post("/{station_id}/reviews", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_station_review(
     station_id: int,
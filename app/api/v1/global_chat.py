@@ -3,19 +3,27 @@ API эндпоинты для глобального чата
 """
 from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import json
+import logging
 import os
 import uuid
 from pathlib import Path
 from datetime import datetime
 
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from app.database import get_db, get_async_db, SessionLocal
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_current_active_user_async
 from app.services.global_chat_service.crud import (
     create_message,
     get_messages,
+    get_messages_since,
+    get_latest_messages,
+    get_replay_exclusions,
     search_messages,
     block_user,
     unblock_user,
@@ -27,6 +35,7 @@ from app.schemas.global_chat import (
     GlobalChatMessageCreate,
     GlobalChatMessageResponse,
     GlobalChatMessageListResponse,
+    GlobalChatSyncResponse,
     GlobalChatSearchResponse,
     UserBlockCreate,
     UserBlockResponse,
@@ -36,6 +45,13 @@ from app.schemas.global_chat import (
     MessageType,
 )
 from app.core.config import settings
+from app.core.ws_bus import LocalBus, ws_bus
+from app.core.ws_outbox import ClientConnection, encode_message
+from app.core.presence import Presence, chat_presence
+from app.services.global_chat_service.recent import RecentMessages
+from app.services.user_service.authors import resolve_authors
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -55,78 +71,179 @@ CHAT_FILES_DIR.mkdir(parents=True, exist_ok=True)
 CHAT_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def message_responses(session: Session, messages) -> list[GlobalChatMessageResponse]:
+    """Ответы сообщений с именем и аватаром автора (профили всех авторов - одним запросом)"""
+    authors = resolve_authors(session, (msg.user_id for msg in messages))
+    
+    responses = []
+    for msg in messages:
+        user_name, user_avatar = authors[msg.user_id]
+        responses.append(GlobalChatMessageResponse(
+            id=msg.id,
+            user_id=msg.user_id,
+            user_name=user_name,
+            user_avatar=user_avatar,
+            message=msg.message,
+            message_type=msg.message_type,
+            attachments=msg.attachments,
+            extra_metadata=msg.extra_metadata,
+            created_at=msg.created_at,
+            updated_at=msg.updated_at
+        ))
+    return responses
+
+
+# Канал шины событий для сообщений глобального чата
+GLOBAL_CHAT_CHANNEL = "global_chat"
+
+
 # Менеджер WebSocket соединений для глобального чата
 class GlobalChatConnectionManager:
     """Менеджер WebSocket соединений для глобального чата"""
     
-    def __init__(self):
-        # Словарь: user_id -> WebSocket соединение
-        self.active_connections: dict[int, WebSocket] = {}
-        # Счетчик онлайн пользователей
-        self.online_count = 0
-    
-    async def connect(self, websocket: WebSocket, user_id: int):
+    def __init__(self, bus: LocalBus = ws_bus, presence: Presence = chat_presence):
+        # Словарь: user_id -> соединения пользователя (вкладки, устройства)
+        self.active_connections: dict[int, list[ClientConnection]] = {}
+        # Онлайн по всем воркерам; число онлайн рассылается с задержкой (debounce)
+        self.presence = presence
+        self.presence.on_change(self.broadcast_online_count)
+        # Последние сообщения для догрузки пропущенного при переподключении
+        self.recent = RecentMessages(settings.CHAT_SYNC_BUFFER_SIZE)
+        # Сообщения из любого воркера доставляются в сокеты этого процесса
+        self.bus = bus
+        self.bus.subscribe(GLOBAL_CHAT_CHANNEL, self._on_bus_message)
+        # Потерянные шиной события не попали в буфер: догрузка уходит в БД
+        self.bus.on_gap(self.recent.invalidate)
+    
+    async def connect(self, websocket: WebSocket, user_id: int) -> ClientConnection:
         """Подключение пользователя к глобальному чату"""
         await websocket.accept()
-        
-        if user_id not in self.active_connections:
-            self.online_count += 1
-            # Уведомляем всех о новом пользователе онлайн
-            await self.broadcast_online_count()
-        
-        self.active_connections[user_id] = websocket
-    
-    def disconnect(self, user_id: int):
-        """Отключение пользователя от глобального чата"""
-        if user_id in self.active_connections:
+        connection = ClientConnection(
+            websocket,
+            max_queue=settings.WS_SEND_QUEUE_SIZE,
+            send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+        )
+        connection.start()
+        self.active_connections.setdefault(user_id, []).append(connection)
+        self.presence.add(user_id)
+        return connection
+    
+    def disconnect(self, user_id: int, connection: ClientConnection):
+        """Отключение одного соединения пользователя от глобального чата"""
+        connections = self.active_connections.get(user_id)
+        if not connections or connection not in connections:
+            return
+        connections.remove(connection)
+        if not connections:
             del self.active_connections[user_id]
-            self.online_count = max(0, self.online_count - 1)
+        connection.stop()
+        self.presence.remove(user_id)
     
     async def send_message(self, message_data: dict, exclude_user_id: Optional[int] = None):
-        """Отправка сообщения всем подключенным пользователям"""
-        disconnected = []
-        
-        for user_id, connection in list(self.active_connections.items()):
-            if exclude_user_id and user_id == exclude_user_id:
-                continue
+        """Отправка сообщения всем подключенным пользователям (во всех воркерах)"""
+        await self.bus.publish(GLOBAL_CHAT_CHANNEL, {
+            "message": message_data,
+            "exclude_user_id": exclude_user_id,
+        })
+    
+    async def _on_bus_message(self, event: dict):
+        message = event["message"]
+        if message.get("type") == "message_deleted":
+            self.recent.discard(message["message_id"])
+        elif "id" in message:
+            self.recent.add(message)
+        await self.deliver_message(message, event.get("exclude_user_id"))
+    
+    def warm(self, session_factory):
+        """Заполнение буфера догрузки из БД (ошибка не прерывает старт приложения)"""
+        db = session_factory()
+        try:
+            messages = get_latest_messages(db, limit=self.recent.max_size)
+            floor = messages[0].id - 1 if len(messages) == self.recent.max_size else 0
+            self.recent.load(
+                [response.model_dump(mode="json") for response in message_responses(db, messages)],
+                floor,
+            )
+        except Exception as exc:
+            logger.exception(f"Global chat: не удалось загрузить последние сообщения: {exc}")
+        finally:
+            db.close()
+    
+    async def replay(self, connection: ClientConnection, user_id: int, since_id: int, session_factory=SessionLocal):
+        """
+        Догрузка сообщений после since_id одним кадром {"type": "sync"}
+        Из буфера, если разрыв в нем целиком, иначе из БД. Кадр может пересекаться
+        с new_message, пришедшими во время запроса к БД - клиент убирает дубли по id
+        """
+        limit = settings.CHAT_SYNC_MAX_MESSAGES
+        messages = self.recent.since(since_id)
+        if messages is not None:
+            def load_exclusions():
+                db = session_factory()
+                try:
+                    return get_replay_exclusions(db, user_id, since_id)
+                finally:
+                    db.close()
             
-            try:
-                await connection.send_json({
-                    "type": "new_message",
-                    "message": message_data
-                })
-            except Exception:
-                disconnected.append(user_id)
-        
-        # Удаляем отключенные соединения
-        for user_id in disconnected:
-            self.disconnect(user_id)
+            # Буфер общий для всех: блокировки и скрытые сообщения - как в get_messages_since
+            blocked_ids, hidden_ids = await run_in_threadpool(load_exclusions)
+            messages = [
+                message for message in messages
+                if message["user_id"] not in blocked_ids and message["id"] not in hidden_ids
+            ]
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            def load():
+                db = session_factory()
+                try:
+                    rows = get_messages_since(db, user_id, since_id, limit=limit + 1)
+                    return [
+                        response.model_dump(mode="json")
+                        for response in message_responses(db, rows[:limit])
+                    ], len(rows) > limit
+                finally:
+                    db.close()
+            
+            messages, has_more = await run_in_threadpool(load)
         
-        # Обновляем счетчик онлайн
-        if disconnected:
-            await self.broadcast_online_count()
+        connection.send_json({
+            "type": "sync",
+            "messages": messages,
+            "last_id": messages[-1]["id"] if messages else since_id,
+            "has_more": has_more,
+        })
     
-    async def broadcast_online_count(self):
-        """Отправка обновленного количества онлайн пользователей"""
-        message = {
+    def _send_to_all(self, text: str, exclude_user_id: Optional[int] = None):
+        """Постановка строки в очереди всех соединений процесса; медленные отключаются"""
+        disconnected = [
+            (user_id, connection)
+            for user_id, connections in list(self.active_connections.items())
+            if not (exclude_user_id and user_id == exclude_user_id)
+            for connection in list(connections)
+            if not connection.send_text(text)
+        ]
+        for user_id, connection in disconnected:
+            self.disconnect(user_id, connection)
+    
+    async def deliver_message(self, message_data: dict, exclude_user_id: Optional[int] = None):
+        """Отправка сообщения пользователям, подключенным к этому процессу"""
+        self._send_to_all(encode_message({
+            "type": "new_message",
+            "message": message_data
+        }), exclude_user_id)
+    
+    async def broadcast_online_count(self, online_count: Optional[int] = None):
+        """Отправка количества онлайн пользователей в сокеты этого процесса"""
+        self._send_to_all(encode_message({
             "type": "online_count",
-            "online_count": self.online_count,
+            "online_count": self.get_online_count() if online_count is None else online_count,
             "timestamp": datetime.now().isoformat()
-        }
-        
-        disconnected = []
-        for user_id, connection in list(self.active_connections.items()):
-            try:
-                await connection.send_json(message)
-            except Exception:
-                disconnected.append(user_id)
-        
-        for user_id in disconnected:
-            self.disconnect(user_id)
+        }))
     
     def get_online_count(self) -> int:
         """Получение текущего количества онлайн пользователей"""
-        return len(self.active_connections)
+        return self.presence.online_count
 
 
 # Глобальный менеджер соединений
@@ -161,14 +278,18 @@ def save_chat_file(file: UploadFile, file_type: str, user_id: int) -> str:
 
 
 @router.websocket("/ws")
-async def websocket_global_chat(websocket: WebSocket, token: str = None):
+async def websocket_global_chat(websocket: WebSocket, token: str = None, since_id: Optional[int] = None):
     """
     WebSocket эндпоинт для глобального чата
     
-    Подключение: ws://127.0.0.1:8000/api/v1/global-chat/ws?token=<jwt_token>
+    Подключение: ws://127.0.0.1:8000/api/v1/global-chat/ws?token=<jwt_token>[&since_id=<id>]
+    
+    since_id - id последнего полученного сообщения (last_id из приветствия или
+    кадра sync): после приветствия придет кадр sync только с пропущенными сообщениями.
     """
     user_id = None
     db = None
+    connection = None
     
     try:
         # Валидация токена
@@ -201,23 +322,28 @@ async def websocket_global_chat(websocket: WebSocket, token: str = None):
             return
         
         # Подключаемся
-        await global_chat_manager.connect(websocket, user_id)
+        connection = await global_chat_manager.connect(websocket, user_id)
         
-        # Отправляем приветственное сообщение
-        await websocket.send_json({
+        # Отправляем приветственное сообщение (через очередь соединения, как и рассылки)
+        connection.send_json({
             "type": "connection",
             "status": "connected",
             "user_id": user_id,
             "online_count": global_chat_manager.get_online_count(),
+            "last_id": global_chat_manager.recent.last_id,
             "message": "Подключено к глобальному чату"
         })
         
+        # Догрузка пропущенного за время разрыва
+        if since_id is not None:
+            await global_chat_manager.replay(connection, user_id, since_id)
+        
         # Ожидаем сообщения
         while True:
             try:
                 data = await websocket.receive_text()
                 if data == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    connection.send_json({"type": "pong"})
             except WebSocketDisconnect:
                 break
                 
@@ -229,10 +355,9 @@ async def websocket_global_chat(websocket: WebSocket, token: str = None):
                 db.close()
             except:
                 pass
-        if user_id:
-            global_chat_manager.disconnect(user_id)
-            # Уведомляем остальных об изменении количества онлайн
-            await global_chat_manager.broadcast_online_count()
+        if connection is not None:
+            # Число онлайн разошлется с задержкой (app.core.presence)
+            global_chat_manager.disconnect(user_id, connection)
 
 
 # ==================== REST API Endpoints ====================
@@ -246,23 +371,8 @@ async def send_message(
     """Отправка сообщения в глобальный чат"""
     message = create_message(db, current_user.id, message_data)
     
-    # Получаем информацию о пользователе
-    from app.services.user_service.crud import get_user_extended_by_id
-    user_extended = get_user_extended_by_id(db, current_user.id)
-    
-    # Формируем ответ
-    message_response = GlobalChatMessageResponse(
-        id=message.id,
-        user_id=message.user_id,
-        user_name=user_extended.name if user_extended else None,
-        user_avatar=user_extended.avatar if user_extended else None,
-        message=message.message,
-        message_type=message.message_type,
-        attachments=message.attachments,
-        extra_metadata=message.extra_metadata,
-        created_at=message.created_at,
-        updated_at=message.updated_at
-    )
+    # Формируем ответ с именем и аватаром автора
+    message_response = message_responses(db, [message])[0]
     
     # Отправляем через WebSocket всем подключенным
     await global_chat_manager.send_message(
@@ -335,38 +445,53 @@ async def upload_file(
 
 @router.get("/messages", response_model=GlobalChatMessageListResponse)
 async def get_chat_messages(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user_async)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
-    """Получение сообщений глобального чата"""
-    messages, total = get_messages(db, current_user.id, skip=skip, limit=limit)
-    
-    # Получаем информацию о пользователях
-    from app.services.user_service.crud import get_user_extended_by_id
+    """Получение сообщений глобального чата (для бесконечной ленты - по cursor)"""
+    def load_messages(session: Session):
+        messages, total = get_messages(
+            session, current_user.id, skip=skip, limit=limit, cursor=cursor, count=count
+        )
+        return message_responses(session, messages), total, next_cursor(messages, limit)
     
-    messages_response = []
-    for msg in messages:
-        user_extended = get_user_extended_by_id(db, msg.user_id)
-        messages_response.append(GlobalChatMessageResponse(
-            id=msg.id,
-            user_id=msg.user_id,
-            user_name=user_extended.name if user_extended else None,
-            user_avatar=user_extended.avatar if user_extended else None,
-            message=msg.message,
-            message_type=msg.message_type,
-            attachments=msg.attachments,
-            extra_metadata=msg.extra_metadata,
-            created_at=msg.created_at,
-            updated_at=msg.updated_at
-        ))
+    try:
+        messages_response, total, cursor_after = await db.run_sync(load_messages)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     return GlobalChatMessageListResponse(
         messages=messages_response,
         total=total,
         skip=skip,
         limit=limit,
+        next_cursor=cursor_after,
+        online_count=global_chat_manager.get_online_count()
+    )
+
+
+@router.get("/messages/sync", response_model=GlobalChatSyncResponse)
+async def sync_chat_messages(
+    current_user: Annotated[User, Depends(get_current_active_user_async)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    since_id: int = Query(..., ge=0, description="id последнего полученного сообщения"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Сообщения после since_id по возрастанию id (догрузка после разрыва, без подсчета total)"""
+    def load_messages(session: Session):
+        messages = get_messages_since(session, current_user.id, since_id, limit=limit + 1)
+        return message_responses(session, messages[:limit]), len(messages) > limit
+    
+    messages_response, has_more = await db.run_sync(load_messages)
+    
+    return GlobalChatSyncResponse(
+        messages=messages_response,
+        last_id=messages_response[-1].id if messages_response else since_id,
+        has_more=has_more,
         online_count=global_chat_manager.get_online_count()
     )
 
@@ -382,27 +507,8 @@ async def search_chat_messages(
     """Поиск сообщений в глобальном чате"""
     messages, total = search_messages(db, current_user.id, query, skip=skip, limit=limit)
     
-    # Получаем информацию о пользователях
-    from app.services.user_service.crud import get_user_extended_by_id
-    
-    messages_response = []
-    for msg in messages:
-        user_extended = get_user_extended_by_id(db, msg.user_id)
-        messages_response.append(GlobalChatMessageResponse(
-            id=msg.id,
-            user_id=msg.user_id,
-            user_name=user_extended.name if user_extended else None,
-            user_avatar=user_extended.avatar if user_extended else None,
-            message=msg.message,
-            message_type=msg.message_type,
-            attachments=msg.attachments,
-            extra_metadata=msg.extra_metadata,
-            created_at=msg.created_at,
-            updated_at=msg.updated_at
-        ))
-    
     return GlobalChatSearchResponse(
-        messages=messages_response,
+        messages=message_responses(db, messages),
         total=total,
         query=query,
         skip=skip,
@@ -478,17 +584,16 @@ async def get_blocked_users(
     """Получение списка заблокированных пользователей"""
     blocked_list = get_blocked_users_crud(db, current_user.id)
     
-    # Получаем информацию о пользователях
-    from app.services.user_service.crud import get_user_extended_by_id
+    # Имена заблокированных пользователей - одним запросом
+    authors = resolve_authors(db, (block.blocked_id for block in blocked_list))
     
     blocked_response = []
     for block in blocked_list:
-        blocked_user_extended = get_user_extended_by_id(db, block.blocked_id)
         blocked_response.append(UserBlockResponse(
             id=block.id,
             blocker_id=block.blocker_id,
             blocked_id=block.blocked_id,
-            blocked_user_name=blocked_user_extended.name if blocked_user_extended else None,
+            blocked_user_name=authors[block.blocked_id][0],
             created_at=block.created_at
         ))
     
@@ -3,12 +3,16 @@ API эндпоинты для уведомлений пользователей
 """
 from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import json
 
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
+from app.core.ws_bus import ws_bus
 from app.models.user import User
-from app.api.deps import get_current_active_user
+from app.api.deps import get_current_active_user, get_current_active_user_async
 from app.services.notification_service.crud import (
     get_user_notifications,
     get_unread_count,
@@ -27,6 +31,9 @@ from app.schemas.notification import (
 
 router = APIRouter()
 
+# Канал шины событий для уведомлений
+NOTIFICATIONS_CHANNEL = "notifications"
+
 
 # Менеджер WebSocket соединений
 class ConnectionManager:
@@ -37,6 +44,8 @@ class ConnectionManager:
         self.active_connections: dict[int, list[WebSocket]] = {}
         # Список соединений для глобальных уведомлений (все пользователи)
         self.global_connections: list[WebSocket] = []
+        # Уведомления из любого воркера доставляются в сокеты этого процесса
+        ws_bus.subscribe(NOTIFICATIONS_CHANNEL, self._on_bus_message)
     
     async def connect(self, websocket: WebSocket, user_id: Optional[int] = None):
         """Подключение пользователя к WebSocket"""
@@ -61,7 +70,21 @@ class ConnectionManager:
                 self.global_connections.remove(websocket)
     
     async def send_personal_notification(self, user_id: int, message: dict):
-        """Отправка персонального уведомления пользователю"""
+        """Отправка персонального уведомления пользователю (во всех воркерах)"""
+        await ws_bus.publish(NOTIFICATIONS_CHANNEL, {"user_id": user_id, "message": message})
+    
+    async def send_global_notification(self, message: dict):
+        """Отправка глобального уведомления всем пользователям (во всех воркерах)"""
+        await ws_bus.publish(NOTIFICATIONS_CHANNEL, {"user_id": None, "message": message})
+    
+    async def _on_bus_message(self, event: dict):
+        if event.get("user_id") is None:
+            await self.deliver_global_notification(event["message"])
+        else:
+            await self.deliver_personal_notification(event["user_id"], event["message"])
+    
+    async def deliver_personal_notification(self, user_id: int, message: dict):
+        """Отправка персонального уведомления в сокеты пользователя в этом процессе"""
         if user_id in self.active_connections:
             disconnected = []
             for connection in self.active_connections[user_id]:
@@ -74,8 +97,8 @@ class ConnectionManager:
             for conn in disconnected:
                 self.active_connections[user_id].remove(conn)
     
-    async def send_global_notification(self, message: dict):
-        """Отправка глобального уведомления всем пользователям"""
+    async def deliver_global_notification(self, message: dict):
+        """Отправка глобального уведомления всем сокетам этого процесса"""
         disconnected = []
         for connection in self.global_connections:
             try:
@@ -172,11 +195,13 @@ async def websocket_notifications(websocket: WebSocket, token: str = None):
 
 @router.get("", response_model=NotificationListResponse)
 async def get_notifications(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_active_user_async)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(100, ge=1, le=1000, description="Максимальное количество записей"),
-    unread_only: Optional[bool] = Query(None, description="Только непрочитанные уведомления")
+    unread_only: Optional[bool] = Query(None, description="Только непрочитанные уведомления"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)")
 ):
     """
     Получение списка уведомлений пользователя
@@ -185,24 +210,32 @@ async def get_notifications(
     - Персональные уведомления (созданные специально для этого пользователя)
     - Глобальные уведомления (для всех пользователей)
     """
-    try:
+    def load_notifications(session: Session) -> NotificationListResponse:
         notifications, total = get_user_notifications(
-            db,
+            session,
             current_user.id,
             skip=skip,
             limit=limit,
-            unread_only=unread_only
+            unread_only=unread_only,
+            cursor=cursor,
+            count=count
         )
         
-        unread_count = get_unread_count(db, current_user.id)
+        unread_count = get_unread_count(session, current_user.id)
         
         return NotificationListResponse(
             notifications=[NotificationResponse.model_validate(n) for n in notifications],
             total=total,
             unread_count=unread_count,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor(notifications, limit)
         )
+    
+    try:
+        return await db.run_sync(load_notifications)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         import traceback
         print(f"Error getting notifications: {str(e)}")
@@ -1,11 +1,13 @@
 """
 API endpoints для регионов Узбекистана
 """
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, Query
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Query, Header, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_read_db
+from app.core.etag import make_etag, etag_matches, not_modified
 from app.schemas.driver import RegionResponse
 from app.models.driver import Region
 
@@ -14,8 +16,10 @@ router = APIRouter(prefix="/regions", tags=["Регионы"])
 
 @router.get("", response_model=List[RegionResponse])
 async def get_regions(
+    response: Response,
     is_active: bool = Query(None, description="Фильтр по активности региона"),
-    db: Annotated[Session, Depends(get_db)] = None
+    if_none_match: Optional[str] = Header(None),
+    db: Annotated[Session, Depends(get_read_db)] = None
 ):
     """Получение списка регионов Узбекистана"""
     query = db.query(Region)
@@ -23,14 +27,25 @@ async def get_regions(
     if is_active is not None:
         query = query.filter(Region.is_active == is_active)
     
+    # ETag по количеству и последним изменениям: один агрегатный запрос вместо списка
+    count, last_updated, last_created = query.with_entities(
+        func.count(Region.id), func.max(Region.updated_at), func.max(Region.created_at)
+    ).one()
+    etag = make_etag("regions", is_active, count, last_updated, last_created)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
     regions = query.order_by(Region.display_order, Region.name_ru).all()
+    response.headers["ETag"] = etag
     return regions
 
 
 @router.get("/{region_id}", response_model=RegionResponse)
 async def get_region(
     region_id: int,
-    db: Annotated[Session, Depends(get_db)] = None
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Annotated[Session, Depends(get_read_db)] = None
 ):
     """Получение региона по ID"""
     region = db.query(Region).filter(Region.id == region_id).first()
@@ -40,5 +55,10 @@ async def get_region(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Регион не найден"
         )
+    
+    etag = make_etag("region", region.id, region.updated_at or region.created_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return region
 
@@ -2,18 +2,22 @@
 API эндпоинты для ресторанов (пользовательские)
 """
 from typing import Annotated, Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response, Header
 from sqlalchemy.orm import Session
 from pathlib import Path
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
 from app.api.deps import get_current_active_user
 from app.services.restaurant_service.crud import (
     create_restaurant,
     get_restaurant_by_id,
     get_restaurants,
+    get_nearest_restaurants,
+    get_restaurant_clusters,
     create_review,
     get_reviews_by_restaurant,
     update_review,
@@ -34,6 +38,7 @@ from app.schemas.restaurant import (
     RestaurantCreate,
     RestaurantResponse,
     RestaurantDetailResponse,
+    RestaurantReviewListResponse,
     RestaurantListResponse,
     RestaurantFilter,
     RestaurantReviewCreate,
@@ -47,8 +52,11 @@ from app.schemas.restaurant import (
     MenuItemResponse,
     MenuItemUpdate,
 )
+from app.schemas.geo import MapCluster, MapClusterResponse
 from app.core.config import settings
-from app.models.restaurant import RestaurantStatus
+from app.core.response_cache import response_cache
+from app.core.etag import content_etag, etag_matches, json_response, not_modified
+from app.models.restaurant import Restaurant, RestaurantStatus
 
 router = APIRouter()
 
@@ -116,7 +124,9 @@ async def list_restaurants(
     search_query: Optional[str] = Query(None),
     latitude: Optional[float] = Query(None, ge=-90, le=90),
     longitude: Optional[float] = Query(None, ge=-180, le=180),
-    radius_km: Optional[float] = Query(None, gt=0)
+    radius_km: Optional[float] = Query(None, gt=0),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение списка ресторанов с фильтрацией"""
     filters = RestaurantFilter(
@@ -136,7 +146,21 @@ async def list_restaurants(
         radius_km=radius_km
     )
     
-    restaurants, total = get_restaurants(db, skip=skip, limit=limit, filters=filters)
+    # Ответ зависит только от фильтров: пока версия категории не изменилась,
+    # отдаем 304 по ETag или готовый JSON из кеша. Сессия - основной БД, не реплики:
+    # ответ отстающей реплики закрепился бы в кеше под новой версией
+    cache_key = await response_cache.key_async(
+        Restaurant.__tablename__,
+        {"skip": skip, "limit": limit, "count": count.value, **filters.model_dump(mode="json")}
+    )
+    etag = response_cache.etag(cache_key)
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    cached = await response_cache.get_async(cache_key)
+    if cached is not None:
+        return json_response(cached, etag, if_none_match)
+    
+    restaurants, total = get_restaurants(db, skip=skip, limit=limit, filters=filters, count=count)
     
     # Преобразуем в ответы
     restaurant_responses = []
@@ -148,11 +172,65 @@ async def list_restaurants(
             restaurant_dict["main_photo"] = main_photo.photo_url
         restaurant_responses.append(RestaurantResponse(**restaurant_dict))
     
-    return RestaurantListResponse(
+    payload = RestaurantListResponse(
         restaurants=restaurant_responses,
         total=total,
         skip=skip,
         limit=limit
+    ).model_dump_json()
+    await response_cache.set_async(cache_key, payload)
+    return json_response(payload, etag, if_none_match)
+
+
+@router.get("/nearest", response_model=RestaurantListResponse)
+async def list_nearest_restaurants(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100, description="Количество ближайших мест"),
+):
+    """Получение k ближайших ресторанов (по расстоянию, без радиуса)"""
+    nearest = get_nearest_restaurants(db, latitude, longitude, k=k)
+    
+    restaurant_responses = []
+    for restaurant, distance_km in nearest:
+        restaurant_dict = RestaurantResponse.model_validate(restaurant).model_dump()
+        main_photo = next((p for p in restaurant.photos if p.is_main), None)
+        if main_photo:
+            restaurant_dict["main_photo"] = main_photo.photo_url
+        restaurant_dict["distance_km"] = round(distance_km, 3)
+        restaurant_responses.append(RestaurantResponse(**restaurant_dict))
+    
+    return RestaurantListResponse(
+        restaurants=restaurant_responses,
+        total=len(restaurant_responses),
+        skip=0,
+        limit=k
+    )
+
+
+@router.get("/clusters", response_model=MapClusterResponse)
+async def list_restaurant_clusters(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=20, description="Уровень масштаба карты"),
+):
+    """Кластеры ресторанов для видимой области карты (количество, центроид)"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректная область карты"
+        )
+    clusters = get_restaurant_clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+    return MapClusterResponse(
+        clusters=[MapCluster(**cluster) for cluster in clusters],
+        total=sum(cluster["count"] for cluster in clusters),
+        zoom=zoom
     )
 
 
@@ -255,7 +333,9 @@ async def remove_restaurant_from_favorites(
 async def get_restaurant(
     restaurant_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение детальной информации о ресторане"""
     restaurant = get_restaurant_by_id(db, restaurant_id)
@@ -272,7 +352,7 @@ async def get_restaurant(
         )
     
     # Получаем отзывы
-    reviews, _ = get_reviews_by_restaurant(db, restaurant_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_restaurant(db, restaurant_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
@@ -286,13 +366,20 @@ async def get_restaurant(
     
     restaurant_dict = RestaurantDetailResponse.model_validate(restaurant).model_dump()
     restaurant_dict["reviews"] = review_responses
+    restaurant_dict["reviews_next_cursor"] = next_cursor(reviews, 50)
     
     # Находим главную фотографию
     main_photo = next((p for p in restaurant.photos if p.is_main), None)
     if main_photo:
         restaurant_dict["main_photo"] = main_photo.photo_url
     
-    return RestaurantDetailResponse(**restaurant_dict)
+    # ETag по содержимому: карточка включает отзывы и имена их авторов
+    detail = RestaurantDetailResponse(**restaurant_dict)
+    etag = content_etag(detail)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return detail
 
 
 @router.post("/{restaurant_id}/photos", response_model=RestaurantPhotoResponse, status_code=status.HTTP_201_CREATED)
@@ -408,7 +495,9 @@ async def create_menu_category_endpoint(
 async def get_menu_categories(
     restaurant_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение всех категорий меню ресторана"""
     restaurant = get_restaurant_by_id(db, restaurant_id)
@@ -419,7 +508,12 @@ async def get_menu_categories(
         )
     
     categories = get_menu_categories_by_restaurant(db, restaurant_id)
-    return [MenuCategoryResponse.model_validate(cat) for cat in categories]
+    menu = [MenuCategoryResponse.model_validate(cat) for cat in categories]
+    etag = content_etag(menu)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return menu
 
 
 @router.put("/{restaurant_id}/menu/categories/{category_id}", response_model=MenuCategoryResponse)
@@ -520,7 +614,9 @@ async def get_menu_items(
     restaurant_id: int,
     category_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение всех блюд категории"""
     restaurant = get_restaurant_by_id(db, restaurant_id)
@@ -531,7 +627,12 @@ async def get_menu_items(
         )
     
     items = get_menu_items_by_category(db, category_id)
-    return [MenuItemResponse.model_validate(item) for item in items]
+    menu = [MenuItemResponse.model_validate(item) for item in items]
+    etag = content_etag(menu)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return menu
 
 
 @router.put("/{restaurant_id}/menu/items/{item_id}", response_model=MenuItemResponse)
@@ -600,6 +701,43 @@ async def delete_menu_item_endpoint(
 
 # ==================== Reviews ====================
 
+@router.get("/{restaurant_id}/reviews", response_model=RestaurantReviewListResponse)
+async def get_restaurant_reviews(
+    restaurant_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+):
+    """Отзывы ресторана, новые сверху"""
+    restaurant = get_restaurant_by_id(db, restaurant_id)
+    if not restaurant or restaurant.status != RestaurantStatus.APPROVED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ресторан не найден"
+        )
+    
+    try:
+        reviews, total = get_reviews_by_restaurant(db, restaurant_id, skip=skip, limit=limit, cursor=cursor, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    from app.services.user_service.crud import get_user_extended_by_id
+    items = []
+    for review in reviews:
+        review_dict = RestaurantReviewResponse.model_validate(review).model_dump()
+        user_extended = get_user_extended_by_id(db, review.user_id)
+        if user_extended:
+            review_dict["user_name"] = user_extended.name
+        items.append(RestaurantReviewResponse(**review_dict))
+    
+    return RestaurantReviewListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor(reviews, limit)
+    )
+
+
 @router.post("/{restaurant_id}/reviews", response_model=RestaurantReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_restaurant_review(
     restaurant_id: int,
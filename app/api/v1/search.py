@@ -0,0 +1,91 @@
+"""
+API эндпоинты единого поиска мест по всем категориям и подсказок
+"""
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Query, Header
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.api.deps import get_current_active_user
+from app.services.search_service import PLACE_CATEGORIES, search_places, suggest_index
+from app.schemas.search import PlaceSearchResponse, PlaceSuggestResponse
+from app.core.response_cache import response_cache
+from app.core.etag import etag_matches, json_response, not_modified
+
+router = APIRouter()
+
+
+@router.get("/", response_model=PlaceSearchResponse)
+async def search(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    q: str = Query(..., min_length=1, max_length=100, description="Название, адрес или описание места"),
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0),
+    categories: Optional[List[str]] = Query(
+        None, description=f"Категории поиска (по умолчанию все): {', '.join(PLACE_CATEGORIES)}"
+    ),
+    per_category: int = Query(5, ge=1, le=20, description="Максимум результатов одной категории"),
+    limit: int = Query(20, ge=1, le=100),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Поиск мест всех категорий одним запросом
+    Результаты отсортированы по релевантности с поправкой на расстояние до пользователя
+    """
+    selected = sorted(set(categories) & set(PLACE_CATEGORIES)) if categories else sorted(PLACE_CATEGORIES)
+
+    # Ответ устаревает при записи в любую из категорий поиска
+    versions = [await response_cache.version_async(category) for category in selected]
+    cache_key = await response_cache.key_async(
+        "search",
+        {
+            "q": q,
+            "latitude": latitude,
+            "longitude": longitude,
+            "radius_km": radius_km,
+            "categories": selected,
+            "per_category": per_category,
+            "limit": limit,
+            "versions": versions,
+        }
+    )
+    etag = response_cache.etag(cache_key, versions)
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    cached = await response_cache.get_async(cache_key)
+    if cached is not None:
+        return json_response(cached, etag, if_none_match)
+
+    found = search_places(
+        db,
+        q,
+        latitude=latitude,
+        longitude=longitude,
+        radius_km=radius_km,
+        categories=selected,
+        per_category=per_category,
+        limit=limit,
+    )
+    payload = PlaceSearchResponse(
+        results=found["results"],
+        total=len(found["results"]),
+        categories=found["categories"],
+    ).model_dump_json()
+    await response_cache.set_async(cache_key, payload)
+    return json_response(payload, etag, if_none_match)
+
+
+@router.get("/suggest", response_model=PlaceSuggestResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="Начало названия или адреса"),
+    categories: Optional[List[str]] = Query(None),
+    limit: int = Query(10, ge=1, le=30)
+):
+    """
+    Подсказки для строки поиска (на каждое нажатие клавиши)
+    Отвечает из in-memory индекса без обращения к БД, поэтому без авторизации
+    """
+    return PlaceSuggestResponse(suggestions=suggest_index.suggest(q, limit=limit, categories=categories))
@@ -2,18 +2,22 @@
 API эндпоинты для станций технического обслуживания (СТО) (пользовательские)
 """
 from typing import Annotated, Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response, Header
 from sqlalchemy.orm import Session
 from pathlib import Path
 import uuid
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.core.counting import CountMode
+from app.core.pagination import next_cursor
 from app.models.user import User
 from app.api.deps import get_current_active_user
 from app.services.service_station_service.crud import (
     create_service_station,
     get_service_station_by_id,
     get_service_stations,
+    get_nearest_service_stations,
+    get_service_station_clusters,
     create_review,
     get_reviews_by_station,
     update_review,
@@ -30,6 +34,7 @@ from app.schemas.service_station import (
     ServiceStationCreate,
     ServiceStationResponse,
     ServiceStationDetailResponse,
+    ServiceStationReviewListResponse,
     ServiceStationListResponse,
     ServiceStationFilter,
     ServicePriceCreate,
@@ -40,8 +45,11 @@ from app.schemas.service_station import (
     ServiceStationPhotoResponse,
     BulkServicePriceUpdate,
 )
+from app.schemas.geo import MapCluster, MapClusterResponse
 from app.core.config import settings
-from app.models.service_station import ServiceStationStatus
+from app.core.response_cache import response_cache
+from app.core.etag import content_etag, etag_matches, json_response, not_modified
+from app.models.service_station import ServiceStation, ServiceStationStatus
 
 router = APIRouter()
 
@@ -101,7 +109,9 @@ async def list_service_stations(
     search_query: Optional[str] = Query(None),
     latitude: Optional[float] = Query(None, ge=-90, le=90),
     longitude: Optional[float] = Query(None, ge=-180, le=180),
-    radius_km: Optional[float] = Query(None, gt=0)
+    radius_km: Optional[float] = Query(None, gt=0),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение списка СТО с фильтрацией"""
     filters = ServiceStationFilter(
@@ -121,7 +131,21 @@ async def list_service_stations(
         radius_km=radius_km
     )
     
-    stations, total = get_service_stations(db, skip=skip, limit=limit, filters=filters)
+    # Ответ зависит только от фильтров: пока версия категории не изменилась,
+    # отдаем 304 по ETag или готовый JSON из кеша. Сессия - основной БД, не реплики:
+    # ответ отстающей реплики закрепился бы в кеше под новой версией
+    cache_key = await response_cache.key_async(
+        ServiceStation.__tablename__,
+        {"skip": skip, "limit": limit, "count": count.value, **filters.model_dump(mode="json")}
+    )
+    etag = response_cache.etag(cache_key)
+    if etag is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    cached = await response_cache.get_async(cache_key)
+    if cached is not None:
+        return json_response(cached, etag, if_none_match)
+    
+    stations, total = get_service_stations(db, skip=skip, limit=limit, filters=filters, count=count)
     
     # Преобразуем в ответы
     station_responses = []
@@ -133,11 +157,65 @@ async def list_service_stations(
             station_dict["main_photo"] = main_photo.photo_url
         station_responses.append(ServiceStationResponse(**station_dict))
     
-    return ServiceStationListResponse(
+    payload = ServiceStationListResponse(
         service_stations=station_responses,
         total=total,
         skip=skip,
         limit=limit
+    ).model_dump_json()
+    await response_cache.set_async(cache_key, payload)
+    return json_response(payload, etag, if_none_match)
+
+
+@router.get("/nearest", response_model=ServiceStationListResponse)
+async def list_nearest_service_stations(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=100, description="Количество ближайших мест"),
+):
+    """Получение k ближайших СТО (по расстоянию, без радиуса)"""
+    nearest = get_nearest_service_stations(db, latitude, longitude, k=k)
+    
+    station_responses = []
+    for station, distance_km in nearest:
+        station_dict = ServiceStationResponse.model_validate(station).model_dump()
+        main_photo = next((p for p in station.photos if p.is_main), None)
+        if main_photo:
+            station_dict["main_photo"] = main_photo.photo_url
+        station_dict["distance_km"] = round(distance_km, 3)
+        station_responses.append(ServiceStationResponse(**station_dict))
+    
+    return ServiceStationListResponse(
+        service_stations=station_responses,
+        total=len(station_responses),
+        skip=0,
+        limit=k
+    )
+
+
+@router.get("/clusters", response_model=MapClusterResponse)
+async def list_service_station_clusters(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=20, description="Уровень масштаба карты"),
+):
+    """Кластеры СТО для видимой области карты (количество, центроид)"""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректная область карты"
+        )
+    clusters = get_service_station_clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+    return MapClusterResponse(
+        clusters=[MapCluster(**cluster) for cluster in clusters],
+        total=sum(cluster["count"] for cluster in clusters),
+        zoom=zoom
     )
 
 
@@ -240,7 +318,9 @@ async def remove_service_station_from_favorites(
 async def get_service_station(
     station_id: int,
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
 ):
     """Получение детальной информации о СТО"""
     station = get_service_station_by_id(db, station_id)
@@ -257,7 +337,7 @@ async def get_service_station(
         )
     
     # Получаем отзывы
-    reviews, _ = get_reviews_by_station(db, station_id, skip=0, limit=50)
+    reviews, _ = get_reviews_by_station(db, station_id, limit=50, count=CountMode.NONE)
     
     # Преобразуем отзывы с именами пользователей
     from app.services.user_service.crud import get_user_extended_by_id
@@ -271,13 +351,20 @@ async def get_service_station(
     
     station_dict = ServiceStationDetailResponse.model_validate(station).model_dump()
     station_dict["reviews"] = review_responses
+    station_dict["reviews_next_cursor"] = next_cursor(reviews, 50)
     
     # Находим главную фотографию
     main_photo = next((p for p in station.photos if p.is_main), None)
     if main_photo:
         station_dict["main_photo"] = main_photo.photo_url
     
-    return ServiceStationDetailResponse(**station_dict)
+    # ETag по содержимому: карточка включает отзывы и имена их авторов
+    detail = ServiceStationDetailResponse(**station_dict)
+    etag = content_etag(detail)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return detail
 
 
 @router.post("/{station_id}/photos", response_model=ServiceStationPhotoResponse, status_code=status.HTTP_201_CREATED)
@@ -394,6 +481,43 @@ async def update_service_prices(
     return [ServicePriceResponse.model_validate(p) for p in updated_prices]
 
 
+@router.get("/{station_id}/reviews", response_model=ServiceStationReviewListResponse)
+async def get_station_reviews(
+    station_id: int,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа) вместо skip"),
+    count: CountMode = Query(CountMode.EXACT, description="Подсчет total: exact, estimate (дешевая оценка) или none (без COUNT, total = null)"),
+):
+    """Отзывы СТО, новые сверху"""
+    station = get_service_station_by_id(db, station_id)
+    if not station or station.status != ServiceStationStatus.APPROVED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="СТО не найдена"
+        )
+    
+    try:
+        reviews, total = get_reviews_by_station(db, station_id, skip=skip, limit=limit, cursor=cursor, count=count)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    from app.services.user_service.crud import get_user_extended_by_id
+    items = []
+    for review in reviews:
+        review_dict = ServiceStationReviewResponse.model_validate(review).model_dump()
+        user_extended = get_user_extended_by_id(db, review.user_id)
+        if user_extended:
+            review_dict["user_name"] = user_extended.name
+        items.append(ServiceStationReviewResponse(**review_dict))
+    
+    return ServiceStationReviewListResponse(
+        items=items, total=total, skip=skip, limit=limit, next_cursor=next_cursor(reviews, limit)
+    )
+
+
 @router.post("/{station_id}/reviews", response_model=ServiceStationReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_service_station_review(
     station_id: int,
@@ -32,9 +32,13 @@ from app.schemas.support import (
     SupportMessageResponse,
 )
 from app.models.support import TicketStatus
+from app.core.ws_bus import ws_bus
 
 router = APIRouter()
 
+# Канал шины событий для чата поддержки
+SUPPORT_CHANNEL = "support"
+
 
 # Менеджер WebSocket соединений для поддержки
 class SupportConnectionManager:
@@ -47,6 +51,8 @@ class SupportConnectionManager:
         self.user_connections: dict[int, list[WebSocket]] = {}
         # Список администраторов
         self.admin_connections: list[WebSocket] = []
+        # События из любого воркера доставляются в сокеты этого процесса
+        ws_bus.subscribe(SUPPORT_CHANNEL, self._on_bus_message)
     
     async def connect_to_ticket(self, websocket: WebSocket, ticket_id: int, user_id: int, is_admin: bool = False):
         """Подключение к чату тикета"""
@@ -85,7 +91,28 @@ class SupportConnectionManager:
                     del self.user_connections[user_id]
     
     async def send_message_to_ticket(self, ticket_id: int, message: dict):
-        """Отправка сообщения в чат тикета"""
+        """Отправка сообщения в чат тикета (во всех воркерах)"""
+        await ws_bus.publish(SUPPORT_CHANNEL, {"kind": "ticket", "ticket_id": ticket_id, "message": message})
+    
+    async def notify_new_ticket(self, user_id: int, ticket_data: dict):
+        """Уведомление пользователя о новом тикете (во всех воркерах)"""
+        await ws_bus.publish(SUPPORT_CHANNEL, {"kind": "new_ticket", "user_id": user_id, "ticket": ticket_data})
+    
+    async def notify_new_message_to_admins(self, ticket_data: dict):
+        """Уведомление администраторов о новом сообщении (во всех воркерах)"""
+        await ws_bus.publish(SUPPORT_CHANNEL, {"kind": "admins", "ticket": ticket_data})
+    
+    async def _on_bus_message(self, event: dict):
+        kind = event.get("kind")
+        if kind == "ticket":
+            await self.deliver_message_to_ticket(event["ticket_id"], event["message"])
+        elif kind == "new_ticket":
+            await self.deliver_new_ticket(event["user_id"], event["ticket"])
+        elif kind == "admins":
+            await self.deliver_new_message_to_admins(event["ticket"])
+    
+    async def deliver_message_to_ticket(self, ticket_id: int, message: dict):
+        """Отправка сообщения в сокеты тикета в этом процессе"""
         if ticket_id in self.ticket_connections:
             disconnected = []
             for connection in self.ticket_connections[ticket_id]:
@@ -98,8 +125,8 @@ class SupportConnectionManager:
             for conn in disconnected:
                 self.ticket_connections[ticket_id].remove(conn)
     
-    async def notify_new_ticket(self, user_id: int, ticket_data: dict):
-        """Уведомление пользователя о новом тикете"""
+    async def deliver_new_ticket(self, user_id: int, ticket_data: dict):
+        """Уведомление пользователя о новом тикете в сокеты этого процесса"""
         if user_id in self.user_connections:
             disconnected = []
             for connection in self.user_connections[user_id]:
@@ -114,8 +141,8 @@ class SupportConnectionManager:
             for conn in disconnected:
                 self.user_connections[user_id].remove(conn)
     
-    async def notify_new_message_to_admins(self, ticket_data: dict):
-        """Уведомление администраторов о новом сообщении"""
+    async def deliver_new_message_to_admins(self, ticket_data: dict):
+        """Уведомление администраторов, подключенных к этому процессу"""
         disconnected = []
         for connection in self.admin_connections:
             try:
@@ -0,0 +1,84 @@
+"""
+Подсчет total для списков: count=exact|estimate|none
+
+- exact — SELECT count(*) (как раньше)
+- none — без подсчета, total = None
+- estimate — дешевая оценка:
+  * для категорий с версиями в кеше ответов (места) — точный count,
+    закешированный до следующей записи в категорию (response_cache.bump);
+  * иначе на PostgreSQL — оценка планировщика (EXPLAIN, "Plan Rows"),
+    которая строится по статистике pg_class.reltuples/pg_stats без чтения строк;
+  * на остальных СУБД — точный count.
+"""
+import enum
+import json
+from typing import Optional
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+from app.core.response_cache import response_cache
+
+
+class CountMode(str, enum.Enum):
+    """Режим подсчета общего количества в списках"""
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) для произвольного SELECT"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def planner_estimate(query: Query) -> Optional[int]:
+    """Оценка количества строк планировщиком PostgreSQL (None на других СУБД)"""
+    if query.session.get_bind().dialect.name != "postgresql":
+        return None
+    plan = query.session.execute(_Explain(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _cached_count(query: Query, category: str) -> int:
+    """Точный count, закешированный в текущей версии категории"""
+    compiled = query.statement.compile()
+    cache_key = response_cache.key(category, {"count": str(compiled), "params": compiled.params})
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return int(cached)
+    total = query.count()
+    response_cache.set(cache_key, str(total))
+    return total
+
+
+def count_rows(
+    query: Query,
+    mode: CountMode = CountMode.EXACT,
+    cache_category: Optional[str] = None
+) -> Optional[int]:
+    """
+    Общее количество строк запроса в выбранном режиме
+    cache_category - категория кеша ответов, версия которой растет при записи в таблицу
+    """
+    if mode == CountMode.NONE:
+        return None
+    if mode == CountMode.ESTIMATE:
+        if cache_category:
+            return _cached_count(query, cache_category)
+        estimate = planner_estimate(query)
+        if estimate is not None:
+            return estimate
+    return query.count()
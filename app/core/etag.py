@@ -0,0 +1,56 @@
+"""
+Условные GET-запросы: ETag / If-None-Match и ответ 304 Not Modified
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from starlette import status
+
+
+def make_etag(*parts: Any) -> str:
+    """Слабый ETag из частей валидатора (версия категории, id, updated_at, ...)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def content_etag(content: Any) -> str:
+    """ETag по содержимому ответа (сериализованный JSON, модель или список моделей)"""
+    if not isinstance(content, str):
+        content = json.dumps(jsonable_encoder(content), sort_keys=True, ensure_ascii=False)
+    return make_etag(content)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (слабое сравнение, поддержка списка и *)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """Пустой ответ 304 с текущим ETag"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+
+def json_response(payload: str, etag: Optional[str], if_none_match: Optional[str]) -> Response:
+    """
+    Сериализованный JSON с ETag или 304
+    etag=None (нет общей для воркеров версии) - ETag по содержимому
+    """
+    etag = etag or content_etag(payload)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
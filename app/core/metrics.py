@@ -0,0 +1,172 @@
+"""
+Метрики Prometheus (GET /metrics)
+
+- http_request_duration_seconds — гистограмма длительности по шаблону маршрута;
+- http_requests_in_progress — запросы в обработке;
+- websocket_connections — открытые WebSocket по маршруту (глобальный чат,
+  уведомления, поддержка);
+- websocket_slow_consumers_dropped_total — клиенты, отключенные как медленные
+  (app.core.ws_outbox);
+- db_pool_* / db_connection_hold_seconds — пулы соединений (app.core.pool_metrics);
+- db_queries_per_request — число SQL-выражений на запрос (app.core.query_tracker);
+- response_cache_lookups_total — попадания и промахи кеша ответов.
+
+Несколько воркеров uvicorn: перед запуском задайте переменную окружения
+PROMETHEUS_MULTIPROC_DIR (пустой каталог, очищается при каждом деплое).
+prometheus_client пишет значения каждого процесса в mmap-файлы, а /metrics
+в любом воркере отдает сумму по всем. Без переменной метрики относятся
+к процессу, обработавшему запрос /metrics.
+"""
+import os
+import time
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.core.config import settings
+from app.core.request_context import route_label
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections",
+    "Открытые WebSocket-соединения",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+WEBSOCKET_SLOW_CONSUMERS_DROPPED = Counter(
+    "websocket_slow_consumers_dropped",
+    "WebSocket-клиенты, отключенные из-за переполнения очереди отправки",
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Соединения, выданные из пула",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Открытые соединения сверх pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула",
+    ["pool"],
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts",
+    "Таймауты ожидания соединения из пула",
+    ["pool"],
+)
+DB_CONNECTION_HOLD = Histogram(
+    "db_connection_hold_seconds",
+    "Время удержания соединения маршрутом",
+    ["pool", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Число SQL-выражений на HTTP-запрос",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups",
+    "Обращения к кешу ответов (hit_local, hit_redis, miss)",
+    ["result"],
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Текст метрик в формате Prometheus и его Content-Type"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped():
+    """Удаление live-метрик остановленного воркера (multiprocess-режим)"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Длительность и число HTTP-запросов, открытые WebSocket (чистый ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _http(self, scope, receive, send):
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+            HTTP_REQUEST_DURATION.labels(method, route_label(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+    async def _websocket(self, scope, receive, send):
+        accepted_route = None
+
+        async def send_with_accept(message):
+            nonlocal accepted_route
+            if message["type"] == "websocket.accept" and accepted_route is None:
+                accepted_route = route_label(scope)
+                WEBSOCKET_CONNECTIONS.labels(accepted_route).inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_accept)
+        finally:
+            if accepted_route is not None:
+                WEBSOCKET_CONNECTIONS.labels(accepted_route).dec()
@@ -0,0 +1,58 @@
+"""
+Keyset (курсорная) пагинация по (created_at, id)
+
+Лента сортируется по created_at DESC, id DESC. Курсор — непрозрачная строка
+с (created_at, id) последнего элемента страницы; следующая страница — это
+строки строго "старше" курсора, поэтому стоимость не зависит от глубины
+(в отличие от OFFSET, который читает и отбрасывает все предыдущие строки).
+OFFSET по-прежнему поддерживается для первой страницы и старых клиентов.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Курсор после элемента с (created_at, id)"""
+    raw = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) из курсора; ValueError для некорректного курсора"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Некорректный курсор пагинации") from exc
+
+
+def paginate_by_created(
+    query: Query,
+    model,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Query:
+    """
+    Страница по created_at DESC, id DESC
+    С курсором - keyset-условие (created_at, id) < курсор, иначе OFFSET skip
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        return query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, item_id)).limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+def next_cursor(items: List, limit: int) -> Optional[str]:
+    """Курсор следующей страницы (None, если страница неполная - дальше данных нет)"""
+    if len(items) < limit or not items:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,210 @@
+"""
+Метрики пулов соединений БД
+
+Для каждого пула (основная БД, реплики, асинхронные движки):
+- ожидание соединения при checkout (гистограмма; включает установку нового
+  соединения) и число таймаутов пула — замеряются в Instrumented*QueuePool,
+  так как у пула нет события "начало checkout";
+- занятые/свободные/overflow соединения, число checkout, новых соединений
+  и инвалидаций — из событий пула (checkout/checkin/connect/invalidate);
+- время удержания соединения по маршрутам: от checkout до checkin,
+  маршрут берется из контекста запроса (app.core.request_context).
+
+Снимок для /admin/statistics/db-pool локален для процесса (воркера);
+те же значения уходят в метрики Prometheus (app.core.metrics), которые
+агрегируются по всем воркерам.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import (
+    POOL_WAIT_BUCKETS,
+    DB_CONNECTION_HOLD,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_IN_USE,
+    DB_POOL_OVERFLOW,
+    DB_POOL_TIMEOUTS,
+)
+from app.core.request_context import current_scope, route_label
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами (как в Prometheus)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = POOL_WAIT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"count": self.count, "sum": self.total, "max": self.max, "buckets": buckets}
+
+
+class _PoolCounters:
+    def __init__(self):
+        self.in_use = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait = Histogram()
+
+
+class PoolMetrics:
+    """Сбор метрик пулов через события SQLAlchemy"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Engine] = {}
+        self._counters: Dict[str, _PoolCounters] = {}
+        # (пул, маршрут) -> [количество, сумма, максимум] времени удержания соединения
+        self._holds: Dict[Tuple[str, str], List[float]] = {}
+
+    def register(self, name: str, engine: Engine):
+        """Подписка на события пула движка (слушатели переживают engine.dispose())"""
+        self._engines[name] = engine
+        self._counters.setdefault(name, _PoolCounters())
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self._counters[name].connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info["checked_out_at"] = time.perf_counter()
+            connection_record.info["request_scope"] = current_scope.get()
+            with self._lock:
+                counters = self._counters[name]
+                counters.checkouts += 1
+                counters.in_use += 1
+            DB_POOL_IN_USE.labels(name).inc()
+            self._update_overflow(name, engine)
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            checked_out_at = connection_record.info.pop("checked_out_at", None)
+            scope = connection_record.info.pop("request_scope", None)
+            if checked_out_at is None:
+                return
+            held = time.perf_counter() - checked_out_at
+            key = (name, route_label(scope))
+            with self._lock:
+                self._counters[name].in_use -= 1
+                stats = self._holds.setdefault(key, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += held
+                stats[2] = max(stats[2], held)
+            DB_POOL_IN_USE.labels(name).dec()
+            DB_CONNECTION_HOLD.labels(*key).observe(held)
+            self._update_overflow(name, engine)
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self._counters[name].invalidations += 1
+
+    @staticmethod
+    def _update_overflow(name: str, engine: Engine):
+        pool = engine.pool
+        if hasattr(pool, "overflow"):
+            DB_POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+
+    def record_wait(self, name: Optional[str], seconds: float, timed_out: bool = False):
+        """Ожидание соединения при checkout"""
+        counters = self._counters.get(name)
+        if counters is None:
+            return
+        with self._lock:
+            counters.wait.observe(seconds)
+            if timed_out:
+                counters.timeouts += 1
+        DB_POOL_CHECKOUT_WAIT.labels(name).observe(seconds)
+        if timed_out:
+            DB_POOL_TIMEOUTS.labels(name).inc()
+
+    def snapshot(self) -> dict:
+        """Текущее состояние: пулы и удержание соединений по маршрутам"""
+        pools = {}
+        with self._lock:
+            for name, engine in self._engines.items():
+                pool, counters = engine.pool, self._counters[name]
+                pools[name] = {
+                    "pool_size": pool.size() if hasattr(pool, "size") else None,
+                    "max_overflow": getattr(pool, "_max_overflow", None),
+                    "in_use": counters.in_use,
+                    "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                    "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+                    "checkouts": counters.checkouts,
+                    "connects": counters.connects,
+                    "invalidations": counters.invalidations,
+                    "timeouts": counters.timeouts,
+                    "checkout_wait": counters.wait.as_dict(),
+                }
+            routes = [
+                {
+                    "pool": pool_name,
+                    "route": route,
+                    "count": int(count),
+                    "total_seconds": total,
+                    "max_seconds": longest,
+                }
+                for (pool_name, route), (count, total, longest) in self._holds.items()
+            ]
+        routes.sort(key=lambda item: item["total_seconds"], reverse=True)
+        return {"pools": pools, "routes": routes}
+
+    def reset(self):
+        """Сброс накопленных счетчиков (пулы остаются зарегистрированными)"""
+        with self._lock:
+            for name, counters in self._counters.items():
+                in_use = counters.in_use
+                self._counters[name] = _PoolCounters()
+                self._counters[name].in_use = in_use
+            self._holds.clear()
+
+
+# Глобальные метрики пулов
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    """Замер ожидания соединения; имя пула - pool_logging_name движка"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(getattr(self, "logging_name", None), time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(getattr(self, "logging_name", None), time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool с замером ожидания соединения"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool с замером ожидания соединения"""
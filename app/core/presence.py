@@ -0,0 +1,188 @@
+"""
+Присутствие пользователей (онлайн) в глобальном чате
+
+Пользователь онлайн, пока у него открыто хотя бы одно соединение (вкладка,
+устройство) в любом воркере. Подключения и отключения только отмечают
+изменение; число онлайн пересчитывается и рассылается не чаще раза в
+PRESENCE_BROADCAST_INTERVAL_MS и только если оно изменилось - волна
+переподключений после деплоя дает одну рассылку за интервал, а не по одной
+на каждое подключение.
+
+Общий список онлайн между воркерами (если задан REDIS_URL): каждый воркер
+хранит своих пользователей в отдельном множестве Redis с TTL
+(PRESENCE_TTL_SECONDS) и регистрирует себя в sorted set воркеров с временем
+последнего обновления. Число онлайн - размер объединения множеств живых
+воркеров; данные упавшего воркера перестают учитываться по TTL.
+Без Redis число онлайн относится к процессу.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CountHandler = Callable[[int], Awaitable[None]]
+
+
+class Presence:
+    """Онлайн-пользователи с отложенной (debounced) рассылкой числа онлайн"""
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        interval_ms: int = 1000,
+        ttl_seconds: int = 30,
+        prefix: str = "pocho:presence",
+    ):
+        self.interval = interval_ms / 1000
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        # user_id -> число соединений пользователя в этом процессе
+        self._local: Dict[int, int] = {}
+        self._handlers: List[CountHandler] = []
+        self._dirty = False
+        self._shared_count: Optional[int] = None
+        self._last_broadcast: Optional[int] = None
+        self._last_heartbeat = 0.0
+        self._redis_url = redis_url
+        self._redis = None
+        self._task: Optional[asyncio.Task] = None
+        self._worker_id = uuid.uuid4().hex[:8]
+
+    def on_change(self, handler: CountHandler):
+        """Обработчик нового числа онлайн (рассылка в сокеты процесса)"""
+        self._handlers.append(handler)
+
+    def add(self, user_id: int) -> bool:
+        """Новое соединение пользователя; True - первое в этом процессе"""
+        self._local[user_id] = self._local.get(user_id, 0) + 1
+        self._dirty = True
+        return self._local[user_id] == 1
+
+    def remove(self, user_id: int) -> bool:
+        """Закрытие соединения пользователя; True - было последним в этом процессе"""
+        count = self._local.get(user_id, 0)
+        if count <= 1:
+            if self._local.pop(user_id, None) is None:
+                return False
+            self._dirty = True
+            return True
+        self._local[user_id] = count - 1
+        return False
+
+    def is_online(self, user_id: int) -> bool:
+        """Есть ли у пользователя соединения в этом процессе"""
+        return user_id in self._local
+
+    @property
+    def online_count(self) -> int:
+        """Число онлайн: общее по воркерам (последнее вычисленное) или по процессу"""
+        if self._shared_count is not None:
+            return self._shared_count
+        return len(self._local)
+
+    # ---- Redis ----
+
+    def _redis_client(self):
+        """Асинхронный клиент Redis (создается лениво; None, если Redis не настроен)"""
+        if not self._redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                logger.warning("REDIS_URL задан, но пакет redis не установлен; онлайн считается по процессу")
+                self._redis_url = ""
+                return None
+            self._redis = redis_asyncio.Redis.from_url(self._redis_url, socket_timeout=0.5)
+        return self._redis
+
+    def _worker_key(self, worker_id: str) -> str:
+        return f"{self.prefix}:worker:{worker_id}"
+
+    async def _sync_shared(self, client) -> int:
+        """Публикация своих пользователей и подсчет объединения живых воркеров"""
+        now = time.time()
+        workers_key = f"{self.prefix}:workers"
+        if self._dirty or now - self._last_heartbeat >= self.ttl_seconds / 3:
+            key = self._worker_key(self._worker_id)
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(key)
+            if self._local:
+                pipe.sadd(key, *self._local)
+                pipe.expire(key, self.ttl_seconds)
+            pipe.zadd(workers_key, {self._worker_id: now})
+            await pipe.execute()
+            self._dirty = False
+            self._last_heartbeat = now
+
+        await client.zremrangebyscore(workers_key, 0, now - self.ttl_seconds)
+        workers = await client.zrange(workers_key, 0, -1)
+        keys = [self._worker_key(w.decode() if isinstance(w, bytes) else w) for w in workers]
+        if not keys:
+            return 0
+        return len(await client.sunion(keys))
+
+    # ---- Рассылка ----
+
+    async def flush(self):
+        """Пересчет числа онлайн и рассылка, если оно изменилось"""
+        client = self._redis_client()
+        if client is not None:
+            try:
+                self._shared_count = await self._sync_shared(client)
+            except Exception as exc:
+                logger.warning(f"Presence: Redis недоступен ({exc}); онлайн считается по процессу")
+                self._shared_count = None
+        else:
+            if not self._dirty and self._last_broadcast is not None:
+                return
+            self._dirty = False
+
+        count = self.online_count
+        if count == self._last_broadcast:
+            return
+        self._last_broadcast = count
+        for handler in self._handlers:
+            try:
+                await handler(count)
+            except Exception as exc:
+                logger.exception(f"Presence: ошибка рассылки числа онлайн: {exc}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        client = self._redis_client()
+        if client is not None:
+            try:
+                await client.delete(self._worker_key(self._worker_id))
+                await client.zrem(f"{self.prefix}:workers", self._worker_id)
+                await client.aclose()
+            except Exception:
+                pass
+            self._redis = None
+
+
+# Онлайн в глобальном чате
+chat_presence = Presence(
+    redis_url=settings.REDIS_URL,
+    interval_ms=settings.PRESENCE_BROADCAST_INTERVAL_MS,
+    ttl_seconds=settings.PRESENCE_TTL_SECONDS,
+)
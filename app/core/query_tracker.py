@@ -0,0 +1,154 @@
+"""
+Учет запросов к БД в рамках HTTP-запроса
+
+События before/after_cursor_execute всех движков (основная БД, реплики,
+асинхронные) пишут длительность каждого SQL-выражения в статистику текущего
+запроса (contextvar, который ставит QueryTrackerMiddleware). По завершении
+запроса:
+- если запросов больше SLOW_REQUEST_QUERY_COUNT или время в БД больше
+  SLOW_REQUEST_DB_MS — в лог пишется JSON-строка с маршрутом, числом
+  запросов, временем в БД и самыми медленными выражениями;
+- с SERVER_TIMING_ENABLED ответ получает заголовок
+  Server-Timing: db;dur=<мс>;desc="<N> queries" (виден в DevTools браузера).
+
+Отдельное выражение дольше SLOW_QUERY_MS логируется сразу, в том числе вне
+HTTP-запросов. Параметры запросов в лог не попадают.
+"""
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import DB_QUERIES_PER_REQUEST
+from app.core.request_context import route_label
+
+logger = logging.getLogger(__name__)
+
+# Длина SQL в логе
+_STATEMENT_LOG_LENGTH = 300
+
+
+class QueryStats:
+    """Статистика запросов к БД одного HTTP-запроса"""
+
+    def __init__(self, keep_slowest: int = 3):
+        self.count = 0
+        self.total = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if self.keep_slowest <= 0:
+                return
+            if len(self.slowest) < self.keep_slowest or seconds > self.slowest[-1][0]:
+                self.slowest.append((seconds, statement))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[self.keep_slowest:]
+
+    @property
+    def total_ms(self) -> float:
+        return self.total * 1000
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _short(statement: str) -> str:
+    return " ".join(statement.split())[:_STATEMENT_LOG_LENGTH]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if settings.SLOW_QUERY_MS and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "route": route_label(),
+            "duration_ms": round(seconds * 1000, 2),
+            "statement": _short(statement),
+        }, ensure_ascii=False))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Ошибочное выражение не доходит до after_cursor_execute - убираем его отметку
+    connection = context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
+
+
+def server_timing(stats: QueryStats) -> str:
+    """Значение заголовка Server-Timing"""
+    return f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'
+
+
+def log_if_over_budget(scope: dict, stats: QueryStats, duration: float):
+    """JSON-строка в лог, если запрос превысил бюджет по числу запросов или времени в БД"""
+    over_count = settings.SLOW_REQUEST_QUERY_COUNT and stats.count > settings.SLOW_REQUEST_QUERY_COUNT
+    over_time = settings.SLOW_REQUEST_DB_MS and stats.total_ms > settings.SLOW_REQUEST_DB_MS
+    if not (over_count or over_time):
+        return
+    logger.warning(json.dumps({
+        "event": "db_budget_exceeded",
+        "method": scope.get("method"),
+        "route": route_label(scope),
+        "path": scope.get("path"),
+        "queries": stats.count,
+        "db_ms": round(stats.total_ms, 2),
+        "request_ms": round(duration * 1000, 2),
+        "slowest": [
+            {"duration_ms": round(seconds * 1000, 2), "statement": _short(statement)}
+            for seconds, statement in stats.slowest
+        ],
+    }, ensure_ascii=False))
+
+
+class QueryTrackerMiddleware:
+    """Статистика запросов к БД на время HTTP-запроса (чистый ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_TRACKING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(keep_slowest=settings.QUERY_TRACKER_TOP_STATEMENTS)
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            DB_QUERIES_PER_REQUEST.labels(route_label(scope)).observe(stats.count)
+            log_if_over_budget(scope, stats, time.perf_counter() - started)
@@ -0,0 +1,224 @@
+"""
+Маршрутизация чтения на реплики БД (DATABASE_REPLICA_URLS)
+
+Эндпоинты каталога только для чтения (ближайшие места, маршрут, кластеры,
+отзывы, регионы, реклама) берут сессию из get_read_db. Такая сессия
+(RoutingSession) выбирает реплику round-robin один раз на запрос, поэтому
+все чтения запроса видят один и тот же снимок. Запись (flush) и все
+последующие запросы сессии идут в основную БД.
+
+Ответы, которые кешируются или получают ETag под версией категории
+(response_cache), строятся из основной БД: bump версии происходит сразу после
+записи, и ответ отстающей реплики закрепился бы под новой версией до
+следующей записи. Поэтому основная нагрузка чтения каталога (списки,
+карточки, меню) остается на основной БД и кеше ответов, а не на репликах.
+
+- Отказ реплики: ошибка соединения помечает реплику недоступной на
+  REPLICA_RETRY_SECONDS, запросы идут на остальные реплики или в основную БД.
+  Упавшее на реплике чтение один раз повторяется в основной БД.
+- Read-your-writes: после успешного изменяющего запроса (POST/PUT/PATCH/DELETE)
+  токен пользователя на REPLICA_STICKY_SECONDS закрепляется за основной БД,
+  чтобы пользователь сразу видел свою запись несмотря на отставание реплик.
+  С REDIS_URL отметка общая для всех воркеров.
+"""
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "read_your_writes"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReplicaSet:
+    """Реплики для чтения: round-robin с пропуском недоступных"""
+
+    def __init__(self, engines: List[Engine], retry_seconds: int = 30):
+        self.engines = list(engines)
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+        self._down_until: Dict[Engine, float] = {}
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def choose(self) -> Optional[Engine]:
+        """Следующая доступная реплика (None - все недоступны, читать из основной БД)"""
+        now = time.monotonic()
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self._down_until.get(engine, 0) <= now:
+                return engine
+        return None
+
+    def is_down(self, engine: Engine) -> bool:
+        return self._down_until.get(engine, 0) > time.monotonic()
+
+    def mark_down(self, engine: Engine):
+        """Исключение реплики из ротации на retry_seconds"""
+        self._down_until[engine] = time.monotonic() + self.retry_seconds
+        logger.warning(f"Реплика {engine.url.render_as_string()} недоступна, чтение идет в основную БД")
+
+    def _on_error(self, context):
+        # Ошибка установки соединения (connection is None) или разрыв соединения
+        if context.connection is None or context.is_disconnect:
+            self.mark_down(context.engine)
+
+
+class RoutingSession(Session):
+    """Сессия, которая читает из реплики, а пишет (и читает после записи) в основную БД"""
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self.replicas is None or self._flushing or self.info.get("primary"):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        replica = self.info.get("replica")
+        if replica is None:
+            replica = self.replicas.choose()
+            if replica is None:
+                self.info["primary"] = True
+                return super().get_bind(mapper, clause=clause, **kwargs)
+            self.info["replica"] = replica
+        return replica
+
+    def execute(self, *args, **kwargs):
+        return self._retry_on_primary(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._retry_on_primary(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._retry_on_primary(super().scalars, *args, **kwargs)
+
+    def _retry_on_primary(self, method, *args, **kwargs):
+        """Чтение, упавшее из-за отказа реплики, повторяется в основной БД"""
+        try:
+            return method(*args, **kwargs)
+        except DBAPIError:
+            replica = self.info.get("replica")
+            if replica is None or self.info.get("primary") or not self.replicas.is_down(replica):
+                raise
+            self.rollback()
+            self.info["primary"] = True
+            return method(*args, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary(session, flush_context):
+    """После записи сессия читает только из основной БД"""
+    session.info["primary"] = True
+
+
+def bearer_token(request: Request) -> Optional[str]:
+    """Токен из заголовка Authorization (без проверки подписи)"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+class WriteTracker:
+    """Отметки "пользователь недавно писал" для read-your-writes (in-memory или Redis)"""
+
+    def __init__(self, sticky_seconds: int = 5, redis_url: str = ""):
+        self.sticky_seconds = sticky_seconds
+        self._marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._redis_url = redis_url
+        self._redis = None
+
+    def _redis_client(self):
+        """Клиент Redis (создается лениво; None, если Redis не настроен)"""
+        if not self._redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning("REDIS_URL задан, но пакет redis не установлен; отметки записи локальны для процесса")
+                self._redis_url = ""
+                return None
+            self._redis = redis.Redis.from_url(self._redis_url, socket_timeout=0.5)
+        return self._redis
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha1(token.encode("utf-8")).hexdigest()
+
+    def mark(self, token: str):
+        """Запись пользователя с этим токеном: ближайшие чтения - из основной БД"""
+        if self.sticky_seconds <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            now = time.monotonic()
+            self._marks[key] = now + self.sticky_seconds
+            if len(self._marks) > 10000:
+                self._marks = {k: until for k, until in self._marks.items() if until > now}
+        client = self._redis_client()
+        if client is not None:
+            try:
+                client.set(f"{_KEY_PREFIX}:{key}", 1, ex=self.sticky_seconds)
+            except Exception as exc:
+                logger.warning(f"Read-your-writes: Redis недоступен ({exc})")
+
+    def is_recent(self, token: str) -> bool:
+        """Была ли запись с этим токеном за последние sticky_seconds"""
+        key = self._key(token)
+        if self._marks.get(key, 0) > time.monotonic():
+            return True
+        client = self._redis_client()
+        if client is None:
+            return False
+        try:
+            return bool(client.exists(f"{_KEY_PREFIX}:{key}"))
+        except Exception as exc:
+            logger.warning(f"Read-your-writes: Redis недоступен ({exc})")
+            # Без Redis не знаем о записях в других воркерах - безопаснее основная БД
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._marks.clear()
+
+
+# Глобальные отметки записей
+write_tracker = WriteTracker(
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    redis_url=settings.REDIS_URL,
+)
+
+
+def should_read_primary(request: Request) -> bool:
+    """Чтение из основной БД: пользователь недавно что-то изменил"""
+    token = bearer_token(request)
+    return token is not None and write_tracker.is_recent(token)
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Отметка успешных изменяющих запросов для read-your-writes"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in _SAFE_METHODS and response.status_code < 400:
+            token = bearer_token(request)
+            if token:
+                write_tracker.mark(token)
+        return response
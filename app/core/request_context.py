@@ -0,0 +1,46 @@
+"""
+Контекст текущего запроса для метрик БД
+
+RequestContextMiddleware (чистый ASGI, ответ не буферизуется) кладет scope
+запроса в contextvar. Контекст наследуется потоками threadpool (синхронные
+зависимости) и run_sync асинхронной сессии, поэтому события пула и курсора
+знают, какому маршруту принадлежит соединение. Шаблон маршрута
+(/api/v1/gas-stations/{station_id}) появляется в scope["route"] после
+маршрутизации — к моменту первого запроса в БД он уже известен.
+"""
+from contextvars import ContextVar
+from typing import Optional
+
+# Вне запроса (фоновые задачи, прогрев индексов) - None
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+NO_REQUEST = "-"
+UNMATCHED = "unmatched"
+
+
+def route_label(scope: Optional[dict] = None) -> str:
+    """Шаблон маршрута запроса (ограниченное число значений для метрик)"""
+    if scope is None:
+        scope = current_scope.get()
+    if scope is None:
+        return NO_REQUEST
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or UNMATCHED
+
+
+class RequestContextMiddleware:
+    """Установка current_scope на время обработки HTTP- и WebSocket-запросов"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
@@ -0,0 +1,248 @@
+"""
+Версионный кеш ответов публичных списков мест
+
+Ключ ответа: категория (например, "gas_stations"), текущая версия категории
+и нормализованные параметры фильтра. Любая запись в категорию увеличивает
+версию (bump), поэтому старые ответы просто перестают находиться и
+вытесняются по LRU/TTL.
+
+Уровни:
+- in-process LRU (всегда);
+- Redis (если задан REDIS_URL): общий для всех воркеров кеш ответов и
+  счетчики версий. Без Redis версии локальны для процесса, и устаревание
+  ответов в других воркерах ограничено RESPONSE_CACHE_TTL_SECONDS.
+
+ETag списка строится из ключа ответа (etag), только если версии в нем общие
+для всех воркеров (счетчики Redis): тогда 304 отдается без чтения кеша и БД.
+Локальная версия в ETag не попадает - у каждого воркера она своя, и клиент
+почти не получал бы 304; в этом случае ETag строится по содержимому ответа.
+
+Клиент Redis синхронный: async-обработчики используют *_async-методы,
+которые выполняют обращение к Redis в пуле потоков. После ошибки Redis
+уровень пропускается на RESPONSE_CACHE_REDIS_RETRY_SECONDS, чтобы недоступный
+Redis не добавлял таймаут к каждому запросу.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.etag import make_etag
+from app.core.metrics import RESPONSE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "response_cache"
+
+
+class ResponseCache:
+    """Двухуровневый (LRU + Redis) кеш сериализованных JSON-ответов"""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: int = 60,
+        redis_url: str = "",
+        redis_retry_seconds: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._redis_url = redis_url
+        self._redis = None
+        self.redis_retry_seconds = redis_retry_seconds
+        # До этого момента (monotonic) Redis считается недоступным
+        self._redis_retry_at = 0.0
+        # Локальные версии разных процессов не должны совпадать
+        self._process_id = uuid.uuid4().hex[:8]
+        self.hits = 0
+        self.misses = 0
+
+    def _redis_client(self):
+        """Клиент Redis (создается лениво; None, если Redis не настроен)"""
+        if not self._redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning("REDIS_URL задан, но пакет redis не установлен; используется только in-memory кеш")
+                self._redis_url = ""
+                return None
+            self._redis = redis.Redis.from_url(self._redis_url, socket_timeout=0.5)
+        return self._redis
+
+    def _redis_available(self) -> bool:
+        return bool(self._redis_url) and time.monotonic() >= self._redis_retry_at
+
+    def _redis_call(self, method: str, *args) -> Any:
+        """Вызов Redis; при ошибке уровень Redis пропускается, запрос не падает"""
+        if not self._redis_available():
+            return None
+        client = self._redis_client()
+        if client is None:
+            return None
+        try:
+            return getattr(client, method)(*args)
+        except Exception as exc:
+            self._redis_retry_at = time.monotonic() + self.redis_retry_seconds
+            logger.warning(f"Response cache: Redis недоступен ({exc}); повтор через {self.redis_retry_seconds} с")
+            return None
+
+    async def _redis_call_async(self, method: str, *args) -> Any:
+        """_redis_call из event loop: сетевой вызов - в пуле потоков"""
+        if not self._redis_available():
+            return None
+        return await run_in_threadpool(self._redis_call, method, *args)
+
+    def version(self, category: str) -> str:
+        """
+        Текущая версия категории: "r<N>" - счетчик Redis, общий для воркеров
+        (INCRBY 0 создает счетчик, если в категорию еще не писали);
+        без Redis - локальная версия "<id процесса>.<N>"
+        """
+        return self._version_value(category, self._redis_call("incrby", f"{_KEY_PREFIX}:version:{category}", 0))
+
+    async def version_async(self, category: str) -> str:
+        """version для async-обработчиков"""
+        return self._version_value(
+            category, await self._redis_call_async("incrby", f"{_KEY_PREFIX}:version:{category}", 0)
+        )
+
+    def _version_value(self, category: str, redis_value: Any) -> str:
+        if redis_value is not None:
+            return f"r{int(redis_value)}"
+        return f"{self._process_id}.{self._versions.get(category, 0)}"
+
+    @staticmethod
+    def is_shared_version(version: str) -> bool:
+        """Версия одинакова во всех воркерах (счетчик Redis)"""
+        return version.startswith("r")
+
+    def etag(self, key: str, versions: Iterable[str] = ()) -> Optional[str]:
+        """
+        ETag ответа по ключу (и версиям других категорий, от которых он зависит)
+        None - версии локальны для процесса, ETag нужно строить по содержимому
+        """
+        version = key.split(":")[2]
+        if not all(self.is_shared_version(v) for v in (version, *versions)):
+            return None
+        return make_etag(key)
+
+    def bump(self, category: str):
+        """Увеличение версии категории (после любой записи, влияющей на списки)"""
+        with self._lock:
+            self._versions[category] = self._versions.get(category, 0) + 1
+        self._redis_call("incr", f"{_KEY_PREFIX}:version:{category}")
+
+    def key(self, category: str, params: Dict[str, Any]) -> str:
+        """
+        Ключ ответа для текущей версии категории
+        Ключ нужно получить до чтения из БД: запись, случившаяся во время
+        построения ответа, увеличит версию, и ответ не будет переиспользован
+        """
+        return self._make_key(category, self.version(category), params)
+
+    async def key_async(self, category: str, params: Dict[str, Any]) -> str:
+        """key для async-обработчиков"""
+        return self._make_key(category, await self.version_async(category), params)
+
+    def _make_key(self, category: str, version: str, params: Dict[str, Any]) -> str:
+        normalized = json.dumps(
+            {name: value for name, value in params.items() if value is not None},
+            sort_keys=True,
+            default=str,
+            ensure_ascii=False,
+        )
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"{_KEY_PREFIX}:{category}:{version}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Сериализованный ответ или None"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        payload = self._get_local(key)
+        if payload is not None:
+            return payload
+        return self._from_redis(key, self._redis_call("get", key))
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get для async-обработчиков"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        payload = self._get_local(key)
+        if payload is not None:
+            return payload
+        return self._from_redis(key, await self._redis_call_async("get", key))
+
+    def _get_local(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    RESPONSE_CACHE_LOOKUPS.labels("hit_local").inc()
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def _from_redis(self, key: str, value: Any) -> Optional[str]:
+        if value is not None:
+            payload = value.decode("utf-8") if isinstance(value, bytes) else value
+            self._store_local(key, payload)
+            self.hits += 1
+            RESPONSE_CACHE_LOOKUPS.labels("hit_redis").inc()
+            return payload
+
+        self.misses += 1
+        RESPONSE_CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    def set(self, key: str, payload: str):
+        """Сохранение сериализованного ответа на обоих уровнях"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        self._store_local(key, payload)
+        self._redis_call("setex", key, self.ttl_seconds, payload)
+
+    async def set_async(self, key: str, payload: str):
+        """set для async-обработчиков"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        self._store_local(key, payload)
+        await self._redis_call_async("setex", key, self.ttl_seconds, payload)
+
+    def _store_local(self, key: str, payload: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Очистка локального уровня и версий (например, после пересоздания таблиц)"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Глобальный кеш ответов
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL,
+    redis_retry_seconds=settings.RESPONSE_CACHE_REDIS_RETRY_SECONDS,
+)
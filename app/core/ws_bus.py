@@ -0,0 +1,173 @@
+"""
+Шина рассылки событий WebSocket между воркерами
+
+Менеджеры соединений (глобальный чат, уведомления, поддержка) хранят сокеты
+в памяти процесса. Чтобы событие, созданное в одном воркере, дошло до
+сокетов во всех воркерах, менеджер публикует его в шину, а доставку в свои
+сокеты выполняет обработчик подписки - в каждом процессе.
+
+Бэкенды (WS_BUS_BACKEND):
+- "memory" - доставка внутри процесса (один воркер, тесты);
+- "redis" - Redis pub/sub (REDIS_URL): каждый воркер подписан на все каналы
+  с префиксом WS_BUS_CHANNEL_PREFIX и получает в том числе свои события;
+- "auto" - Redis, если задан REDIS_URL, иначе in-memory.
+
+Доставка "не более одного раза": пока воркер переподключается к Redis,
+события других воркеров до него не доходят. Если Redis недоступен при
+публикации, событие доставляется только локальным сокетам. В обоих случаях
+шина вызывает обработчики on_gap - подписчики, которые хранят историю
+событий (буфер догрузки чата), сбрасывают ее полноту.
+"""
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+GapHandler = Callable[[], None]
+
+
+class LocalBus:
+    """Шина внутри процесса"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._gap_handlers: List[GapHandler] = []
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Обработчик событий канала (вызывается в каждом воркере)"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_gap(self, handler: GapHandler):
+        """Обработчик возможной потери событий (переподключение, локальная публикация)"""
+        self._gap_handlers.append(handler)
+
+    def _notify_gap(self):
+        for handler in self._gap_handlers:
+            try:
+                handler()
+            except Exception as exc:
+                logger.exception(f"WS bus: ошибка обработчика потери событий: {exc}")
+
+    async def publish(self, channel: str, message: dict):
+        """Публикация события; сообщение приводится к JSON-совместимому виду"""
+        await self._dispatch(channel, jsonable_encoder(message))
+
+    async def _dispatch(self, channel: str, message: dict):
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(message)
+            except Exception as exc:
+                logger.exception(f"WS bus: ошибка обработчика канала {channel}: {exc}")
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class RedisBus(LocalBus):
+    """Шина через Redis pub/sub"""
+
+    def __init__(self, redis_url: str, prefix: str = "ws", retry_seconds: float = 1.0):
+        super().__init__()
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        self._client = None
+        self._listener = None
+
+    def _channel(self, channel: str) -> str:
+        return f"{self.prefix}:{channel}"
+
+    async def publish(self, channel: str, message: dict):
+        message = jsonable_encoder(message)
+        if self._client is not None:
+            try:
+                await self._client.publish(self._channel(channel), json.dumps(message, ensure_ascii=False))
+                return
+            except Exception as exc:
+                logger.warning(f"WS bus: Redis недоступен ({exc}); событие доставлено только в этом воркере")
+        await self._dispatch(channel, message)
+        # Другие воркеры событие не получат, а этот мог пропустить их события
+        self._notify_gap()
+
+    async def start(self):
+        import redis.asyncio as redis_asyncio
+
+        self._client = redis_asyncio.Redis.from_url(self.redis_url)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _listen(self):
+        """Чтение событий всех каналов; при обрыве - переподключение"""
+        pattern = self._channel("*")
+        offset = len(self.prefix) + 1
+        reconnecting = False
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.psubscribe(pattern)
+                if reconnecting:
+                    # События за время переподключения потеряны
+                    self._notify_gap()
+                    reconnecting = False
+                async for item in pubsub.listen():
+                    if item["type"] != "pmessage":
+                        continue
+                    channel = item["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode("utf-8")
+                    await self._dispatch(channel[offset:], json.loads(item["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"WS bus: подписка Redis прервана ({exc}); повтор через {self.retry_seconds} с")
+                self._notify_gap()
+                reconnecting = True
+                await asyncio.sleep(self.retry_seconds)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def create_bus() -> LocalBus:
+    """Шина по настройкам WS_BUS_BACKEND / REDIS_URL"""
+    backend = settings.WS_BUS_BACKEND
+    if backend == "auto":
+        backend = "redis" if settings.REDIS_URL else "memory"
+    if backend == "redis":
+        try:
+            import redis.asyncio  # noqa: F401
+        except ImportError:
+            logger.warning("WS_BUS_BACKEND=redis, но пакет redis не установлен; события локальны для процесса")
+            return LocalBus()
+        if not settings.REDIS_URL:
+            logger.warning("WS_BUS_BACKEND=redis, но REDIS_URL не задан; события локальны для процесса")
+            return LocalBus()
+        return RedisBus(settings.REDIS_URL, prefix=settings.WS_BUS_CHANNEL_PREFIX)
+    return LocalBus()
+
+
+# Глобальная шина событий WebSocket
+ws_bus = create_bus()
@@ -0,0 +1,98 @@
+"""
+Исходящие очереди WebSocket-соединений
+
+Рассылка не ждет каждого клиента по очереди: сообщение кодируется в JSON
+один раз, и одна и та же строка кладется в ограниченную очередь каждого
+соединения. Отдельная задача-писатель соединения отправляет очередь в сокет.
+
+Медленный клиент (очередь переполнена или отправка дольше
+WS_SEND_TIMEOUT_SECONDS) отключается с кодом 1013 "Try Again Later" -
+клиент переподключается и догружает пропущенное через REST.
+"""
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+from fastapi import WebSocket
+
+from app.core.metrics import WEBSOCKET_SLOW_CONSUMERS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+# Код закрытия для медленных клиентов (RFC 6455: Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Ссылки на задачи закрытия сокетов: цикл событий хранит задачи только по
+# слабым ссылкам, незавершенную задачу без ссылки может собрать GC
+_close_tasks: Set[asyncio.Task] = set()
+
+
+def encode_message(data: dict) -> str:
+    """JSON как в WebSocket.send_json (одна строка на всех получателей)"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class ClientConnection:
+    """WebSocket с ограниченной очередью исходящих сообщений и задачей-писателем"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int = 100, send_timeout: float = 10.0):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Запуск задачи-писателя (после websocket.accept())"""
+        self._writer = asyncio.create_task(self._write())
+
+    def send_text(self, text: str) -> bool:
+        """Постановка в очередь без ожидания; False - соединение закрыто или отключено как медленное"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.drop("очередь переполнена")
+            return False
+        return True
+
+    def send_json(self, data: dict) -> bool:
+        return self.send_text(encode_message(data))
+
+    async def _write(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), self.send_timeout)
+            except asyncio.TimeoutError:
+                self.drop("таймаут отправки")
+                return
+            except Exception:
+                # Сокет закрыт клиентом - отключение обработает эндпоинт
+                self.closed = True
+                return
+
+    def drop(self, reason: str):
+        """Отключение медленного клиента"""
+        if self.closed:
+            return
+        logger.warning(f"WebSocket: медленный клиент отключен ({reason})")
+        WEBSOCKET_SLOW_CONSUMERS_DROPPED.inc()
+        self.stop()
+        task = asyncio.get_running_loop().create_task(self._close_socket())
+        _close_tasks.add(task)
+        task.add_done_callback(_close_tasks.discard)
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer")
+        except Exception:
+            pass
+
+    def stop(self):
+        """Остановка писателя; неотправленные сообщения отбрасываются"""
+        self.closed = True
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
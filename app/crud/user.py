@@ -12,6 +12,8 @@ from app.services.notifications_service.crud import create_notifications
 from app.services.statistics_service.crud import create_statistics
 from app.schemas.user_extended import UserExtendedCreate
 from app.core.utils import get_code_expiration_time, is_code_expired
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
 
 
 def get_user_by_phone_number(db: Session, phone_number: str) -> Optional[User]:
@@ -525,8 +527,10 @@ def get_all_users(
     limit: int = 100,
     is_admin: Optional[bool] = None,
     is_blocked: Optional[bool] = None,
-    is_active: Optional[bool] = None
-) -> Tuple[List[User], int]:
+    is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[User], Optional[int]]:
     """
     Получение списка всех пользователей с фильтрацией и пагинацией
     
@@ -537,9 +541,11 @@ def get_all_users(
         is_admin: Фильтр по статусу администратора (None - все)
         is_blocked: Фильтр по статусу блокировки (None - все)
         is_active: Фильтр по статусу активности (None - все)
+        cursor: Курсор keyset-пагинации (вместо skip)
+        count: Режим подсчета total: exact, estimate или none (без COUNT)
     
     Returns:
-        Кортеж (список пользователей, общее количество)
+        Кортеж (список пользователей, общее количество или None)
     """
     query = db.query(User)
     
@@ -552,9 +558,9 @@ def get_all_users(
         query = query.filter(User.is_active == is_active)
     
     # Получаем общее количество (до пагинации)
-    total = query.count()
+    total = count_rows(query, count)
     
     # Применяем пагинацию и сортировку
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    users = paginate_by_created(query, User, skip=skip, limit=limit, cursor=cursor).all()
     
     return users, total
@@ -1,24 +1,115 @@
-from sqlalchemy import create_engine
+import math
+import sqlite3
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, pool_metrics
+from app.core.read_routing import ReplicaSet, RoutingSession, should_read_primary
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Проверка соединения перед использованием
-    pool_size=20,  # Размер пула соединений (увеличено для высокой нагрузки)
-    max_overflow=50,  # Максимальное количество дополнительных соединений (увеличено для 20000 пользователей)
-    pool_recycle=3600,  # Переиспользование соединений через час
-    pool_timeout=30,  # Таймаут ожидания соединения из пула
+# Параметры пула - общие для основной БД и реплик (синхронных и асинхронных движков),
+# настраиваются для каждого развертывания через Settings (DB_POOL_*)
+POOL_OPTIONS = dict(
+    pool_pre_ping=settings.DB_POOL_PRE_PING,  # Проверка соединения перед использованием
+    pool_size=settings.DB_POOL_SIZE,  # Размер пула соединений
+    max_overflow=settings.DB_MAX_OVERFLOW,  # Максимальное количество дополнительных соединений
+    pool_recycle=settings.DB_POOL_RECYCLE,  # Переиспользование соединений (секунды)
+    pool_timeout=settings.DB_POOL_TIMEOUT,  # Таймаут ожидания соединения из пула
     echo=False  # Отключить SQL логирование в продакшене
 )
 
+
+def _create_engine(url: str, name: str) -> Engine:
+    """Синхронный движок с метриками пула под именем name"""
+    created = create_engine(url, poolclass=InstrumentedQueuePool, pool_logging_name=name, **POOL_OPTIONS)
+    pool_metrics.register(name, created)
+    return created
+
+
+def _create_async_engine(url: str, name: str) -> AsyncEngine:
+    """Асинхронный движок с метриками пула под именем name"""
+    created = create_async_engine(
+        url, poolclass=InstrumentedAsyncAdaptedQueuePool, pool_logging_name=name, **POOL_OPTIONS
+    )
+    pool_metrics.register(name, created.sync_engine)
+    return created
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Реплики для чтения (пусто - все запросы идут в основную БД)
+replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+replicas = ReplicaSet(
+    [_create_engine(url, f"replica_{index}") for index, url in enumerate(replica_urls)],
+    retry_seconds=settings.REPLICA_RETRY_SECONDS,
+) if replica_urls else None
+
+# Сессии эндпоинтов только для чтения: реплика round-robin, запись - в основную БД
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, replicas=replicas
+)
+
+# Асинхронные драйверы для синхронных URL из DATABASE_URL
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """URL синхронного движка с асинхронным драйвером"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Нет асинхронного драйвера для {parsed.drivername}; задайте ASYNC_DATABASE_URL")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Асинхронный движок (asyncpg) для эндпоинтов, переведенных на get_async_db:
+# ожидание PostgreSQL не блокирует event loop. Параметры пула - как у синхронного
+async_engine = _create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL), "async_primary"
+)
+
+# expire_on_commit=False: объекты читаются после commit без повторного (блокирующего) запроса
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+@event.listens_for(Engine, "connect")
+def _register_sqlite_math_functions(dbapi_connection, connection_record):
+    """
+    Геопоиск в SQL использует sin/cos/asin/sqrt/power/radians и least.
+    PostgreSQL поддерживает их нативно, SQLite (тесты) — не всегда.
+    Слушатель срабатывает и для sqlite3, и для адаптера aiosqlite
+    асинхронного движка: оба умеют create_function.
+    """
+    if not hasattr(dbapi_connection, "create_function"):
+        return
+    # В SQLite нет LEAST (многоаргументный min() не переносим на PostgreSQL)
+    dbapi_connection.create_function("least", -1, min, deterministic=True)
+    try:
+        dbapi_connection.cursor().execute("SELECT sin(0), radians(0)")
+    except sqlite3.OperationalError:
+        for name, func in (
+            ("sin", math.sin),
+            ("cos", math.cos),
+            ("asin", math.asin),
+            ("sqrt", math.sqrt),
+            ("power", math.pow),
+            ("radians", math.radians),
+        ):
+            dbapi_connection.create_function(name, 2 if name == "power" else 1, func, deterministic=True)
+
+
 def get_db():
     """Dependency для получения сессии базы данных"""
     db = SessionLocal()
@@ -28,5 +119,25 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency для получения асинхронной сессии базы данных
+    Синхронные CRUD-функции вызываются через await db.run_sync(func, ...)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
+def get_read_db(request: Request):
+    """
+    Dependency сессии для эндпоинтов только для чтения (каталог)
+    Читает из реплики, если они настроены и пользователь не писал только что
+    """
+    if replicas is None or should_read_primary(request):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,14 +1,16 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from fastapi import status
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
 from app.core.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 from app.api.v1 import api_router
 from app.models import (
     User, VerificationCode, BlacklistedToken,
@@ -28,6 +30,14 @@ from app.models import (
     DeliveryOrderStatusHistory, UserBalanceLog,
 )
 from app.core.rate_limit import RateLimitMiddleware
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.request_context import RequestContextMiddleware
+from app.core.query_tracker import QueryTrackerMiddleware
+from app.core.metrics import MetricsMiddleware, render_metrics, mark_worker_stopped
+from app.core.ws_bus import ws_bus
+from app.core.presence import chat_presence
+from app.api.v1.global_chat import global_chat_manager
+from app.services.search_service import suggest_index
 from app.core.security_middleware import (
     SecurityHeadersMiddleware,
     RequestSizeMiddleware,
@@ -42,12 +52,27 @@ logging.basicConfig(
 
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Прогрев in-memory индексов и буфера чата, подписка на шину событий WebSocket при старте"""
+    suggest_index.warm(SessionLocal)
+    await ws_bus.start()
+    global_chat_manager.warm(SessionLocal)
+    await chat_presence.start()
+    yield
+    await chat_presence.stop()
+    await ws_bus.stop()
+    mark_worker_stopped()
+
+
 app = FastAPI(
     title="Pocho Backend API",
     description="API с авторизацией и интеграцией PostgreSQL",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Порядок важен! Middleware применяются в обратном порядке
@@ -64,7 +89,11 @@ app.add_middleware(RequestSizeMiddleware)
 if settings.RATE_LIMIT_ENABLED:
     app.add_middleware(RateLimitMiddleware)
 
-# 5. CORS middleware - первый, обрабатывает CORS
+# 5. ReadYourWritesMiddleware - после записи пользователь читает из основной БД, а не из реплики
+if settings.DATABASE_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# 6. CORS middleware - первый, обрабатывает CORS
 cors_origins = settings.CORS_ORIGINS.split(",") if settings.CORS_ORIGINS != "*" else ["*"]
 app.add_middleware(
     CORSMiddleware,
@@ -75,6 +104,15 @@ app.add_middleware(
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
+# 7. QueryTrackerMiddleware - число запросов и время в БД, Server-Timing
+app.add_middleware(QueryTrackerMiddleware)
+
+# 8. MetricsMiddleware - латентность по маршрутам, запросы в обработке, WebSocket
+app.add_middleware(MetricsMiddleware)
+
+# 9. RequestContextMiddleware - самый внешний: контекст запроса для метрик БД
+app.add_middleware(RequestContextMiddleware)
+
 # Подключение роутеров
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -162,3 +200,13 @@ async def root():
         "redoc": "/redoc",
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Метрики в формате Prometheus (агрегированные по воркерам в multiprocess-режиме)"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.METRICS_TOKEN and authorization != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
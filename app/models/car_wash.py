@@ -7,6 +7,8 @@ from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
+from app.models.geography import postgis_enabled, location_column, location_table_args
+from app.models.text_search import trigram_table_args
 
 
 class WashServiceType(str, enum.Enum):
@@ -44,6 +46,8 @@ class CarWash(Base):
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)  # Широта
     longitude = Column(Float, nullable=False)  # Долгота
+    if postgis_enabled():
+        location = location_column()  # PostGIS geography(Point) из latitude/longitude
     
     # Контактная информация
     phone = Column(String, nullable=True)
@@ -90,7 +94,7 @@ class CarWash(Base):
     # Индексы для геопоиска
     __table_args__ = (
         Index('idx_car_wash_location', 'latitude', 'longitude'),
-    )
+    ) + location_table_args('idx_car_wash_geog') + trigram_table_args('idx_car_wash', ('name', 'address', 'description'))
 
 
 class CarWashService(Base):
@@ -8,6 +8,7 @@ from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
+from app.models.geography import postgis_enabled, location_column, location_table_args
 
 
 class DriverStatus(str, enum.Enum):
@@ -76,6 +77,8 @@ class Driver(Base):
     # Геолокация
     current_latitude = Column(Float, nullable=True)
     current_longitude = Column(Float, nullable=True)
+    if postgis_enabled():
+        location = location_column("current_latitude", "current_longitude")  # PostGIS geography(Point)
     last_location_update = Column(DateTime(timezone=True), nullable=True)
     
     # Настройки
@@ -100,7 +103,7 @@ class Driver(Base):
     __table_args__ = (
         Index('idx_driver_status_online', 'status', 'is_online'),
         Index('idx_driver_location', 'current_latitude', 'current_longitude'),
-    )
+    ) + location_table_args('idx_driver_geog')
 
 
 class DriverDocument(Base):
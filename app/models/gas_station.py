@@ -7,6 +7,8 @@ from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
+from app.models.geography import postgis_enabled, location_column, location_table_args
+from app.models.text_search import trigram_table_args
 
 
 class FuelType(str, enum.Enum):
@@ -38,6 +40,8 @@ class GasStation(Base):
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)  # Широта
     longitude = Column(Float, nullable=False)  # Долгота
+    if postgis_enabled():
+        location = location_column()  # PostGIS geography(Point) из latitude/longitude
     
     # Контактная информация
     phone = Column(String, nullable=True)
@@ -72,7 +76,7 @@ class GasStation(Base):
     # Индексы для геопоиска
     __table_args__ = (
         Index('idx_gas_station_location', 'latitude', 'longitude'),
-    )
+    ) + location_table_args('idx_gas_station_geog') + trigram_table_args('idx_gas_station', ('name', 'address'))
 
 
 class FuelPrice(Base):
@@ -0,0 +1,54 @@
+"""
+PostGIS geography-колонки для моделей с координатами
+
+Включаются настройкой GEO_SEARCH_BACKEND="postgis". Колонка location
+вычисляется PostgreSQL из широты/долготы (GENERATED ... STORED), поэтому
+код записи координат не меняется. Схему существующей БД обновляет
+scripts/enable_postgis.py. При других бэкендах (и в SQLite-тестах)
+колонки и GiST-индексы не объявляются.
+"""
+from typing import Tuple
+
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.orm import deferred
+from sqlalchemy.types import UserDefinedType
+
+from app.core.config import settings
+
+SRID = 4326
+
+
+class Geography(UserDefinedType):
+    """Тип PostGIS geography(Point, 4326)"""
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return f"geography(Point,{SRID})"
+
+
+def postgis_enabled() -> bool:
+    """Используется ли PostGIS для геозапросов"""
+    return settings.GEO_SEARCH_BACKEND == "postgis"
+
+
+def location_expression(lat_column: str, lon_column: str) -> str:
+    """SQL-выражение точки geography из колонок широты и долготы"""
+    return f"ST_SetSRID(ST_MakePoint({lon_column}, {lat_column}), {SRID})::geography"
+
+
+def location_column(lat_column: str = "latitude", lon_column: str = "longitude"):
+    """
+    Вычисляемая колонка location (загружается только при явном обращении)
+    """
+    return deferred(Column(
+        Geography(),
+        Computed(location_expression(lat_column, lon_column), persisted=True),
+        nullable=True,
+    ))
+
+
+def location_table_args(index_name: str) -> Tuple[Index, ...]:
+    """GiST-индекс по колонке location (пустой кортеж, если PostGIS выключен)"""
+    if not postgis_enabled():
+        return ()
+    return (Index(index_name, "location", postgresql_using="gist"),)
@@ -7,6 +7,8 @@ from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
+from app.models.geography import postgis_enabled, location_column, location_table_args
+from app.models.text_search import trigram_table_args
 
 
 class CuisineType(str, enum.Enum):
@@ -46,6 +48,8 @@ class Restaurant(Base):
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)  # Широта
     longitude = Column(Float, nullable=False)  # Долгота
+    if postgis_enabled():
+        location = location_column()  # PostGIS geography(Point) из latitude/longitude
     
     # Контактная информация
     phone = Column(String, nullable=True)
@@ -91,7 +95,7 @@ class Restaurant(Base):
     # Индексы для геопоиска
     __table_args__ = (
         Index('idx_restaurant_location', 'latitude', 'longitude'),
-    )
+    ) + location_table_args('idx_restaurant_geog') + trigram_table_args('idx_restaurant', ('name', 'address', 'description'))
 
 
 class MenuCategory(Base):
@@ -7,6 +7,8 @@ from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
+from app.models.geography import postgis_enabled, location_column, location_table_args
+from app.models.text_search import trigram_table_args
 
 
 class ServiceType(str, enum.Enum):
@@ -46,6 +48,8 @@ class ServiceStation(Base):
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)  # Широта
     longitude = Column(Float, nullable=False)  # Долгота
+    if postgis_enabled():
+        location = location_column()  # PostGIS geography(Point) из latitude/longitude
     
     # Контактная информация
     phone = Column(String, nullable=True)
@@ -89,7 +93,7 @@ class ServiceStation(Base):
     # Индексы для геопоиска
     __table_args__ = (
         Index('idx_service_station_location', 'latitude', 'longitude'),
-    )
+    ) + location_table_args('idx_service_station_geog') + trigram_table_args('idx_service_station', ('name', 'address', 'description'))
 
 
 class ServicePrice(Base):
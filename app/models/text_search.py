@@ -0,0 +1,37 @@
+"""
+GIN-индексы pg_trgm для текстового поиска мест
+
+Объявляются только при TEXT_SEARCH_BACKEND="trigram" (для PostgreSQL с
+расширением pg_trgm). Индексы существующей БД создает
+scripts/enable_trigram_search.py.
+"""
+from typing import Sequence, Tuple
+
+from sqlalchemy import Index
+
+from app.core.config import settings
+
+
+def trigram_enabled() -> bool:
+    """Используется ли pg_trgm для текстового поиска"""
+    return settings.TEXT_SEARCH_BACKEND == "trigram"
+
+
+def trigram_index_name(prefix: str, column: str) -> str:
+    """Имя GIN-индекса колонки"""
+    return f"{prefix}_{column}_trgm"
+
+
+def trigram_table_args(prefix: str, columns: Sequence[str]) -> Tuple[Index, ...]:
+    """GIN-индексы gin_trgm_ops по колонкам (пустой кортеж, если pg_trgm выключен)"""
+    if not trigram_enabled():
+        return ()
+    return tuple(
+        Index(
+            trigram_index_name(prefix, column),
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+        for column in columns
+    )
@@ -1,7 +1,7 @@
 """
 Схемы для статистики администратора
 """
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -247,11 +247,40 @@ class DateRangeFilter(BaseModel):
         from_attributes = True
 
 
+# ==================== DB Pool ====================
 
+class DbPoolWaitStats(BaseModel):
+    """Гистограмма ожидания соединения из пула (секунды)"""
+    count: int
+    sum: float
+    max: float
+    buckets: Dict[str, int]  # Верхняя граница корзины -> накопленное количество
+
+
+class DbPoolStats(BaseModel):
+    """Состояние пула соединений"""
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    in_use: int
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    checkout_wait: DbPoolWaitStats
+
+
+class DbRouteHoldStats(BaseModel):
+    """Удержание соединений маршрутом"""
+    pool: str
+    route: str
+    count: int
+    total_seconds: float
+    max_seconds: float
 
 
-
-
-
-
-
+class DbPoolStatsResponse(BaseModel):
+    """Метрики пулов соединений текущего воркера"""
+    pools: Dict[str, DbPoolStats]
+    routes: List[DbRouteHoldStats]
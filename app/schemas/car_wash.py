@@ -185,6 +185,7 @@ class CarWashResponse(CarWashBase):
     services: List[CarWashServiceResponse] = []
     photos: List[CarWashPhotoResponse] = []
     main_photo: Optional[str] = None  # URL главной фотографии
+    distance_km: Optional[float] = None  # Расстояние до точки запроса (для геопоиска)
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -195,12 +196,22 @@ class CarWashResponse(CarWashBase):
 class CarWashDetailResponse(CarWashResponse):
     """Детальная схема ответа с автомойкой (включая отзывы)"""
     reviews: List[CarWashReviewResponse] = []
+    reviews_next_cursor: Optional[str] = None  # Курсор следующей страницы отзывов (GET /{car_wash_id}/reviews)
+
+
+class CarWashReviewListResponse(BaseModel):
+    """Страница отзывов с курсорной пагинацией"""
+    items: List[CarWashReviewResponse]
+    total: Optional[int] = None  # None при count=none
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 class CarWashListResponse(BaseModel):
     """Схема ответа со списком автомоек"""
     car_washes: List[CarWashResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
 
@@ -113,9 +113,10 @@ class DeliveryOrderStatusUpdate(BaseModel):
 class DeliveryOrderListResponse(BaseModel):
     """Список заказов с пагинацией"""
     items: List[DeliveryOrderResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 # --- Баланс (ТЗ п.5) ---
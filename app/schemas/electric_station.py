@@ -207,6 +207,8 @@ class ElectricStationResponse(ElectricStationBase):
     charging_points: List[ChargingPointResponse] = []
     photos: List[ElectricStationPhotoResponse] = []
     main_photo: Optional[str] = None  # URL главной фотографии
+    distance_km: Optional[float] = None  # Расстояние до точки запроса (для геопоиска)
+    route_km: Optional[float] = None  # Позиция вдоль маршрута от его начала (для поиска по маршруту)
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -217,12 +219,22 @@ class ElectricStationResponse(ElectricStationBase):
 class ElectricStationDetailResponse(ElectricStationResponse):
     """Детальная схема ответа с электрозаправкой (включая отзывы)"""
     reviews: List[ElectricStationReviewResponse] = []
+    reviews_next_cursor: Optional[str] = None  # Курсор следующей страницы отзывов (GET /{station_id}/reviews)
+
+
+class ElectricStationReviewListResponse(BaseModel):
+    """Страница отзывов с курсорной пагинацией"""
+    items: List[ElectricStationReviewResponse]
+    total: Optional[int] = None  # None при count=none
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 class ElectricStationListResponse(BaseModel):
     """Схема ответа со списком электрозаправок"""
     electric_stations: List[ElectricStationResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
 
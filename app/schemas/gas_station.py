@@ -153,6 +153,8 @@ class GasStationResponse(GasStationBase):
     fuel_prices: List[FuelPriceResponse] = []
     photos: List[GasStationPhotoResponse] = []
     main_photo: Optional[str] = None  # URL главной фотографии
+    distance_km: Optional[float] = None  # Расстояние до точки запроса (для геопоиска)
+    route_km: Optional[float] = None  # Позиция вдоль маршрута от его начала (для поиска по маршруту)
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -163,12 +165,22 @@ class GasStationResponse(GasStationBase):
 class GasStationDetailResponse(GasStationResponse):
     """Детальная схема ответа с заправочной станцией (включая отзывы)"""
     reviews: List[ReviewResponse] = []
+    reviews_next_cursor: Optional[str] = None  # Курсор следующей страницы отзывов (GET /{station_id}/reviews)
+
+
+class ReviewListResponse(BaseModel):
+    """Страница отзывов с курсорной пагинацией"""
+    items: List[ReviewResponse]
+    total: Optional[int] = None  # None при count=none
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 class GasStationListResponse(BaseModel):
     """Схема ответа со списком заправочных станций"""
     stations: List[GasStationResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
 
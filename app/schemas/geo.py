@@ -0,0 +1,34 @@
+"""
+Схемы для геопоиска и карты
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+class MapCluster(BaseModel):
+    """Кластер маркеров на карте"""
+    count: int  # Количество мест в кластере
+    latitude: float  # Центроид
+    longitude: float
+    min_price: Optional[float] = None  # Минимальная цена в кластере (если применимо)
+    place_id: Optional[int] = None  # ID места, если кластер из одной точки
+
+
+class MapClusterResponse(BaseModel):
+    """Схема ответа с кластерами для viewport карты"""
+    clusters: List[MapCluster]
+    total: int  # Количество мест во viewport
+    zoom: int
+
+
+class RoutePoint(BaseModel):
+    """Точка маршрута"""
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class RouteCorridorRequest(BaseModel):
+    """Схема запроса поиска мест вдоль маршрута"""
+    points: List[RoutePoint] = Field(..., min_length=2, max_length=1000, description="Полилиния маршрута")
+    buffer_km: float = Field(2.0, gt=0, le=50, description="Ширина коридора в обе стороны от маршрута")
+    limit: int = Field(50, ge=1, le=200)
@@ -45,9 +45,18 @@ class GlobalChatMessageResponse(GlobalChatMessageBase):
 class GlobalChatMessageListResponse(BaseModel):
     """Схема списка сообщений"""
     messages: List[GlobalChatMessageResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
+    online_count: int = Field(..., description="Количество пользователей онлайн")
+
+
+class GlobalChatSyncResponse(BaseModel):
+    """Схема догрузки сообщений после since_id"""
+    messages: List[GlobalChatMessageResponse]  # По возрастанию id
+    last_id: int = Field(..., description="since_id для следующего запроса")
+    has_more: bool = Field(..., description="Есть еще сообщения после last_id")
     online_count: int = Field(..., description="Количество пользователей онлайн")
 
 
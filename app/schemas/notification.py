@@ -39,10 +39,11 @@ class NotificationResponse(NotificationBase):
 class NotificationListResponse(BaseModel):
     """Схема списка уведомлений"""
     notifications: List[NotificationResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     unread_count: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 class NotificationStatsResponse(BaseModel):
@@ -227,6 +227,7 @@ class RestaurantResponse(RestaurantBase):
     menu_categories: List[MenuCategoryResponse] = []
     photos: List[RestaurantPhotoResponse] = []
     main_photo: Optional[str] = None  # URL главной фотографии
+    distance_km: Optional[float] = None  # Расстояние до точки запроса (для геопоиска)
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -237,12 +238,22 @@ class RestaurantResponse(RestaurantBase):
 class RestaurantDetailResponse(RestaurantResponse):
     """Детальная схема ответа с рестораном (включая отзывы)"""
     reviews: List[RestaurantReviewResponse] = []
+    reviews_next_cursor: Optional[str] = None  # Курсор следующей страницы отзывов (GET /{restaurant_id}/reviews)
+
+
+class RestaurantReviewListResponse(BaseModel):
+    """Страница отзывов с курсорной пагинацией"""
+    items: List[RestaurantReviewResponse]
+    total: Optional[int] = None  # None при count=none
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 class RestaurantListResponse(BaseModel):
     """Схема ответа со списком ресторанов"""
     restaurants: List[RestaurantResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
 
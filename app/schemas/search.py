@@ -0,0 +1,39 @@
+"""
+Схемы для единого поиска мест по всем категориям
+"""
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+
+class PlaceSearchResult(BaseModel):
+    """Найденное место любой категории"""
+    category: str  # gas_stations, restaurants, service_stations, car_washes, electric_stations
+    id: int
+    name: str
+    address: str
+    latitude: float
+    longitude: float
+    rating: float
+    reviews_count: int
+    distance_km: Optional[float] = None  # Если передана точка пользователя
+    score: float  # Релевантность с поправкой на расстояние (0..1)
+
+
+class PlaceSearchResponse(BaseModel):
+    """Схема ответа единого поиска"""
+    results: List[PlaceSearchResult]
+    total: int
+    categories: Dict[str, int]  # Количество результатов по категориям (с учетом лимита на категорию)
+
+
+class PlaceSuggestion(BaseModel):
+    """Подсказка поиска"""
+    category: str
+    id: int
+    name: str
+    address: str
+
+
+class PlaceSuggestResponse(BaseModel):
+    """Схема ответа подсказок поиска"""
+    suggestions: List[PlaceSuggestion]
@@ -179,6 +179,7 @@ class ServiceStationResponse(ServiceStationBase):
     service_prices: List[ServicePriceResponse] = []
     photos: List[ServiceStationPhotoResponse] = []
     main_photo: Optional[str] = None  # URL главной фотографии
+    distance_km: Optional[float] = None  # Расстояние до точки запроса (для геопоиска)
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -189,12 +190,22 @@ class ServiceStationResponse(ServiceStationBase):
 class ServiceStationDetailResponse(ServiceStationResponse):
     """Детальная схема ответа с СТО (включая отзывы)"""
     reviews: List[ServiceStationReviewResponse] = []
+    reviews_next_cursor: Optional[str] = None  # Курсор следующей страницы отзывов (GET /{station_id}/reviews)
+
+
+class ServiceStationReviewListResponse(BaseModel):
+    """Страница отзывов с курсорной пагинацией"""
+    items: List[ServiceStationReviewResponse]
+    total: Optional[int] = None  # None при count=none
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None - страниц больше нет)
 
 
 class ServiceStationListResponse(BaseModel):
     """Схема ответа со списком СТО"""
     service_stations: List[ServiceStationResponse]
-    total: int
+    total: Optional[int] = None  # None при count=none
     skip: int
     limit: int
 
@@ -1,11 +1,10 @@
 """
 CRUD операции для Car Wash Service
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from math import radians, cos, sin, asin, sqrt
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_
 
 from app.models.car_wash import (
     CarWash,
@@ -24,24 +23,26 @@ from app.schemas.car_wash import (
     CarWashReviewCreate,
     CarWashReviewUpdate,
 )
+from app.core.response_cache import response_cache
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
+from app.services.search_service import text_search, sync_place_suggestions, remove_place_suggestions
+from app.services.geo_service import (
+    radius_search,
+    nearest_search,
+    approved_places_loader,
+    get_cluster_layer,
+    sync_place_location,
+    remove_place_location,
+)
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Вычисляет расстояние между двумя точками на Земле в километрах
-    используя формулу гаверсинуса
-    """
-    R = 6371  # Радиус Земли в километрах
-    
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-    
-    a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    
-    return R * c
+# План загрузки связей для списков: все коллекции, которые читает сериализация
+# ответа, подгружаются одним запросом на связь вместо ленивой загрузки по месту
+LIST_LOAD_PLAN = (
+    selectinload(CarWash.services),
+    selectinload(CarWash.photos),
+)
 
 
 # ==================== Car Wash CRUD ====================
@@ -82,6 +83,9 @@ def create_car_wash(
     
     db.commit()
     db.refresh(db_car_wash)
+    sync_place_location(db_car_wash)
+    sync_place_suggestions(db_car_wash)
+    response_cache.bump(CarWash.__tablename__)
     return db_car_wash
 
 
@@ -94,8 +98,10 @@ def get_car_washes(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    filters: Optional[CarWashFilter] = None
-) -> Tuple[List[CarWash], int]:
+    filters: Optional[CarWashFilter] = None,
+    load_plan: Sequence = LIST_LOAD_PLAN,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[CarWash], Optional[int]]:
     """Получение списка автомоек с фильтрацией"""
     query = db.query(CarWash)
     
@@ -156,44 +162,62 @@ def get_car_washes(
     if filters and filters.has_self_service is not None:
         query = query.filter(CarWash.has_self_service == filters.has_self_service)
     
-    # Поиск по названию или адресу
+    # Текстовый поиск по названию, адресу или описанию (с ранжированием по релевантности)
+    search_rank = None
     if filters and filters.search_query:
-        search_term = f"%{filters.search_query}%"
-        query = query.filter(
-            or_(
-                CarWash.name.ilike(search_term),
-                CarWash.address.ilike(search_term),
-                CarWash.description.ilike(search_term)
-            )
-        )
+        query, search_rank = text_search(query, (CarWash.name, CarWash.address, CarWash.description), filters.search_query)
     
     # Поиск по близости
     if filters and filters.latitude and filters.longitude and filters.radius_km:
-        all_car_washes = query.all()
-        filtered_car_washes = []
-        for car_wash in all_car_washes:
-            distance = haversine_distance(
-                filters.latitude,
-                filters.longitude,
-                car_wash.latitude,
-                car_wash.longitude
-            )
-            if distance <= filters.radius_km:
-                filtered_car_washes.append(car_wash)
-        
-        total = len(filtered_car_washes)
-        car_washes = filtered_car_washes[skip:skip + limit]
-        return car_washes, total
+        return radius_search(
+            query,
+            CarWash,
+            filters.latitude,
+            filters.longitude,
+            filters.radius_km,
+            skip=skip,
+            limit=limit,
+            options=load_plan,
+            count=count,
+            cache_category=CarWash.__tablename__
+        )
     
-    # Подсчет общего количества
-    total = query.count()
+    # Подсчет общего количества (estimate - кешируется до следующей записи в категорию)
+    total = count_rows(query, count, cache_category=CarWash.__tablename__)
     
     # Применяем пагинацию
-    car_washes = query.order_by(CarWash.rating.desc(), CarWash.reviews_count.desc()).offset(skip).limit(limit).all()
+    order_by = [CarWash.rating.desc(), CarWash.reviews_count.desc()]
+    if search_rank is not None:
+        order_by.insert(0, search_rank.desc())
+    car_washes = query.options(*load_plan).order_by(*order_by).offset(skip).limit(limit).all()
     
     return car_washes, total
 
 
+def get_nearest_car_washes(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[CarWash, float]]:
+    """Получение k ближайших одобренных автомоек с расстояниями в км"""
+    query = db.query(CarWash).filter(CarWash.status == CarWashStatus.APPROVED)
+    return nearest_search(query, CarWash, latitude, longitude, k, options=LIST_LOAD_PLAN)
+
+
+def get_car_wash_clusters(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int
+) -> List[dict]:
+    """Кластеры одобренных автомоек для viewport карты"""
+    layer = get_cluster_layer(CarWash, approved_places_loader(CarWash, CarWashStatus.APPROVED))
+    return layer.clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+
+
 def update_car_wash(
     db: Session,
     car_wash_id: int,
@@ -210,6 +234,9 @@ def update_car_wash(
     
     db.commit()
     db.refresh(car_wash)
+    sync_place_location(car_wash)
+    sync_place_suggestions(car_wash)
+    response_cache.bump(CarWash.__tablename__)
     return car_wash
 
 
@@ -221,6 +248,9 @@ def delete_car_wash(db: Session, car_wash_id: int) -> bool:
     
     db.delete(car_wash)
     db.commit()
+    remove_place_location(CarWash, car_wash_id)
+    remove_place_suggestions(CarWash, car_wash_id)
+    response_cache.bump(CarWash.__tablename__)
     return True
 
 
@@ -235,6 +265,9 @@ def approve_car_wash(db: Session, car_wash_id: int) -> Optional[CarWash]:
     
     db.commit()
     db.refresh(car_wash)
+    sync_place_location(car_wash)
+    sync_place_suggestions(car_wash)
+    response_cache.bump(CarWash.__tablename__)
     return car_wash
 
 
@@ -248,6 +281,9 @@ def reject_car_wash(db: Session, car_wash_id: int) -> Optional[CarWash]:
     
     db.commit()
     db.refresh(car_wash)
+    sync_place_location(car_wash)
+    sync_place_suggestions(car_wash)
+    response_cache.bump(CarWash.__tablename__)
     return car_wash
 
 
@@ -274,6 +310,7 @@ def create_or_update_car_wash_service(
     db.add(car_wash_service)
     db.commit()
     db.refresh(car_wash_service)
+    response_cache.bump(CarWash.__tablename__)
     return car_wash_service
 
 
@@ -298,6 +335,7 @@ def update_car_wash_service(
     
     db.commit()
     db.refresh(car_wash_service)
+    response_cache.bump(CarWash.__tablename__)
     return car_wash_service
 
 
@@ -333,6 +371,7 @@ def delete_car_wash_service(db: Session, service_id: int) -> bool:
     
     db.delete(car_wash_service)
     db.commit()
+    response_cache.bump(CarWash.__tablename__)
     return True
 
 
@@ -366,6 +405,7 @@ def add_car_wash_photo(
     db.add(photo)
     db.commit()
     db.refresh(photo)
+    response_cache.bump(CarWash.__tablename__)
     return photo
 
 
@@ -384,6 +424,7 @@ def delete_car_wash_photo(db: Session, photo_id: int) -> bool:
     
     db.delete(photo)
     db.commit()
+    response_cache.bump(CarWash.__tablename__)
     return True
 
 
@@ -409,6 +450,7 @@ def set_main_photo(db: Session, car_wash_id: int, photo_id: int) -> Optional[Car
     photo.is_main = True
     db.commit()
     db.refresh(photo)
+    response_cache.bump(CarWash.__tablename__)
     return photo
 
 
@@ -458,12 +500,14 @@ def get_reviews_by_car_wash(
     db: Session,
     car_wash_id: int,
     skip: int = 0,
-    limit: int = 50
-) -> Tuple[List[CarWashReview], int]:
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[CarWashReview], Optional[int]]:
     """Получение отзывов по автомойке"""
     query = db.query(CarWashReview).filter(CarWashReview.car_wash_id == car_wash_id)
-    total = query.count()
-    reviews = query.order_by(CarWashReview.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(query, count)
+    reviews = paginate_by_created(query, CarWashReview, skip=skip, limit=limit, cursor=cursor).all()
     return reviews, total
 
 
@@ -533,6 +577,7 @@ def _recalculate_car_wash_rating(db: Session, car_wash_id: int):
         car_wash.rating = round(rating, 2)
         car_wash.reviews_count = count
         db.commit()
+        response_cache.bump(CarWash.__tablename__)
 
 
 
@@ -16,6 +16,10 @@ from app.models.delivery import (
 from app.schemas.delivery import DeliveryOrderCreate, PointSchema
 from app.services.delivery_service.utils import haversine_km, apply_tariff
 from app.services.delivery_service.tariff_crud import get_tariff_by_id
+from app.models.geography import postgis_enabled
+from app.services.geo_service import PointArrays, nearest_points, load_by_ids, postgis_nearest
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
 
 
 def get_active_tariff(db: Session) -> Optional[DeliveryTariff]:
@@ -156,7 +160,9 @@ def get_user_orders(
     skip: int = 0,
     limit: int = 50,
     status: Optional[DeliveryOrderStatus] = None,
-) -> Tuple[List[DeliveryOrder], int]:
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
+) -> Tuple[List[DeliveryOrder], Optional[int]]:
     q = db.query(DeliveryOrder).filter(
         DeliveryOrder.user_id == user_id,
         DeliveryOrder.user_id.isnot(None),
@@ -166,8 +172,8 @@ def get_user_orders(
     )
     if status is not None:
         q = q.filter(DeliveryOrder.status == status)
-    total = q.count()
-    items = q.order_by(DeliveryOrder.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(q, count)
+    items = paginate_by_created(q, DeliveryOrder, skip=skip, limit=limit, cursor=cursor).all()
     return items, total
 
 
@@ -177,7 +183,9 @@ def get_orders_for_driver(
     skip: int = 0,
     limit: int = 50,
     status: Optional[DeliveryOrderStatus] = None,
-) -> Tuple[List[DeliveryOrder], int]:
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT,
+) -> Tuple[List[DeliveryOrder], Optional[int]]:
     q = db.query(DeliveryOrder).filter(
         DeliveryOrder.driver_id == driver_id,
         DeliveryOrder.user_id.isnot(None),
@@ -187,8 +195,8 @@ def get_orders_for_driver(
     )
     if status is not None:
         q = q.filter(DeliveryOrder.status == status)
-    total = q.count()
-    items = q.order_by(DeliveryOrder.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(q, count)
+    items = paginate_by_created(q, DeliveryOrder, skip=skip, limit=limit, cursor=cursor).all()
     return items, total
 
 
@@ -202,19 +210,17 @@ def find_nearest_available_driver(
     Поиск ближайших доступных водителей (ТЗ п.6.1): онлайн, одобрен, с координатами.
     Сортировка по расстоянию до точки забора.
     """
-    drivers = (
-        db.query(Driver)
-        .filter(
-            Driver.is_online == True,
-            Driver.status == DriverStatus.APPROVED,
-            Driver.current_latitude.isnot(None),
-            Driver.current_longitude.isnot(None),
-        )
-        .all()
+    query = db.query(Driver).filter(
+        Driver.is_online == True,
+        Driver.status == DriverStatus.APPROVED,
+        Driver.current_latitude.isnot(None),
+        Driver.current_longitude.isnot(None),
     )
-    with_dist = [(d, haversine_km(pickup_lat, pickup_lng, d.current_latitude or 0, d.current_longitude or 0)) for d in drivers]
-    with_dist.sort(key=lambda x: x[1])
-    return [d for d, _ in with_dist[:limit]]
+    if postgis_enabled():
+        return postgis_nearest(query, Driver.location, pickup_lat, pickup_lng, limit=limit).all()
+    rows = query.with_entities(Driver.id, Driver.current_latitude, Driver.current_longitude).all()
+    nearest = nearest_points(PointArrays.from_rows(rows), pickup_lat, pickup_lng, limit=limit)
+    return load_by_ids(db, Driver, [driver_id for driver_id, _ in nearest])
 
 
 def assign_nearest_driver(db: Session, order_id: int) -> Optional[Driver]:
@@ -5,7 +5,6 @@ from typing import Optional, List
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from datetime import datetime, timedelta
-import math
 
 from app.models.driver import (
     Driver,
@@ -24,23 +23,8 @@ from app.schemas.driver import (
     VehicleCreate,
     VehicleUpdate,
 )
-
-
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Вычисляет расстояние между двумя точками в км (формула Haversine)"""
-    R = 6371  # Радиус Земли в км
-    
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    
-    a = (
-        math.sin(dlat / 2) ** 2 +
-        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-        math.sin(dlon / 2) ** 2
-    )
-    c = 2 * math.asin(math.sqrt(a))
-    
-    return R * c
+from app.models.geography import postgis_enabled
+from app.services.geo_service import PointArrays, nearest_points, load_by_ids, postgis_nearest
 
 
 # ==================== Driver CRUD ====================
@@ -286,23 +270,16 @@ def get_nearby_drivers(
     if region_id:
         query = query.filter(Driver.region_id == region_id)
     
-    drivers = query.all()
-    
-    # Фильтруем по расстоянию
-    nearby_drivers = []
-    for driver in drivers:
-        distance = haversine_distance(
-            latitude, longitude,
-            driver.current_latitude, driver.current_longitude
-        )
-        if distance <= radius_km:
-            nearby_drivers.append((driver, distance))
+    if postgis_enabled():
+        return postgis_nearest(query, Driver.location, latitude, longitude, limit=limit, radius_km=radius_km).all()
     
-    # Сортируем по расстоянию
-    nearby_drivers.sort(key=lambda x: x[1])
+    # Расстояния считаются пакетно по координатам, ORM-объекты грузятся только для результата
+    points = PointArrays.from_rows(
+        query.with_entities(Driver.id, Driver.current_latitude, Driver.current_longitude).all()
+    )
+    nearest = nearest_points(points, latitude, longitude, limit=limit, radius_km=radius_km)
     
-    # Возвращаем только водителей (без расстояния)
-    return [driver for driver, _ in nearby_drivers[:limit]]
+    return load_by_ids(db, Driver, [driver_id for driver_id, _ in nearest])
 
 
 def get_driver_statistics(db: Session, driver_id: int) -> Optional[dict]:
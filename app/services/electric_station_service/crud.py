@@ -1,11 +1,10 @@
 """
 CRUD операции для Electric Station Service
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_, or_
-from math import radians, cos, sin, asin, sqrt
 
 from app.models.electric_station import (
     ElectricStation,
@@ -25,24 +24,27 @@ from app.schemas.electric_station import (
     ElectricStationReviewCreate,
     ElectricStationReviewUpdate,
 )
+from app.core.response_cache import response_cache
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
+from app.services.search_service import text_search, sync_place_suggestions, remove_place_suggestions
+from app.services.geo_service import (
+    radius_search,
+    nearest_search,
+    corridor_search,
+    approved_places_loader,
+    get_cluster_layer,
+    sync_place_location,
+    remove_place_location,
+)
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Вычисляет расстояние между двумя точками на Земле в километрах
-    используя формулу гаверсинуса
-    """
-    R = 6371  # Радиус Земли в километрах
-    
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-    
-    a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    
-    return R * c
+# План загрузки связей для списков: все коллекции, которые читает сериализация
+# ответа, подгружаются одним запросом на связь вместо ленивой загрузки по месту
+LIST_LOAD_PLAN = (
+    selectinload(ElectricStation.charging_points),
+    selectinload(ElectricStation.photos),
+)
 
 
 # ==================== Electric Station CRUD ====================
@@ -92,6 +94,9 @@ def create_electric_station(
     
     db.commit()
     db.refresh(db_station)
+    sync_place_location(db_station)
+    sync_place_suggestions(db_station)
+    response_cache.bump(ElectricStation.__tablename__)
     return db_station
 
 
@@ -104,8 +109,10 @@ def get_electric_stations(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    filters: Optional[ElectricStationFilter] = None
-) -> Tuple[List[ElectricStation], int]:
+    filters: Optional[ElectricStationFilter] = None,
+    load_plan: Sequence = LIST_LOAD_PLAN,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[ElectricStation], Optional[int]]:
     """Получение списка электрозаправок с фильтрацией"""
     query = db.query(ElectricStation)
     
@@ -209,44 +216,84 @@ def get_electric_stations(
     if filters and filters.network:
         query = query.filter(ElectricStation.network.ilike(f"%{filters.network}%"))
     
-    # Поиск по названию или адресу
+    # Текстовый поиск по названию, адресу или описанию (с ранжированием по релевантности)
+    search_rank = None
     if filters and filters.search_query:
-        search_term = f"%{filters.search_query}%"
-        query = query.filter(
-            or_(
-                ElectricStation.name.ilike(search_term),
-                ElectricStation.address.ilike(search_term),
-                ElectricStation.description.ilike(search_term)
-            )
-        )
+        query, search_rank = text_search(query, (ElectricStation.name, ElectricStation.address, ElectricStation.description), filters.search_query)
     
     # Поиск по близости
     if filters and filters.latitude and filters.longitude and filters.radius_km:
-        all_stations = query.all()
-        filtered_stations = []
-        for station in all_stations:
-            distance = haversine_distance(
-                filters.latitude,
-                filters.longitude,
-                station.latitude,
-                station.longitude
-            )
-            if distance <= filters.radius_km:
-                filtered_stations.append(station)
-        
-        total = len(filtered_stations)
-        stations = filtered_stations[skip:skip + limit]
-        return stations, total
+        return radius_search(
+            query,
+            ElectricStation,
+            filters.latitude,
+            filters.longitude,
+            filters.radius_km,
+            skip=skip,
+            limit=limit,
+            options=load_plan,
+            count=count,
+            cache_category=ElectricStation.__tablename__
+        )
     
-    # Подсчет общего количества
-    total = query.count()
+    # Подсчет общего количества (estimate - кешируется до следующей записи в категорию)
+    total = count_rows(query, count, cache_category=ElectricStation.__tablename__)
     
     # Применяем пагинацию
-    stations = query.order_by(ElectricStation.rating.desc(), ElectricStation.reviews_count.desc()).offset(skip).limit(limit).all()
+    order_by = [ElectricStation.rating.desc(), ElectricStation.reviews_count.desc()]
+    if search_rank is not None:
+        order_by.insert(0, search_rank.desc())
+    stations = query.options(*load_plan).order_by(*order_by).offset(skip).limit(limit).all()
     
     return stations, total
 
 
+def get_nearest_electric_stations(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[ElectricStation, float]]:
+    """Получение k ближайших одобренных электрозаправок с расстояниями в км"""
+    query = db.query(ElectricStation).filter(ElectricStation.status == ElectricStationStatus.APPROVED)
+    return nearest_search(query, ElectricStation, latitude, longitude, k, options=LIST_LOAD_PLAN)
+
+
+def get_electric_stations_along_route(
+    db: Session,
+    route: List[Tuple[float, float]],
+    buffer_km: float,
+    limit: int = 50,
+    connector_type: Optional[ConnectorType] = None,
+    min_power_kw: Optional[float] = None
+) -> List[Tuple[ElectricStation, float, float]]:
+    """
+    Одобренные электрозаправки вдоль маршрута
+    Возвращает (станция, расстояние до маршрута, позиция вдоль маршрута) в порядке следования
+    """
+    query = db.query(ElectricStation).filter(ElectricStation.status == ElectricStationStatus.APPROVED)
+    if connector_type or min_power_kw:
+        query = query.join(ChargingPoint)
+        if connector_type:
+            query = query.filter(ChargingPoint.connector_type == connector_type)
+        if min_power_kw:
+            query = query.filter(ChargingPoint.power_kw >= min_power_kw)
+    return corridor_search(query, ElectricStation, route, buffer_km, limit=limit, options=LIST_LOAD_PLAN)
+
+
+def get_electric_station_clusters(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int
+) -> List[dict]:
+    """Кластеры одобренных электрозаправок для viewport карты"""
+    layer = get_cluster_layer(ElectricStation, approved_places_loader(ElectricStation, ElectricStationStatus.APPROVED))
+    return layer.clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+
+
 def update_electric_station(
     db: Session,
     station_id: int,
@@ -263,6 +310,9 @@ def update_electric_station(
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(ElectricStation.__tablename__)
     return station
 
 
@@ -274,6 +324,9 @@ def delete_electric_station(db: Session, station_id: int) -> bool:
     
     db.delete(station)
     db.commit()
+    remove_place_location(ElectricStation, station_id)
+    remove_place_suggestions(ElectricStation, station_id)
+    response_cache.bump(ElectricStation.__tablename__)
     return True
 
 
@@ -288,6 +341,9 @@ def approve_electric_station(db: Session, station_id: int) -> Optional[ElectricS
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(ElectricStation.__tablename__)
     return station
 
 
@@ -301,6 +357,9 @@ def reject_electric_station(db: Session, station_id: int) -> Optional[ElectricSt
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(ElectricStation.__tablename__)
     return station
 
 
@@ -330,6 +389,7 @@ def create_or_update_charging_point(
     
     db.commit()
     db.refresh(charging_point)
+    response_cache.bump(ElectricStation.__tablename__)
     return charging_point
 
 
@@ -354,6 +414,7 @@ def update_charging_point(
     
     db.commit()
     db.refresh(charging_point)
+    response_cache.bump(ElectricStation.__tablename__)
     
     # Обновляем счетчики станции
     _update_station_points_counters(db, charging_point.electric_station_id)
@@ -395,6 +456,7 @@ def delete_charging_point(db: Session, point_id: int) -> bool:
     station_id = charging_point.electric_station_id
     db.delete(charging_point)
     db.commit()
+    response_cache.bump(ElectricStation.__tablename__)
     
     # Обновляем счетчики станции
     _update_station_points_counters(db, station_id)
@@ -419,6 +481,7 @@ def _update_station_points_counters(db: Session, station_id: int):
         station.total_points = total_points
         station.available_points = available_points
         db.commit()
+        response_cache.bump(ElectricStation.__tablename__)
 
 
 # ==================== Photo CRUD ====================
@@ -451,6 +514,7 @@ def add_electric_station_photo(
     db.add(photo)
     db.commit()
     db.refresh(photo)
+    response_cache.bump(ElectricStation.__tablename__)
     return photo
 
 
@@ -469,6 +533,7 @@ def delete_electric_station_photo(db: Session, photo_id: int) -> bool:
     
     db.delete(photo)
     db.commit()
+    response_cache.bump(ElectricStation.__tablename__)
     return True
 
 
@@ -494,6 +559,7 @@ def set_main_photo(db: Session, station_id: int, photo_id: int) -> Optional[Elec
     photo.is_main = True
     db.commit()
     db.refresh(photo)
+    response_cache.bump(ElectricStation.__tablename__)
     return photo
 
 
@@ -549,12 +615,14 @@ def get_reviews_by_station(
     db: Session,
     station_id: int,
     skip: int = 0,
-    limit: int = 50
-) -> Tuple[List[ElectricStationReview], int]:
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[ElectricStationReview], Optional[int]]:
     """Получение отзывов по электрозаправке"""
     query = db.query(ElectricStationReview).filter(ElectricStationReview.electric_station_id == station_id)
-    total = query.count()
-    reviews = query.order_by(ElectricStationReview.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(query, count)
+    reviews = paginate_by_created(query, ElectricStationReview, skip=skip, limit=limit, cursor=cursor).all()
     return reviews, total
 
 
@@ -624,6 +692,7 @@ def _recalculate_station_rating(db: Session, station_id: int):
         station.rating = round(rating, 2)
         station.reviews_count = count
         db.commit()
+        response_cache.bump(ElectricStation.__tablename__)
 
 
 
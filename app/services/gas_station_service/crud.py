@@ -1,11 +1,10 @@
 """
 CRUD операции для Gas Station Service
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func as sql_func
-from math import radians, cos, sin, asin, sqrt
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func as sql_func
 
 from app.models.gas_station import (
     GasStation,
@@ -24,24 +23,27 @@ from app.schemas.gas_station import (
     ReviewCreate,
     ReviewUpdate,
 )
+from app.core.response_cache import response_cache
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
+from app.services.search_service import text_search, sync_place_suggestions, remove_place_suggestions
+from app.services.geo_service import (
+    radius_search,
+    nearest_search,
+    corridor_search,
+    get_cluster_layer,
+    invalidate_cluster_layers,
+    sync_place_location,
+    remove_place_location,
+)
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Вычисляет расстояние между двумя точками на Земле в километрах
-    используя формулу гаверсинуса
-    """
-    R = 6371  # Радиус Земли в километрах
-    
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-    
-    a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    
-    return R * c
+# План загрузки связей для списков: все коллекции, которые читает сериализация
+# ответа, подгружаются одним запросом на связь вместо ленивой загрузки по месту
+LIST_LOAD_PLAN = (
+    selectinload(GasStation.fuel_prices),
+    selectinload(GasStation.photos),
+)
 
 
 # ==================== Gas Station CRUD ====================
@@ -79,6 +81,9 @@ def create_gas_station(
     
     db.commit()
     db.refresh(db_station)
+    sync_place_location(db_station)
+    sync_place_suggestions(db_station)
+    response_cache.bump(GasStation.__tablename__)
     return db_station
 
 
@@ -91,8 +96,10 @@ def get_gas_stations(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    filters: Optional[GasStationFilter] = None
-) -> Tuple[List[GasStation], int]:
+    filters: Optional[GasStationFilter] = None,
+    load_plan: Sequence = LIST_LOAD_PLAN,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[GasStation], Optional[int]]:
     """Получение списка заправочных станций с фильтрацией"""
     query = db.query(GasStation)
     
@@ -134,44 +141,97 @@ def get_gas_stations(
     if filters and filters.has_promotions is not None:
         query = query.filter(GasStation.has_promotions == filters.has_promotions)
     
-    # Поиск по названию или адресу
+    # Текстовый поиск по названию или адресу (с ранжированием по релевантности)
+    search_rank = None
     if filters and filters.search_query:
-        search_term = f"%{filters.search_query}%"
-        query = query.filter(
-            or_(
-                GasStation.name.ilike(search_term),
-                GasStation.address.ilike(search_term)
-            )
-        )
+        query, search_rank = text_search(query, (GasStation.name, GasStation.address), filters.search_query)
     
     # Поиск по близости
     if filters and filters.latitude and filters.longitude and filters.radius_km:
-        # Получаем все станции и фильтруем по расстоянию
-        all_stations = query.all()
-        filtered_stations = []
-        for station in all_stations:
-            distance = haversine_distance(
-                filters.latitude,
-                filters.longitude,
-                station.latitude,
-                station.longitude
-            )
-            if distance <= filters.radius_km:
-                filtered_stations.append(station)
-        
-        total = len(filtered_stations)
-        stations = filtered_stations[skip:skip + limit]
-        return stations, total
+        return radius_search(
+            query,
+            GasStation,
+            filters.latitude,
+            filters.longitude,
+            filters.radius_km,
+            skip=skip,
+            limit=limit,
+            options=load_plan,
+            count=count,
+            cache_category=GasStation.__tablename__
+        )
     
-    # Подсчет общего количества
-    total = query.count()
+    # Подсчет общего количества (estimate - кешируется до следующей записи в категорию)
+    total = count_rows(query, count, cache_category=GasStation.__tablename__)
     
     # Применяем пагинацию
-    stations = query.order_by(GasStation.rating.desc(), GasStation.reviews_count.desc()).offset(skip).limit(limit).all()
+    order_by = [GasStation.rating.desc(), GasStation.reviews_count.desc()]
+    if search_rank is not None:
+        order_by.insert(0, search_rank.desc())
+    stations = query.options(*load_plan).order_by(*order_by).offset(skip).limit(limit).all()
     
     return stations, total
 
 
+def get_nearest_gas_stations(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[GasStation, float]]:
+    """Получение k ближайших одобренных заправочных станций с расстояниями в км"""
+    query = db.query(GasStation).filter(GasStation.status == StationStatus.APPROVED)
+    return nearest_search(query, GasStation, latitude, longitude, k, options=LIST_LOAD_PLAN)
+
+
+def get_gas_stations_along_route(
+    db: Session,
+    route: List[Tuple[float, float]],
+    buffer_km: float,
+    limit: int = 50,
+    fuel_type: Optional[FuelType] = None
+) -> List[Tuple[GasStation, float, float]]:
+    """
+    Одобренные заправочные станции вдоль маршрута
+    Возвращает (станция, расстояние до маршрута, позиция вдоль маршрута) в порядке следования
+    """
+    query = db.query(GasStation).filter(GasStation.status == StationStatus.APPROVED)
+    if fuel_type:
+        query = query.join(FuelPrice).filter(FuelPrice.fuel_type == fuel_type)
+    return corridor_search(query, GasStation, route, buffer_km, limit=limit, options=LIST_LOAD_PLAN)
+
+
+def _gas_station_cluster_loader(fuel_type: Optional[FuelType]):
+    """Загрузчик слоя кластеров: одобренные станции с минимальной ценой топлива"""
+    def load(db: Session):
+        price_join = FuelPrice.gas_station_id == GasStation.id
+        if fuel_type:
+            price_join = and_(price_join, FuelPrice.fuel_type == fuel_type)
+        return db.query(
+            GasStation.id,
+            GasStation.latitude,
+            GasStation.longitude,
+            sql_func.min(FuelPrice.price)
+        ).outerjoin(FuelPrice, price_join).filter(
+            GasStation.status == StationStatus.APPROVED
+        ).group_by(GasStation.id, GasStation.latitude, GasStation.longitude).all()
+    return load
+
+
+def get_gas_station_clusters(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int,
+    fuel_type: Optional[FuelType] = None
+) -> List[dict]:
+    """Кластеры одобренных заправочных станций для viewport карты (с минимальной ценой топлива)"""
+    layer = get_cluster_layer(GasStation, _gas_station_cluster_loader(fuel_type), variant=fuel_type)
+    return layer.clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+
+
 def update_gas_station(
     db: Session,
     station_id: int,
@@ -188,6 +248,9 @@ def update_gas_station(
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(GasStation.__tablename__)
     return station
 
 
@@ -199,6 +262,9 @@ def delete_gas_station(db: Session, station_id: int) -> bool:
     
     db.delete(station)
     db.commit()
+    remove_place_location(GasStation, station_id)
+    remove_place_suggestions(GasStation, station_id)
+    response_cache.bump(GasStation.__tablename__)
     return True
 
 
@@ -213,6 +279,9 @@ def approve_gas_station(db: Session, station_id: int) -> Optional[GasStation]:
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(GasStation.__tablename__)
     return station
 
 
@@ -226,6 +295,9 @@ def reject_gas_station(db: Session, station_id: int) -> Optional[GasStation]:
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(GasStation.__tablename__)
     return station
 
 
@@ -252,6 +324,8 @@ def create_or_update_fuel_price(
         existing_price.updated_by_admin_id = updated_by_admin_id
         db.commit()
         db.refresh(existing_price)
+        invalidate_cluster_layers(GasStation)
+        response_cache.bump(GasStation.__tablename__)
         return existing_price
     else:
         fuel_price = FuelPrice(
@@ -264,6 +338,8 @@ def create_or_update_fuel_price(
         db.add(fuel_price)
         db.commit()
         db.refresh(fuel_price)
+        invalidate_cluster_layers(GasStation)
+        response_cache.bump(GasStation.__tablename__)
         return fuel_price
 
 
@@ -285,6 +361,8 @@ def update_fuel_price(
     
     db.commit()
     db.refresh(fuel_price)
+    invalidate_cluster_layers(GasStation)
+    response_cache.bump(GasStation.__tablename__)
     return fuel_price
 
 
@@ -342,6 +420,7 @@ def add_gas_station_photo(
     db.add(photo)
     db.commit()
     db.refresh(photo)
+    response_cache.bump(GasStation.__tablename__)
     return photo
 
 
@@ -360,6 +439,7 @@ def delete_gas_station_photo(db: Session, photo_id: int) -> bool:
     
     db.delete(photo)
     db.commit()
+    response_cache.bump(GasStation.__tablename__)
     return True
 
 
@@ -385,6 +465,7 @@ def set_main_photo(db: Session, station_id: int, photo_id: int) -> Optional[GasS
     photo.is_main = True
     db.commit()
     db.refresh(photo)
+    response_cache.bump(GasStation.__tablename__)
     return photo
 
 
@@ -434,12 +515,14 @@ def get_reviews_by_station(
     db: Session,
     station_id: int,
     skip: int = 0,
-    limit: int = 50
-) -> Tuple[List[Review], int]:
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[Review], Optional[int]]:
     """Получение отзывов по станции"""
     query = db.query(Review).filter(Review.gas_station_id == station_id)
-    total = query.count()
-    reviews = query.order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(query, count)
+    reviews = paginate_by_created(query, Review, skip=skip, limit=limit, cursor=cursor).all()
     return reviews, total
 
 
@@ -509,4 +592,5 @@ def _recalculate_station_rating(db: Session, station_id: int):
         station.rating = round(rating, 2)
         station.reviews_count = count
         db.commit()
+        response_cache.bump(GasStation.__tablename__)
 
@@ -0,0 +1,91 @@
+"""
+Geo Service: пространственный индекс, расчет расстояний, радиусный поиск,
+поиск вдоль маршрута и кластеризация мест
+"""
+from app.services.geo_service.index import (
+    GeoGridIndex,
+    get_geo_index,
+    reset_geo_indexes,
+)
+from app.services.geo_service.distance import (
+    PointArrays,
+    haversine_distance,
+    haversine_many,
+    nearest_points,
+)
+from app.services.geo_service.search import (
+    ensure_geo_index,
+    sync_place_location,
+    remove_place_location,
+    load_by_ids,
+    radius_search,
+    index_radius_search,
+    nearest_search,
+    index_nearest_search,
+)
+from app.services.geo_service.sql import (
+    bounding_box,
+    distance_expression,
+    within_radius,
+    sql_radius_search,
+    sql_nearest_search,
+)
+from app.services.geo_service.postgis import (
+    make_point,
+    make_line,
+    postgis_nearest,
+    postgis_distance_km,
+    postgis_radius_search,
+    postgis_nearest_search,
+)
+from app.services.geo_service.clusters import (
+    ClusterLayer,
+    approved_places_loader,
+    get_cluster_layer,
+    invalidate_cluster_layers,
+    reset_cluster_layers,
+)
+from app.services.geo_service.corridor import (
+    RouteGeometry,
+    corridor_boxes,
+    corridor_points,
+    corridor_search,
+)
+
+__all__ = [
+    "GeoGridIndex",
+    "get_geo_index",
+    "reset_geo_indexes",
+    "PointArrays",
+    "haversine_distance",
+    "haversine_many",
+    "nearest_points",
+    "ensure_geo_index",
+    "sync_place_location",
+    "remove_place_location",
+    "load_by_ids",
+    "radius_search",
+    "index_radius_search",
+    "nearest_search",
+    "index_nearest_search",
+    "bounding_box",
+    "distance_expression",
+    "within_radius",
+    "sql_radius_search",
+    "sql_nearest_search",
+    "make_point",
+    "make_line",
+    "postgis_nearest",
+    "postgis_distance_km",
+    "postgis_radius_search",
+    "postgis_nearest_search",
+    "ClusterLayer",
+    "approved_places_loader",
+    "get_cluster_layer",
+    "invalidate_cluster_layers",
+    "reset_cluster_layers",
+    "RouteGeometry",
+    "corridor_boxes",
+    "corridor_points",
+    "corridor_search",
+]
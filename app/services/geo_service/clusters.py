@@ -0,0 +1,163 @@
+"""
+Кластеризация маркеров мест для карты
+
+Для каждой категории (и, для заправок, типа топлива) в памяти держится слой
+одобренных мест: массивы id/широта/долгота/минимальная цена. Над слоем лениво
+строится пирамида: для каждого уровня zoom — агрегаты по ячейкам сетки
+(количество, центроид, минимальная цена). Запрос viewport'а только выбирает
+готовые ячейки, попавшие в bounding box.
+"""
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# Загрузчик строк слоя: db -> [(id, latitude, longitude, min_price | None), ...]
+LayerLoader = Callable[[Session], List[Tuple[int, float, float, Optional[float]]]]
+
+
+class ClusterLevel:
+    """Агрегаты одного уровня пирамиды"""
+
+    __slots__ = ("cell_deg", "counts", "centroid_lat", "centroid_lon", "min_price", "single_ids")
+
+    def __init__(self, cell_deg, counts, centroid_lat, centroid_lon, min_price, single_ids):
+        self.cell_deg = cell_deg
+        self.counts = counts
+        self.centroid_lat = centroid_lat
+        self.centroid_lon = centroid_lon
+        self.min_price = min_price
+        self.single_ids = single_ids
+
+
+class ClusterLayer:
+    """Слой мест одной категории с ленивой пирамидой уровней zoom"""
+
+    def __init__(self, loader: LayerLoader):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._price = np.empty(0)
+        self._levels: Dict[int, ClusterLevel] = {}
+
+    def invalidate(self):
+        """Сброс слоя: следующий запрос перечитает данные из БД"""
+        with self._lock:
+            self._loaded_at = None
+            self._levels = {}
+
+    def _ensure_loaded(self, db: Session):
+        ttl = settings.GEO_INDEX_REFRESH_SECONDS
+        if self._loaded_at is not None and (ttl <= 0 or time.monotonic() - self._loaded_at <= ttl):
+            return
+        rows = self._loader(db)
+        self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._lat = np.array([row[1] for row in rows], dtype=np.float64)
+        self._lon = np.array([row[2] for row in rows], dtype=np.float64)
+        self._price = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=np.float64)
+        self._levels = {}
+        self._loaded_at = time.monotonic()
+
+    def _build_level(self, zoom: int) -> ClusterLevel:
+        cell_deg = 360.0 / (2 ** zoom) / settings.GEO_CLUSTER_CELLS_PER_TILE
+        if not len(self._ids):
+            empty = np.empty(0)
+            return ClusterLevel(cell_deg, np.empty(0, dtype=np.int64), empty, empty, empty, np.empty(0, dtype=np.int64))
+
+        cell_i = np.floor(self._lat / cell_deg).astype(np.int64)
+        cell_j = np.floor(self._lon / cell_deg).astype(np.int64)
+        _, inverse = np.unique(np.stack([cell_i, cell_j], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        n_cells = int(inverse.max()) + 1
+
+        counts = np.bincount(inverse, minlength=n_cells)
+        centroid_lat = np.bincount(inverse, weights=self._lat, minlength=n_cells) / counts
+        centroid_lon = np.bincount(inverse, weights=self._lon, minlength=n_cells) / counts
+        min_price = np.full(n_cells, np.inf)
+        np.fmin.at(min_price, inverse, self._price)
+        min_price[np.isinf(min_price)] = np.nan
+
+        # id единственного места в ячейке (для кластеров из одной точки)
+        single_ids = np.full(n_cells, -1, dtype=np.int64)
+        single_ids[inverse] = self._ids
+        single_ids[counts != 1] = -1
+
+        return ClusterLevel(cell_deg, counts, centroid_lat, centroid_lon, min_price, single_ids)
+
+    def clusters(
+        self,
+        db: Session,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        zoom: int
+    ) -> List[dict]:
+        """Кластеры, центроиды которых попадают во viewport"""
+        with self._lock:
+            self._ensure_loaded(db)
+            level = self._levels.get(zoom)
+            if level is None:
+                level = self._levels[zoom] = self._build_level(zoom)
+
+        mask = (
+            (level.centroid_lat >= min_lat) & (level.centroid_lat <= max_lat)
+            & (level.centroid_lon >= min_lon) & (level.centroid_lon <= max_lon)
+        )
+        clusters = []
+        for position in np.flatnonzero(mask):
+            price = level.min_price[position]
+            place_id = int(level.single_ids[position])
+            clusters.append({
+                "count": int(level.counts[position]),
+                "latitude": float(level.centroid_lat[position]),
+                "longitude": float(level.centroid_lon[position]),
+                "min_price": None if np.isnan(price) else float(price),
+                "place_id": place_id if place_id >= 0 else None,
+            })
+        return clusters
+
+
+def approved_places_loader(model, approved_status) -> LayerLoader:
+    """Загрузчик слоя одобренных мест без цен"""
+    def load(db: Session):
+        rows = db.query(model.id, model.latitude, model.longitude).filter(
+            model.status == approved_status
+        ).all()
+        return [(place_id, latitude, longitude, None) for place_id, latitude, longitude in rows]
+    return load
+
+
+# Слои по ключу (__tablename__, вариант) -> ClusterLayer
+_layers: Dict[Tuple[str, Hashable], ClusterLayer] = {}
+_layers_lock = threading.Lock()
+
+
+def get_cluster_layer(model, loader: LayerLoader, variant: Hashable = None) -> ClusterLayer:
+    """Слой кластеров модели (создается при первом обращении)"""
+    key = (model.__tablename__, variant)
+    layer = _layers.get(key)
+    if layer is None:
+        with _layers_lock:
+            layer = _layers.setdefault(key, ClusterLayer(loader))
+    return layer
+
+
+def invalidate_cluster_layers(model):
+    """Сброс всех слоев модели (после изменения мест или цен)"""
+    for (table_name, _), layer in list(_layers.items()):
+        if table_name == model.__tablename__:
+            layer.invalidate()
+
+
+def reset_cluster_layers():
+    """Сброс всех слоев (например, после пересоздания таблиц)"""
+    for layer in list(_layers.values()):
+        layer.invalidate()
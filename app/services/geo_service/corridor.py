@@ -0,0 +1,168 @@
+"""
+Поиск мест вдоль маршрута (коридор шириной buffer_km вокруг полилинии)
+
+Для каждого кандидата считается расстояние до ближайшего отрезка маршрута
+и позиция вдоль маршрута (км от начала). Внутри отрезка используется
+локальная равнопромежуточная проекция: для коридоров в единицы-десятки км
+погрешность относительно большого круга пренебрежимо мала.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.services.geo_service.distance import EARTH_RADIUS_KM, PointArrays
+from app.services.geo_service.postgis import make_line
+from app.services.geo_service.search import ensure_geo_index, filter_ids, load_by_ids
+from app.services.geo_service.sql import bounding_box
+
+# Маршрут: последовательность точек (latitude, longitude)
+Route = Sequence[Tuple[float, float]]
+
+# Ограничение размера матрицы точки x отрезки, обрабатываемой за один шаг
+_CHUNK_CELLS = 1_000_000
+
+
+def _wrap_radians(delta: np.ndarray) -> np.ndarray:
+    """Разница долгот в диапазоне [-pi, pi) (маршруты через антимеридиан)"""
+    return (delta + np.pi) % (2 * np.pi) - np.pi
+
+
+class RouteGeometry:
+    """Отрезки маршрута в локальных проекциях и их накопленная длина"""
+
+    __slots__ = ("lat_rad", "lon_rad", "scale_x", "dx", "dy", "length2", "start_km", "length_km")
+
+    def __init__(self, route: Route):
+        coords = np.radians(np.asarray(route, dtype=np.float64).reshape(-1, 2))
+        if len(coords) == 1:
+            coords = np.vstack([coords, coords])
+        lat, lon = coords[:, 0], coords[:, 1]
+
+        self.lat_rad = lat[:-1]
+        self.lon_rad = lon[:-1]
+        self.scale_x = EARTH_RADIUS_KM * np.cos((lat[:-1] + lat[1:]) * 0.5)
+        self.dx = _wrap_radians(lon[1:] - lon[:-1]) * self.scale_x
+        self.dy = (lat[1:] - lat[:-1]) * EARTH_RADIUS_KM
+        self.length2 = self.dx * self.dx + self.dy * self.dy
+
+        lengths = np.sqrt(self.length2)
+        self.start_km = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+        self.length_km = float(lengths.sum())
+
+    def locate(self, points: PointArrays) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Проекция точек на маршрут
+        Возвращает (расстояние до маршрута в км, позиция вдоль маршрута в км)
+        """
+        offsets = np.empty(len(points))
+        positions = np.empty(len(points))
+        chunk = max(1, _CHUNK_CELLS // len(self.dx))
+        safe_length2 = np.where(self.length2 > 0, self.length2, 1.0)
+
+        for start in range(0, len(points), chunk):
+            stop = start + chunk
+            lat = points.lat_rad[start:stop, None]
+            lon = points.lon_rad[start:stop, None]
+            px = _wrap_radians(lon - self.lon_rad) * self.scale_x
+            py = (lat - self.lat_rad) * EARTH_RADIUS_KM
+
+            t = np.clip((px * self.dx + py * self.dy) / safe_length2, 0.0, 1.0)
+            t[:, self.length2 == 0] = 0.0
+            distances = np.hypot(px - t * self.dx, py - t * self.dy)
+
+            best = np.argmin(distances, axis=1)
+            rows = np.arange(len(best))
+            offsets[start:stop] = distances[rows, best]
+            positions[start:stop] = self.start_km[best] + t[rows, best] * np.sqrt(self.length2[best])
+
+        return offsets, positions
+
+
+def corridor_boxes(route: Route, buffer_km: float) -> List[Tuple[float, float, float, float]]:
+    """
+    Bounding box каждого отрезка, расширенный на buffer_km
+    Возвращает список (min_lat, max_lat, min_lon, max_lon)
+    """
+    if len(route) == 1:
+        route = [route[0], route[0]]
+    boxes = []
+    for (lat1, lon1), (lat2, lon2) in zip(route[:-1], route[1:]):
+        box1 = bounding_box(lat1, lon1, buffer_km)
+        box2 = bounding_box(lat2, lon2, buffer_km)
+        if abs(lon2 - lon1) > 180.0:
+            # Отрезок через антимеридиан — ограничиваем только широту
+            boxes.append((min(box1[0], box2[0]), max(box1[1], box2[1]), -180.0, 180.0))
+            continue
+        boxes.append((
+            min(box1[0], box2[0]),
+            max(box1[1], box2[1]),
+            min(box1[2], box2[2]),
+            max(box1[3], box2[3]),
+        ))
+    return boxes
+
+
+def corridor_points(points: PointArrays, route: Route, buffer_km: float) -> List[Tuple[int, float, float]]:
+    """
+    Точки набора внутри коридора маршрута
+    Возвращает список (id, расстояние до маршрута, позиция вдоль маршрута),
+    отсортированный по позиции вдоль маршрута
+    """
+    if not len(points):
+        return []
+    offsets, positions = RouteGeometry(route).locate(points)
+    inside = np.flatnonzero(offsets <= buffer_km)
+    inside = inside[np.lexsort((offsets[inside], positions[inside]))]
+    return list(zip(
+        points.ids[inside].tolist(),
+        offsets[inside].tolist(),
+        positions[inside].tolist(),
+    ))
+
+
+def corridor_search(
+    query: Query,
+    model,
+    route: Route,
+    buffer_km: float,
+    limit: int = 100,
+    options: Sequence = ()
+) -> List[Tuple[object, float, float]]:
+    """
+    Места вдоль маршрута с учетом наложенных на query фильтров
+    Возвращает список (место, расстояние до маршрута, позиция вдоль маршрута)
+    в порядке следования по маршруту
+    """
+    db = query.session
+    boxes = corridor_boxes(route, buffer_km)
+
+    if settings.GEO_SEARCH_BACKEND == "index":
+        candidates = ensure_geo_index(db, model).points_in_boxes(boxes)
+        hits = corridor_points(candidates, route, buffer_km)
+        if not hits:
+            return []
+        matched_ids = set(filter_ids(query, model, [hit[0] for hit in hits], needed=limit))
+        hits = [hit for hit in hits if hit[0] in matched_ids]
+    else:
+        candidate_query = query.with_entities(model.id, model.latitude, model.longitude)
+        if settings.GEO_SEARCH_BACKEND == "postgis":
+            candidate_query = candidate_query.filter(
+                func.ST_DWithin(model.location, make_line(route), buffer_km * 1000)
+            )
+        else:
+            candidate_query = candidate_query.filter(or_(*[
+                and_(
+                    model.latitude.between(min_lat, max_lat),
+                    model.longitude.between(min_lon, max_lon),
+                )
+                for min_lat, max_lat, min_lon, max_lon in boxes
+            ]))
+        hits = corridor_points(PointArrays.from_rows(candidate_query.distinct().all()), route, buffer_km)
+
+    hits = hits[:limit]
+    located = {place_id: (offset_km, route_km) for place_id, offset_km, route_km in hits}
+    places = load_by_ids(db, model, [hit[0] for hit in hits], options)
+    return [(place, *located[place.id]) for place in places]
@@ -0,0 +1,126 @@
+"""
+Расчет расстояний (формула гаверсинуса): скалярный и пакетный (NumPy) варианты
+"""
+from math import radians, cos, sin, asin, sqrt
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+# Длина одного градуса широты в км
+KM_PER_DEGREE = 111.32
+# Максимальное расстояние между точками на поверхности Земли (половина окружности)
+MAX_DISTANCE_KM = 20038.0
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние между двумя точками в км"""
+    lat1_rad = radians(lat1)
+    lat2_rad = radians(lat2)
+    delta_lat = radians(lat2 - lat1)
+    delta_lon = radians(lon2 - lon1)
+
+    a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
+    c = 2 * asin(min(1.0, sqrt(a)))
+
+    return EARTH_RADIUS_KM * c
+
+
+def _haversine_kernel(
+    latitude: float,
+    longitude: float,
+    lat_rad: np.ndarray,
+    lon_rad: np.ndarray,
+    cos_lat: np.ndarray
+) -> np.ndarray:
+    """Гаверсинус по массивам в радианах с готовым cos(широты)"""
+    lat0 = np.radians(latitude)
+    lon0 = np.radians(longitude)
+    sin_dlat = np.sin((lat_rad - lat0) * 0.5)
+    sin_dlon = np.sin((lon_rad - lon0) * 0.5)
+    a = sin_dlat * sin_dlat + np.cos(lat0) * cos_lat * sin_dlon * sin_dlon
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class PointArrays:
+    """
+    Предвычисленные массивы точек: id, широта/долгота в радианах и cos(широты).
+    Используются как кеш координат таблицы мест для пакетного расчета расстояний.
+    """
+
+    __slots__ = ("ids", "lat_rad", "lon_rad", "cos_lat")
+
+    def __init__(self, ids: Sequence[int], latitudes: Sequence[float], longitudes: Sequence[float]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lat_rad = np.radians(np.asarray(latitudes, dtype=np.float64))
+        self.lon_rad = np.radians(np.asarray(longitudes, dtype=np.float64))
+        self.cos_lat = np.cos(self.lat_rad)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, Optional[float], Optional[float]]]) -> "PointArrays":
+        """Создание из строк (id, latitude, longitude); строки без координат пропускаются"""
+        ids, latitudes, longitudes = [], [], []
+        for point_id, latitude, longitude in rows:
+            if latitude is None or longitude is None:
+                continue
+            ids.append(point_id)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+        return cls(ids, latitudes, longitudes)
+
+    @classmethod
+    def concat(cls, parts: Sequence["PointArrays"]) -> "PointArrays":
+        """Объединение нескольких наборов точек без пересчета тригонометрии"""
+        merged = cls.__new__(cls)
+        merged.ids = np.concatenate([p.ids for p in parts]) if parts else np.empty(0, dtype=np.int64)
+        for field in ("lat_rad", "lon_rad", "cos_lat"):
+            value = np.concatenate([getattr(p, field) for p in parts]) if parts else np.empty(0)
+            setattr(merged, field, value)
+        return merged
+
+    def distances_from(self, latitude: float, longitude: float) -> np.ndarray:
+        """Расстояния (км) от точки до всех точек набора"""
+        return _haversine_kernel(latitude, longitude, self.lat_rad, self.lon_rad, self.cos_lat)
+
+
+def haversine_many(
+    latitude: float,
+    longitude: float,
+    latitudes: Sequence[float],
+    longitudes: Sequence[float]
+) -> np.ndarray:
+    """Расстояния (км) от одной точки до массивов координат одним вызовом NumPy"""
+    lat_rad = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon_rad = np.radians(np.asarray(longitudes, dtype=np.float64))
+    return _haversine_kernel(latitude, longitude, lat_rad, lon_rad, np.cos(lat_rad))
+
+
+def nearest_points(
+    points: PointArrays,
+    latitude: float,
+    longitude: float,
+    limit: Optional[int] = None,
+    radius_km: Optional[float] = None
+) -> List[Tuple[int, float]]:
+    """
+    Ближайшие к точке элементы набора
+    Возвращает список (id, расстояние в км), отсортированный по расстоянию
+    """
+    if not len(points) or (limit is not None and limit <= 0):
+        return []
+
+    distances = points.distances_from(latitude, longitude)
+    positions = np.arange(len(points))
+    if radius_km is not None:
+        positions = positions[distances <= radius_km]
+
+    # Частичная сортировка: полная нужна только для первых limit элементов
+    if limit is not None and limit < len(positions):
+        nearest = np.argpartition(distances[positions], limit - 1)[:limit]
+        positions = positions[nearest]
+    positions = positions[np.argsort(distances[positions], kind="stable")]
+
+    return list(zip(points.ids[positions].tolist(), distances[positions].tolist()))
@@ -0,0 +1,185 @@
+"""
+In-memory пространственный индекс мест (сетка по широте/долготе)
+
+Каждая категория мест (заправки, рестораны, автомойки, СТО, электрозаправки)
+имеет свой индекс по (id, latitude, longitude). Радиусный поиск просматривает
+только ячейки сетки, пересекающие окружность, и возвращает id кандидатов
+с расстояниями — без загрузки ORM-объектов из БД.
+"""
+import threading
+import time
+from math import radians, cos, floor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.geo_service.distance import KM_PER_DEGREE, PointArrays, nearest_points
+
+
+class GeoGridIndex:
+    """Сеточный индекс точек: ячейка (i, j) -> множество id"""
+
+    def __init__(self, cell_size_deg: float = 0.05):
+        self.cell_size_deg = cell_size_deg
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._points: Dict[int, Tuple[float, float]] = {}
+        # Кеш радиан/cos(широты) по ячейкам, пересчитывается только для измененных ячеек
+        self._cell_arrays: Dict[Tuple[int, int], PointArrays] = {}
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            floor(latitude / self.cell_size_deg),
+            floor(longitude / self.cell_size_deg),
+        )
+
+    def needs_reload(self, ttl_seconds: int) -> bool:
+        """Индекс ещё не загружен или устарел (изменения из других процессов)"""
+        if self._loaded_at is None:
+            return True
+        return ttl_seconds > 0 and time.monotonic() - self._loaded_at > ttl_seconds
+
+    def load(self, rows: Iterable[Tuple[int, float, float]]):
+        """Полная перезагрузка индекса из строк (id, latitude, longitude)"""
+        cells: Dict[Tuple[int, int], Set[int]] = {}
+        points: Dict[int, Tuple[float, float]] = {}
+        for place_id, latitude, longitude in rows:
+            if latitude is None or longitude is None:
+                continue
+            points[place_id] = (latitude, longitude)
+            cells.setdefault(self._cell(latitude, longitude), set()).add(place_id)
+        with self._lock:
+            self._cells = cells
+            self._points = points
+            self._cell_arrays = {}
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        """Очистка индекса (следующий запрос перезагрузит его из БД)"""
+        with self._lock:
+            self._cells = {}
+            self._points = {}
+            self._cell_arrays = {}
+            self._loaded_at = None
+
+    def upsert(self, place_id: int, latitude: Optional[float], longitude: Optional[float]):
+        """Добавление или перемещение точки"""
+        with self._lock:
+            self._discard(place_id)
+            if latitude is None or longitude is None:
+                return
+            self._points[place_id] = (latitude, longitude)
+            cell = self._cell(latitude, longitude)
+            self._cells.setdefault(cell, set()).add(place_id)
+            self._cell_arrays.pop(cell, None)
+
+    def remove(self, place_id: int):
+        """Удаление точки из индекса"""
+        with self._lock:
+            self._discard(place_id)
+
+    def _discard(self, place_id: int):
+        point = self._points.pop(place_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        self._cell_arrays.pop(cell, None)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(place_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def _candidate_cells(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+        """Ячейки, пересекающие bounding box окружности"""
+        delta_lat = radius_km / KM_PER_DEGREE
+        cos_lat = cos(radians(min(abs(latitude) + delta_lat, 89.9)))
+        delta_lon = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+
+        return self._cells_in_box(
+            latitude - delta_lat, latitude + delta_lat,
+            longitude - delta_lon, longitude + delta_lon,
+        )
+
+    def _cells_in_box(
+        self,
+        min_lat: float,
+        max_lat: float,
+        min_lon: float,
+        max_lon: float
+    ) -> List[Tuple[int, int]]:
+        """Занятые ячейки, пересекающие прямоугольник"""
+        i_min, j_min = self._cell(min_lat, min_lon)
+        i_max, j_max = self._cell(max_lat, max_lon)
+
+        # Для очень больших областей дешевле пройти по занятым ячейкам
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > len(self._cells):
+            return [
+                cell for cell in self._cells
+                if i_min <= cell[0] <= i_max and j_min <= cell[1] <= j_max
+            ]
+        return [
+            (i, j)
+            for i in range(i_min, i_max + 1)
+            for j in range(j_min, j_max + 1)
+            if (i, j) in self._cells
+        ]
+
+    def _arrays_for(self, cell: Tuple[int, int]) -> PointArrays:
+        arrays = self._cell_arrays.get(cell)
+        if arrays is None:
+            ids = list(self._cells[cell])
+            arrays = PointArrays(
+                ids,
+                [self._points[place_id][0] for place_id in ids],
+                [self._points[place_id][1] for place_id in ids],
+            )
+            self._cell_arrays[cell] = arrays
+        return arrays
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        Поиск точек в радиусе
+        Возвращает список (id, расстояние в км), отсортированный по расстоянию
+        """
+        with self._lock:
+            parts = [
+                self._arrays_for(cell)
+                for cell in self._candidate_cells(latitude, longitude, radius_km)
+            ]
+        if not parts:
+            return []
+        return nearest_points(PointArrays.concat(parts), latitude, longitude, radius_km=radius_km)
+
+    def points_in_boxes(self, boxes: Iterable[Tuple[float, float, float, float]]) -> PointArrays:
+        """Точки из ячеек, пересекающих прямоугольники (min_lat, max_lat, min_lon, max_lon)"""
+        with self._lock:
+            cells = set()
+            for box in boxes:
+                cells.update(self._cells_in_box(*box))
+            parts = [self._arrays_for(cell) for cell in cells]
+        return PointArrays.concat(parts)
+
+
+# Индексы по таблицам мест: __tablename__ -> GeoGridIndex
+_indexes: Dict[str, GeoGridIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_geo_index(model) -> GeoGridIndex:
+    """Получение индекса для модели места (создается при первом обращении)"""
+    name = model.__tablename__
+    index = _indexes.get(name)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(name, GeoGridIndex(settings.GEO_INDEX_CELL_SIZE_DEG))
+    return index
+
+
+def reset_geo_indexes():
+    """Сброс всех индексов (например, после пересоздания таблиц)"""
+    for index in list(_indexes.values()):
+        index.clear()
@@ -0,0 +1,85 @@
+"""
+Геозапросы через PostGIS (GEO_SEARCH_BACKEND="postgis")
+
+ST_DWithin по geography использует GiST-индекс колонки location,
+оператор <-> дает KNN-сортировку по расстоянию через тот же индекс.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import cast, func
+from sqlalchemy.orm import Query
+
+from app.core.counting import CountMode, count_rows
+from app.models.geography import Geography, SRID
+
+
+def make_point(latitude: float, longitude: float):
+    """SQL-выражение точки geography"""
+    return cast(func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), SRID), Geography())
+
+
+def make_line(route: Sequence[Tuple[float, float]]):
+    """SQL-выражение линии geography по точкам маршрута (latitude, longitude)"""
+    points = [func.ST_MakePoint(longitude, latitude) for latitude, longitude in route]
+    # geography(geometry) вместо CAST: тип колонки location ограничен точками
+    return func.geography(func.ST_SetSRID(func.ST_MakeLine(*points), SRID))
+
+
+def postgis_nearest(
+    query: Query,
+    location_column,
+    latitude: float,
+    longitude: float,
+    limit: Optional[int] = None,
+    radius_km: Optional[float] = None
+) -> Query:
+    """Запрос, отсортированный по расстоянию (KNN), с опциональным радиусом и лимитом"""
+    point = make_point(latitude, longitude)
+    if radius_km is not None:
+        query = query.filter(func.ST_DWithin(location_column, point, radius_km * 1000))
+    query = query.order_by(location_column.op("<->")(point))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def postgis_distance_km(location_column, latitude: float, longitude: float):
+    """SQL-выражение расстояния (км) до точки"""
+    return func.ST_Distance(location_column, make_point(latitude, longitude)) / 1000
+
+
+def postgis_radius_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountMode = CountMode.EXACT,
+    cache_category: Optional[str] = None
+) -> Tuple[List, Optional[int]]:
+    """Поиск мест в радиусе: ST_DWithin + total (count_rows) + KNN-сортировка с OFFSET/LIMIT"""
+    point = make_point(latitude, longitude)
+    query = query.filter(func.ST_DWithin(model.location, point, radius_km * 1000))
+    total = count_rows(query, count, cache_category=cache_category)
+    places = (
+        query.order_by(model.location.op("<->")(point), model.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return places, total
+
+
+def postgis_nearest_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[object, float]]:
+    """k ближайших мест: KNN (<->) по GiST-индексу"""
+    query = query.add_columns(postgis_distance_km(model.location, latitude, longitude))
+    rows = postgis_nearest(query, model.location, latitude, longitude, limit=k).all()
+    return [(place, float(distance_km)) for place, distance_km in rows]
@@ -0,0 +1,203 @@
+"""
+Радиусный поиск мест
+
+Бэкенд выбирается настройкой GEO_SEARCH_BACKEND:
+- "index" — in-memory сеточный индекс (по умолчанию)
+- "sql" — bounding box и расстояние вычисляются в БД
+- "postgis" — ST_DWithin и KNN по geography-колонке location
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.core.counting import CountMode, count_rows
+from app.services.geo_service.distance import KM_PER_DEGREE, MAX_DISTANCE_KM
+from app.services.geo_service.clusters import invalidate_cluster_layers
+from app.services.geo_service.index import GeoGridIndex, get_geo_index
+from app.services.geo_service.sql import sql_radius_search, sql_nearest_search, within_radius
+from app.services.geo_service.postgis import postgis_radius_search, postgis_nearest_search
+
+
+def ensure_geo_index(db: Session, model) -> GeoGridIndex:
+    """Индекс модели, (пере)загруженный из БД при необходимости"""
+    index = get_geo_index(model)
+    if index.needs_reload(settings.GEO_INDEX_REFRESH_SECONDS):
+        rows = db.query(model.id, model.latitude, model.longitude).all()
+        index.load(rows)
+    return index
+
+
+def sync_place_location(place):
+    """Обновление места в индексе и слоях кластеров (после создания/изменения/модерации)"""
+    get_geo_index(type(place)).upsert(place.id, place.latitude, place.longitude)
+    invalidate_cluster_layers(type(place))
+
+
+def remove_place_location(model, place_id: int):
+    """Удаление места из индекса и слоев кластеров"""
+    get_geo_index(model).remove(place_id)
+    invalidate_cluster_layers(model)
+
+
+def load_by_ids(db: Session, model, ids: List[int], options: Sequence = ()) -> List:
+    """Загрузка объектов одним запросом с сохранением порядка ids (options - план загрузки связей)"""
+    if not ids:
+        return []
+    query = db.query(model).options(*options).filter(model.id.in_(ids))
+    objects_by_id = {obj.id: obj for obj in query.all()}
+    return [objects_by_id[obj_id] for obj_id in ids if obj_id in objects_by_id]
+
+
+def filter_ids(
+    query: Query,
+    model,
+    ordered_ids: Sequence[int],
+    needed: Optional[int] = None,
+    checked: Optional[Dict[int, bool]] = None
+) -> List[int]:
+    """
+    id из ordered_ids (в том же порядке), прошедшие фильтры query
+    Проверка идет порциями по GEO_FILTER_CHUNK_SIZE id, пока не наберется
+    needed совпадений (None - все). checked - результаты уже проверенных id,
+    переиспользуются между вызовами (например, при расширении радиуса)
+    """
+    checked = {} if checked is None else checked
+    chunk_size = max(settings.GEO_FILTER_CHUNK_SIZE, 1)
+    matched = []
+    for start in range(0, len(ordered_ids), chunk_size):
+        chunk = ordered_ids[start:start + chunk_size]
+        unchecked = [place_id for place_id in chunk if place_id not in checked]
+        if unchecked:
+            passed = {
+                row[0] for row in
+                query.with_entities(model.id).filter(model.id.in_(unchecked)).distinct().all()
+            }
+            checked.update((place_id, place_id in passed) for place_id in unchecked)
+        matched.extend(place_id for place_id in chunk if checked[place_id])
+        if needed is not None and len(matched) >= needed:
+            break
+    return matched
+
+
+def radius_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    skip: int = 0,
+    limit: int = 100,
+    options: Sequence = (),
+    count: CountMode = CountMode.EXACT,
+    cache_category: Optional[str] = None
+) -> Tuple[List, Optional[int]]:
+    """
+    Поиск мест в радиусе с учетом уже наложенных на query фильтров
+    Возвращает (страница мест по возрастанию расстояния, общее количество)
+    count/cache_category - режим подсчета total, как в count_rows
+    """
+    if settings.GEO_SEARCH_BACKEND == "postgis":
+        return postgis_radius_search(
+            query.options(*options), model, latitude, longitude, radius_km, skip=skip, limit=limit,
+            count=count, cache_category=cache_category
+        )
+    if settings.GEO_SEARCH_BACKEND == "sql":
+        return sql_radius_search(
+            query.options(*options), model, latitude, longitude, radius_km, skip=skip, limit=limit,
+            count=count, cache_category=cache_category
+        )
+    return index_radius_search(
+        query, model, latitude, longitude, radius_km, skip=skip, limit=limit, options=options,
+        count=count, cache_category=cache_category
+    )
+
+
+def index_radius_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    skip: int = 0,
+    limit: int = 100,
+    options: Sequence = (),
+    count: CountMode = CountMode.EXACT,
+    cache_category: Optional[str] = None
+) -> Tuple[List, Optional[int]]:
+    """
+    Радиусный поиск через in-memory индекс.
+
+    Кандидаты берутся из индекса по возрастанию расстояния, остальные
+    фильтры проверяются в БД порциями id, пока не наберется skip + limit
+    мест; ORM-объекты загружаются лишь для текущей страницы. total
+    считается в БД (bounding box + расстояние) через count_rows.
+    """
+    db = query.session
+    hits = ensure_geo_index(db, model).query_radius(latitude, longitude, radius_km)
+    total = None
+    if count != CountMode.NONE:
+        radius_query, _ = within_radius(query, model.latitude, model.longitude, latitude, longitude, radius_km)
+        total = count_rows(radius_query, count, cache_category=cache_category)
+    if not hits:
+        return [], total
+
+    matched_ids = filter_ids(query, model, [place_id for place_id, _ in hits], needed=skip + limit)
+    page_ids = matched_ids[skip:skip + limit]
+    if not page_ids:
+        return [], total
+
+    return load_by_ids(db, model, page_ids, options), total
+
+
+def nearest_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    k: int = 10,
+    options: Sequence = ()
+) -> List[Tuple[object, float]]:
+    """
+    k ближайших мест с учетом наложенных на query фильтров
+    Возвращает список (место, расстояние в км) по возрастанию расстояния
+    """
+    if settings.GEO_SEARCH_BACKEND == "postgis":
+        return postgis_nearest_search(query.options(*options), model, latitude, longitude, k)
+    if settings.GEO_SEARCH_BACKEND == "sql":
+        return sql_nearest_search(query.options(*options), model, latitude, longitude, k)
+    return index_nearest_search(query, model, latitude, longitude, k, options=options)
+
+
+def index_nearest_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    k: int = 10,
+    options: Sequence = ()
+) -> List[Tuple[object, float]]:
+    """
+    KNN через in-memory индекс: радиус поиска удваивается, пока внутри
+    не окажется k мест, прошедших фильтры. Все места ближе k-го
+    гарантированно лежат внутри текущего радиуса, поэтому порядок точный.
+    """
+    db = query.session
+    index = ensure_geo_index(db, model)
+    if k <= 0 or not len(index):
+        return []
+
+    radius_km = index.cell_size_deg * KM_PER_DEGREE
+    checked: Dict[int, bool] = {}
+    while True:
+        hits = index.query_radius(latitude, longitude, radius_km)
+        if hits:
+            distances = dict(hits)
+            # Результаты фильтров переиспользуются при следующем удвоении радиуса
+            matched_ids = filter_ids(query, model, [place_id for place_id, _ in hits], needed=k, checked=checked)
+            if len(matched_ids) >= k or len(hits) >= len(index) or radius_km >= MAX_DISTANCE_KM:
+                nearest_ids = matched_ids[:k]
+                return [(place, distances[place.id]) for place in load_by_ids(db, model, nearest_ids, options)]
+        elif radius_km >= MAX_DISTANCE_KM:
+            return []
+        radius_km *= 2
@@ -0,0 +1,87 @@
+"""
+Радиусный поиск средствами SQL: bounding box по индексу (latitude, longitude),
+точное отсечение по большому кругу, сортировка и пагинация в БД
+"""
+from math import radians, cos
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+from app.core.counting import CountMode, count_rows
+from app.services.geo_service.distance import EARTH_RADIUS_KM, KM_PER_DEGREE
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Прямоугольник, гарантированно содержащий окружность радиуса radius_km
+    Возвращает (min_lat, max_lat, min_lon, max_lon)
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    min_lat = max(latitude - delta_lat, -90.0)
+    max_lat = min(latitude + delta_lat, 90.0)
+
+    cos_lat = cos(radians(min(max(abs(min_lat), abs(max_lat)), 89.9)))
+    delta_lon = radius_km / (KM_PER_DEGREE * cos_lat)
+    if delta_lon >= 180.0 or longitude - delta_lon < -180.0 or longitude + delta_lon > 180.0:
+        # Окружность пересекает антимеридиан — ограничиваем только широту
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, longitude - delta_lon, longitude + delta_lon
+
+
+def distance_expression(lat_column, lon_column, latitude: float, longitude: float):
+    """SQL-выражение расстояния (км) по формуле гаверсинуса"""
+    half_dlat = func.radians(lat_column - latitude) / 2
+    half_dlon = func.radians(lon_column - longitude) / 2
+    a = (
+        func.power(func.sin(half_dlat), 2)
+        + cos(radians(latitude)) * func.cos(func.radians(lat_column)) * func.power(func.sin(half_dlon), 2)
+    )
+    # Как в haversine_distance: из-за округления a может чуть превысить 1, и asin упадет
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+def within_radius(query: Query, lat_column, lon_column, latitude: float, longitude: float, radius_km: float):
+    """
+    Добавляет к запросу фильтр по радиусу
+    Возвращает (query, distance_expression) для дальнейшей сортировки
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    distance = distance_expression(lat_column, lon_column, latitude, longitude)
+    query = query.filter(
+        lat_column.between(min_lat, max_lat),
+        lon_column.between(min_lon, max_lon),
+        distance <= radius_km,
+    )
+    return query, distance
+
+
+def sql_radius_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    skip: int = 0,
+    limit: int = 100,
+    count: CountMode = CountMode.EXACT,
+    cache_category: Optional[str] = None
+) -> Tuple[List, Optional[int]]:
+    """Поиск мест в радиусе: фильтр, total (count_rows), ORDER BY расстояние и OFFSET/LIMIT в БД"""
+    query, distance = within_radius(query, model.latitude, model.longitude, latitude, longitude, radius_km)
+    total = count_rows(query, count, cache_category=cache_category)
+    places = query.order_by(distance, model.id).offset(skip).limit(limit).all()
+    return places, total
+
+
+def sql_nearest_search(
+    query: Query,
+    model,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[object, float]]:
+    """k ближайших мест: ORDER BY расстояние LIMIT k в БД"""
+    distance = distance_expression(model.latitude, model.longitude, latitude, longitude)
+    rows = query.add_columns(distance).order_by(distance, model.id).limit(k).all()
+    return [(place, float(distance_km)) for place, distance_km in rows]
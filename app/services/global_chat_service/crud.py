@@ -1,7 +1,7 @@
 """
 CRUD операции для Global Chat Service
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Set, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func as sql_func, exists
 from datetime import datetime, timezone
@@ -13,6 +13,8 @@ from app.models.global_chat import (
     MessageType
 )
 from app.schemas.global_chat import GlobalChatMessageCreate
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
 
 
 def create_message(
@@ -53,16 +55,68 @@ def get_messages(
     db: Session,
     user_id: int,
     skip: int = 0,
-    limit: int = 100
-) -> Tuple[List[GlobalChatMessage], int]:
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[GlobalChatMessage], Optional[int]]:
     """
     Получение сообщений глобального чата для пользователя
+    cursor - keyset-курсор вместо skip, count - режим подсчета total (none - без COUNT, total = None)
     
     Исключает:
     - Удаленные сообщения (deleted_at IS NOT NULL)
     - Сообщения от заблокированных пользователей
     - Скрытые сообщения для этого пользователя
     """
+    query = _visible_messages(db, user_id)
+    total = count_rows(query, count)
+    messages = paginate_by_created(query, GlobalChatMessage, skip=skip, limit=limit, cursor=cursor).all()
+    
+    return messages, total
+
+
+def get_messages_since(
+    db: Session,
+    user_id: int,
+    since_id: int,
+    limit: int = 100
+) -> List[GlobalChatMessage]:
+    """
+    Сообщения с id > since_id по возрастанию id (догрузка пропущенного)
+    Те же исключения, что в get_messages, но без подсчета total
+    """
+    return _visible_messages(db, user_id).filter(
+        GlobalChatMessage.id > since_id
+    ).order_by(GlobalChatMessage.id.asc()).limit(limit).all()
+
+
+def get_latest_messages(db: Session, limit: int = 500) -> List[GlobalChatMessage]:
+    """Последние неудаленные сообщения по возрастанию id (заполнение буфера догрузки)"""
+    messages = db.query(GlobalChatMessage).filter(
+        GlobalChatMessage.deleted_at.is_(None)
+    ).order_by(GlobalChatMessage.id.desc()).limit(limit).all()
+    return messages[::-1]
+
+
+def get_replay_exclusions(db: Session, user_id: int, since_id: int) -> Tuple[Set[int], Set[int]]:
+    """
+    Заблокированные авторы и скрытые сообщения (id > since_id) пользователя
+    Для догрузки из буфера - те же исключения, что в _visible_messages
+    """
+    blocked_ids = {
+        blocked_id for (blocked_id,) in db.query(UserBlock.blocked_id).filter(UserBlock.blocker_id == user_id)
+    }
+    hidden_ids = {
+        message_id for (message_id,) in db.query(HiddenGlobalChatMessage.message_id).filter(
+            HiddenGlobalChatMessage.user_id == user_id,
+            HiddenGlobalChatMessage.message_id > since_id
+        )
+    }
+    return blocked_ids, hidden_ids
+
+
+def _visible_messages(db: Session, user_id: int):
+    """Неудаленные сообщения без заблокированных авторов и скрытых пользователем"""
     # Базовый запрос
     query = db.query(GlobalChatMessage).filter(
         GlobalChatMessage.deleted_at.is_(None)  # Не удаленные
@@ -87,11 +141,7 @@ def get_messages(
             )
         )
     )
-    
-    total = query.count()
-    messages = query.order_by(GlobalChatMessage.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return messages, total
+    return query
 
 
 def search_messages(
@@ -0,0 +1,93 @@
+"""
+Кольцевой буфер последних сообщений глобального чата
+
+Клиент, переподключившийся к /global-chat/ws с since_id (id последнего
+полученного сообщения), получает только пропущенные сообщения. Если все они
+есть в буфере, догрузка идет из памяти; если разрыв старше буфера -
+из БД (get_messages_since).
+
+Буфер пополняется теми же событиями шины, что и рассылка в сокеты, поэтому
+содержит сообщения всех воркеров. floor - id, начиная с которого (не
+включительно) в буфере есть все сообщения; при вытеснении старых
+сообщений floor растет. Если шина могла потерять события (переподключение
+к Redis, публикация только в своем воркере), буфер сбрасывает полноту
+(invalidate) и до следующего сообщения догрузка идет из БД.
+"""
+import threading
+from bisect import bisect_right, insort
+from typing import Dict, List, Optional
+
+
+class RecentMessages:
+    """Последние сообщения чата по возрастанию id"""
+
+    def __init__(self, max_size: int = 500):
+        self.max_size = max_size
+        self._ids: List[int] = []
+        self._messages: Dict[int, dict] = {}
+        self._floor: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def load(self, messages: List[dict], floor: int):
+        """Заполнение из БД: messages - все сообщения с id > floor"""
+        with self._lock:
+            self._messages = {message["id"]: message for message in messages}
+            self._ids = sorted(self._messages)
+            self._floor = floor
+            self._trim()
+
+    def add(self, message: dict):
+        """Новое сообщение (payload new_message)"""
+        message_id = message["id"]
+        with self._lock:
+            if self._floor is None:
+                # Буфер не загружен или сброшен: отвечаем только за сообщения после этого
+                self._floor = message_id - 1
+                self._drop_through(self._floor)
+            if message_id in self._messages:
+                return
+            if message_id <= self._floor:
+                # Запоздавшее сообщение ниже floor: разрывы, начатые до последнего
+                # известного сообщения, могли его пропустить - их догружает БД
+                self._floor = self._ids[-1] if self._ids else message_id
+                self._drop_through(self._floor)
+                return
+            insort(self._ids, message_id)
+            self._messages[message_id] = message
+            self._trim()
+
+    def discard(self, message_id: int):
+        """Удаленное сообщение не догружается"""
+        with self._lock:
+            if self._messages.pop(message_id, None) is not None:
+                self._ids.remove(message_id)
+
+    def invalidate(self):
+        """Полнота буфера не гарантирована (события шины могли быть потеряны)"""
+        with self._lock:
+            self._floor = None
+
+    def _drop_through(self, message_id: int):
+        """Удаление сообщений с id <= message_id (ниже floor они не нужны)"""
+        index = bisect_right(self._ids, message_id)
+        for dropped_id in self._ids[:index]:
+            del self._messages[dropped_id]
+        del self._ids[:index]
+
+    def _trim(self):
+        while len(self._ids) > self.max_size:
+            self._floor = self._ids.pop(0)
+            del self._messages[self._floor]
+
+    def since(self, since_id: int) -> Optional[List[dict]]:
+        """Сообщения с id > since_id; None - разрыв старше буфера (нужна БД)"""
+        with self._lock:
+            if self._floor is None or since_id < self._floor:
+                return None
+            return [self._messages[message_id] for message_id in self._ids[bisect_right(self._ids, since_id):]]
+
+    @property
+    def last_id(self) -> Optional[int]:
+        """id последнего известного сообщения (since_id для следующего переподключения)"""
+        with self._lock:
+            return self._ids[-1] if self._ids else self._floor
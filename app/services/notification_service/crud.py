@@ -8,6 +8,8 @@ from datetime import datetime, timezone
 
 from app.models.notification import Notification, NotificationReadStatus
 from app.schemas.notification import NotificationCreate, NotificationUpdate
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
 
 
 def create_notification(
@@ -39,10 +41,13 @@ def get_user_notifications(
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    unread_only: Optional[bool] = None
-) -> Tuple[List[Notification], int]:
+    unread_only: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[Notification], Optional[int]]:
     """
     Получение уведомлений пользователя
+    cursor - keyset-курсор вместо skip, count - режим подсчета total (none - без COUNT, total = None)
     
     Включает:
     - Персональные уведомления (user_id = user_id), которые не удалены
@@ -117,11 +122,11 @@ def get_user_notifications(
                 )
             )
     
-    # Получаем общее количество
-    total = query.count()
+    # Получаем общее количество (если нужно)
+    total = count_rows(query, count)
     
     # Применяем пагинацию и сортировку
-    notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    notifications = paginate_by_created(query, Notification, skip=skip, limit=limit, cursor=cursor).all()
     
     return notifications, total
 
@@ -1,11 +1,10 @@
 """
 CRUD операции для Restaurant Service
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from math import radians, cos, sin, asin, sqrt
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_
 
 from app.models.restaurant import (
     Restaurant,
@@ -27,24 +26,26 @@ from app.schemas.restaurant import (
     RestaurantReviewCreate,
     RestaurantReviewUpdate,
 )
+from app.core.response_cache import response_cache
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
+from app.services.search_service import text_search, sync_place_suggestions, remove_place_suggestions
+from app.services.geo_service import (
+    radius_search,
+    nearest_search,
+    approved_places_loader,
+    get_cluster_layer,
+    sync_place_location,
+    remove_place_location,
+)
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Вычисляет расстояние между двумя точками на Земле в километрах
-    используя формулу гаверсинуса
-    """
-    R = 6371  # Радиус Земли в километрах
-    
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-    
-    a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    
-    return R * c
+# План загрузки связей для списков: все коллекции, которые читает сериализация
+# ответа, подгружаются одним запросом на связь вместо ленивой загрузки по месту
+LIST_LOAD_PLAN = (
+    selectinload(Restaurant.menu_categories).selectinload(MenuCategory.items),
+    selectinload(Restaurant.photos),
+)
 
 
 # ==================== Restaurant CRUD ====================
@@ -92,6 +93,9 @@ def create_restaurant(
     
     db.commit()
     db.refresh(db_restaurant)
+    sync_place_location(db_restaurant)
+    sync_place_suggestions(db_restaurant)
+    response_cache.bump(Restaurant.__tablename__)
     return db_restaurant
 
 
@@ -104,8 +108,10 @@ def get_restaurants(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    filters: Optional[RestaurantFilter] = None
-) -> Tuple[List[Restaurant], int]:
+    filters: Optional[RestaurantFilter] = None,
+    load_plan: Sequence = LIST_LOAD_PLAN,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[Restaurant], Optional[int]]:
     """Получение списка ресторанов с фильтрацией"""
     query = db.query(Restaurant)
     
@@ -151,44 +157,62 @@ def get_restaurants(
     if filters and filters.has_wifi is not None:
         query = query.filter(Restaurant.has_wifi == filters.has_wifi)
     
-    # Поиск по названию или адресу
+    # Текстовый поиск по названию, адресу или описанию (с ранжированием по релевантности)
+    search_rank = None
     if filters and filters.search_query:
-        search_term = f"%{filters.search_query}%"
-        query = query.filter(
-            or_(
-                Restaurant.name.ilike(search_term),
-                Restaurant.address.ilike(search_term),
-                Restaurant.description.ilike(search_term)
-            )
-        )
+        query, search_rank = text_search(query, (Restaurant.name, Restaurant.address, Restaurant.description), filters.search_query)
     
     # Поиск по близости
     if filters and filters.latitude and filters.longitude and filters.radius_km:
-        all_restaurants = query.all()
-        filtered_restaurants = []
-        for restaurant in all_restaurants:
-            distance = haversine_distance(
-                filters.latitude,
-                filters.longitude,
-                restaurant.latitude,
-                restaurant.longitude
-            )
-            if distance <= filters.radius_km:
-                filtered_restaurants.append(restaurant)
-        
-        total = len(filtered_restaurants)
-        restaurants = filtered_restaurants[skip:skip + limit]
-        return restaurants, total
+        return radius_search(
+            query,
+            Restaurant,
+            filters.latitude,
+            filters.longitude,
+            filters.radius_km,
+            skip=skip,
+            limit=limit,
+            options=load_plan,
+            count=count,
+            cache_category=Restaurant.__tablename__
+        )
     
-    # Подсчет общего количества
-    total = query.count()
+    # Подсчет общего количества (estimate - кешируется до следующей записи в категорию)
+    total = count_rows(query, count, cache_category=Restaurant.__tablename__)
     
     # Применяем пагинацию
-    restaurants = query.order_by(Restaurant.rating.desc(), Restaurant.reviews_count.desc()).offset(skip).limit(limit).all()
+    order_by = [Restaurant.rating.desc(), Restaurant.reviews_count.desc()]
+    if search_rank is not None:
+        order_by.insert(0, search_rank.desc())
+    restaurants = query.options(*load_plan).order_by(*order_by).offset(skip).limit(limit).all()
     
     return restaurants, total
 
 
+def get_nearest_restaurants(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[Restaurant, float]]:
+    """Получение k ближайших одобренных ресторанов с расстояниями в км"""
+    query = db.query(Restaurant).filter(Restaurant.status == RestaurantStatus.APPROVED)
+    return nearest_search(query, Restaurant, latitude, longitude, k, options=LIST_LOAD_PLAN)
+
+
+def get_restaurant_clusters(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int
+) -> List[dict]:
+    """Кластеры одобренных ресторанов для viewport карты"""
+    layer = get_cluster_layer(Restaurant, approved_places_loader(Restaurant, RestaurantStatus.APPROVED))
+    return layer.clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+
+
 def update_restaurant(
     db: Session,
     restaurant_id: int,
@@ -209,6 +233,9 @@ def update_restaurant(
     
     db.commit()
     db.refresh(restaurant)
+    sync_place_location(restaurant)
+    sync_place_suggestions(restaurant)
+    response_cache.bump(Restaurant.__tablename__)
     return restaurant
 
 
@@ -220,6 +247,9 @@ def delete_restaurant(db: Session, restaurant_id: int) -> bool:
     
     db.delete(restaurant)
     db.commit()
+    remove_place_location(Restaurant, restaurant_id)
+    remove_place_suggestions(Restaurant, restaurant_id)
+    response_cache.bump(Restaurant.__tablename__)
     return True
 
 
@@ -234,6 +264,9 @@ def approve_restaurant(db: Session, restaurant_id: int) -> Optional[Restaurant]:
     
     db.commit()
     db.refresh(restaurant)
+    sync_place_location(restaurant)
+    sync_place_suggestions(restaurant)
+    response_cache.bump(Restaurant.__tablename__)
     return restaurant
 
 
@@ -247,6 +280,9 @@ def reject_restaurant(db: Session, restaurant_id: int) -> Optional[Restaurant]:
     
     db.commit()
     db.refresh(restaurant)
+    sync_place_location(restaurant)
+    sync_place_suggestions(restaurant)
+    response_cache.bump(Restaurant.__tablename__)
     return restaurant
 
 
@@ -278,6 +314,7 @@ def create_menu_category(
     
     db.commit()
     db.refresh(menu_category)
+    response_cache.bump(Restaurant.__tablename__)
     return menu_category
 
 
@@ -304,6 +341,7 @@ def update_menu_category(
     
     db.commit()
     db.refresh(category)
+    response_cache.bump(Restaurant.__tablename__)
     return category
 
 
@@ -315,6 +353,7 @@ def delete_menu_category(db: Session, category_id: int) -> bool:
     
     db.delete(category)
     db.commit()
+    response_cache.bump(Restaurant.__tablename__)
     return True
 
 
@@ -335,6 +374,7 @@ def create_menu_item(
     db.add(menu_item)
     db.commit()
     db.refresh(menu_item)
+    response_cache.bump(Restaurant.__tablename__)
     return menu_item
 
 
@@ -368,6 +408,7 @@ def update_menu_item(
     
     db.commit()
     db.refresh(menu_item)
+    response_cache.bump(Restaurant.__tablename__)
     return menu_item
 
 
@@ -379,6 +420,7 @@ def delete_menu_item(db: Session, item_id: int) -> bool:
     
     db.delete(menu_item)
     db.commit()
+    response_cache.bump(Restaurant.__tablename__)
     return True
 
 
@@ -412,6 +454,7 @@ def add_restaurant_photo(
     db.add(photo)
     db.commit()
     db.refresh(photo)
+    response_cache.bump(Restaurant.__tablename__)
     return photo
 
 
@@ -430,6 +473,7 @@ def delete_restaurant_photo(db: Session, photo_id: int) -> bool:
     
     db.delete(photo)
     db.commit()
+    response_cache.bump(Restaurant.__tablename__)
     return True
 
 
@@ -455,6 +499,7 @@ def set_main_photo(db: Session, restaurant_id: int, photo_id: int) -> Optional[R
     photo.is_main = True
     db.commit()
     db.refresh(photo)
+    response_cache.bump(Restaurant.__tablename__)
     return photo
 
 
@@ -504,12 +549,14 @@ def get_reviews_by_restaurant(
     db: Session,
     restaurant_id: int,
     skip: int = 0,
-    limit: int = 50
-) -> Tuple[List[RestaurantReview], int]:
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[RestaurantReview], Optional[int]]:
     """Получение отзывов по ресторану"""
     query = db.query(RestaurantReview).filter(RestaurantReview.restaurant_id == restaurant_id)
-    total = query.count()
-    reviews = query.order_by(RestaurantReview.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(query, count)
+    reviews = paginate_by_created(query, RestaurantReview, skip=skip, limit=limit, cursor=cursor).all()
     return reviews, total
 
 
@@ -579,6 +626,7 @@ def _recalculate_restaurant_rating(db: Session, restaurant_id: int):
         restaurant.rating = round(rating, 2)
         restaurant.reviews_count = count
         db.commit()
+        response_cache.bump(Restaurant.__tablename__)
 
 
 
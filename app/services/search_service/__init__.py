@@ -0,0 +1,34 @@
+"""
+Search Service: текстовый поиск мест с ранжированием единый поиск по категориям и подсказки по префиксу
+"""
+from app.services.search_service.text import (
+    normalize_search_query,
+    transliterate,
+    search_variants,
+    text_search,
+)
+from app.services.search_service.places import (
+    PLACE_CATEGORIES,
+    search_category,
+    search_places,
+)
+from app.services.search_service.suggest import (
+    SuggestIndex,
+    suggest_index,
+    sync_place_suggestions,
+    remove_place_suggestions,
+)
+
+__all__ = [
+    "normalize_search_query",
+    "transliterate",
+    "search_variants",
+    "text_search",
+    "PLACE_CATEGORIES",
+    "search_category",
+    "search_places",
+    "SuggestIndex",
+    "suggest_index",
+    "sync_place_suggestions",
+    "remove_place_suggestions",
+]
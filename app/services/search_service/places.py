@@ -0,0 +1,176 @@
+"""
+Единый поиск мест по всем категориям (эндпоинт /search)
+
+Каждая категория ищется отдельным легким запросом (только колонки карточки,
+без связей) в своей сессии; на PostgreSQL запросы категорий выполняются
+параллельно в пуле потоков (SEARCH_FANOUT_WORKERS). Результаты объединяются
+в один список по релевантности с поправкой на расстояние, каждая категория
+ограничена per_category результатами.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.models.car_wash import CarWash, CarWashStatus
+from app.models.electric_station import ElectricStation, ElectricStationStatus
+from app.models.gas_station import GasStation, StationStatus
+from app.models.restaurant import Restaurant, RestaurantStatus
+from app.models.service_station import ServiceStation, ServiceStationStatus
+from app.services.geo_service.distance import haversine_distance
+from app.services.geo_service.sql import distance_expression, within_radius
+from app.services.search_service.text import text_search
+
+# Категория -> (модель, статус одобренных мест, колонки текстового поиска)
+PLACE_CATEGORIES = {
+    GasStation.__tablename__: (
+        GasStation, StationStatus.APPROVED, (GasStation.name, GasStation.address),
+    ),
+    Restaurant.__tablename__: (
+        Restaurant, RestaurantStatus.APPROVED,
+        (Restaurant.name, Restaurant.address, Restaurant.description),
+    ),
+    ServiceStation.__tablename__: (
+        ServiceStation, ServiceStationStatus.APPROVED,
+        (ServiceStation.name, ServiceStation.address, ServiceStation.description),
+    ),
+    CarWash.__tablename__: (
+        CarWash, CarWashStatus.APPROVED, (CarWash.name, CarWash.address, CarWash.description),
+    ),
+    ElectricStation.__tablename__: (
+        ElectricStation, ElectricStationStatus.APPROVED,
+        (ElectricStation.name, ElectricStation.address, ElectricStation.description),
+    ),
+}
+
+# Расстояние, на котором релевантность уменьшается вдвое
+DISTANCE_HALF_WEIGHT_KM = 5.0
+# Максимальный ранг ILIKE-бэкенда (см. text._like_search)
+_LIKE_MAX_RANK = 3.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.SEARCH_FANOUT_WORKERS,
+                    thread_name_prefix="place-search",
+                )
+    return _executor
+
+
+def _relevance(rank) -> float:
+    """Ранг текстового бэкенда -> 0..1"""
+    if rank is None:
+        return 0.0
+    if settings.TEXT_SEARCH_BACKEND == "trigram":
+        return float(rank)
+    return float(rank) / _LIKE_MAX_RANK
+
+
+def search_category(
+    db: Session,
+    category: str,
+    search_query: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    limit: int = 5
+) -> List[dict]:
+    """Лучшие limit мест одной категории: релевантность, затем расстояние и рейтинг"""
+    model, approved_status, columns = PLACE_CATEGORIES[category]
+    query = db.query(
+        model.id, model.name, model.address, model.latitude, model.longitude,
+        model.rating, model.reviews_count,
+    ).filter(model.status == approved_status)
+    query, rank = text_search(query, columns, search_query)
+    if rank is None:
+        return []
+
+    has_location = latitude is not None and longitude is not None
+    order_by = [rank.desc()]
+    if has_location:
+        if radius_km is not None:
+            query, distance = within_radius(query, model.latitude, model.longitude, latitude, longitude, radius_km)
+        else:
+            distance = distance_expression(model.latitude, model.longitude, latitude, longitude)
+        order_by.append(distance)
+    order_by += [model.rating.desc(), model.id]
+
+    results = []
+    for row in query.add_columns(rank).order_by(*order_by).limit(limit).all():
+        place_id, name, address, place_lat, place_lon, rating, reviews_count, place_rank = row
+        distance_km = haversine_distance(latitude, longitude, place_lat, place_lon) if has_location else None
+        score = _relevance(place_rank)
+        if distance_km is not None:
+            score /= 1 + distance_km / DISTANCE_HALF_WEIGHT_KM
+        results.append({
+            "category": category,
+            "id": place_id,
+            "name": name,
+            "address": address,
+            "latitude": place_lat,
+            "longitude": place_lon,
+            "rating": rating or 0.0,
+            "reviews_count": reviews_count or 0,
+            "distance_km": distance_km,
+            "score": score,
+        })
+    return results
+
+
+def _search_category_in_session(session_factory: sessionmaker, category: str, *args) -> List[dict]:
+    db = session_factory()
+    try:
+        return search_category(db, category, *args)
+    finally:
+        db.close()
+
+
+def search_places(
+    db: Session,
+    search_query: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    categories: Optional[Sequence[str]] = None,
+    per_category: int = 5,
+    limit: int = 20
+) -> Dict[str, object]:
+    """
+    Поиск по всем (или выбранным) категориям одним вызовом
+    Возвращает {"results": [...], "categories": {категория: количество}}
+    """
+    categories = [category for category in (categories or PLACE_CATEGORIES) if category in PLACE_CATEGORIES]
+    args = (search_query, latitude, longitude, radius_km, per_category)
+
+    bind = db.get_bind()
+    # SQLite сериализует запросы на одном соединении - параллельность там бесполезна
+    if settings.SEARCH_FANOUT_WORKERS > 1 and len(categories) > 1 and bind.dialect.name != "sqlite":
+        session_factory = sessionmaker(bind=bind, autocommit=False, autoflush=False)
+        executor = _get_executor()
+        futures = [
+            executor.submit(_search_category_in_session, session_factory, category, *args)
+            for category in categories
+        ]
+        per_category_results = [future.result() for future in futures]
+    else:
+        per_category_results = [search_category(db, category, *args) for category in categories]
+
+    merged = [place for places in per_category_results for place in places]
+    merged.sort(key=lambda place: (
+        -place["score"],
+        place["distance_km"] if place["distance_km"] is not None else 0.0,
+        -place["rating"],
+    ))
+    return {
+        "results": merged[:limit],
+        "categories": {category: len(places) for category, places in zip(categories, per_category_results)},
+    }
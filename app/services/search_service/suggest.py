@@ -0,0 +1,216 @@
+"""
+Подсказки поиска по префиксу (эндпоинт /search/suggest)
+
+Индекс — отсортированный список ключей (нормализованный текст, начиная с
+каждого слова названия или адреса) одобренных мест всех категорий; поиск по
+префиксу — bisect. Индекс прогревается при старте приложения, обновляется
+точечно из CRUD (создание/изменение/модерация/удаление) и периодически
+перезагружается в фоновом потоке (изменения, сделанные другими воркерами).
+Запрос подсказок никогда не обращается к БД.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.search_service.places import PLACE_CATEGORIES
+from app.services.search_service.text import normalize_search_query, search_variants
+
+logger = logging.getLogger(__name__)
+
+# Приоритет совпадения: начало названия > слово названия > адрес
+_NAME_START, _NAME_WORD, _ADDRESS = 0, 1, 2
+# Сколько ключей просматривается на один вариант префикса
+_SCAN_LIMIT = 500
+
+# Ключ индекса: (текст, приоритет, категория, id места)
+IndexKey = Tuple[str, int, str, int]
+PlaceKey = Tuple[str, int]
+
+
+def _index_keys(category: str, place_id: int, name: Optional[str], address: Optional[str]) -> List[IndexKey]:
+    """Ключи места: текст с начала каждого слова названия и адреса"""
+    keys = []
+    for text, first_priority, word_priority in (
+        (name, _NAME_START, _NAME_WORD),
+        (address, _ADDRESS, _ADDRESS),
+    ):
+        normalized = normalize_search_query(text)
+        if not normalized:
+            continue
+        words = normalized.split(" ")
+        for position in range(len(words)):
+            priority = first_priority if position == 0 else word_priority
+            keys.append((" ".join(words[position:]), priority, category, place_id))
+    return keys
+
+
+class SuggestIndex:
+    """Префиксный индекс названий и адресов мест (отсортированный список + bisect)"""
+
+    def __init__(self):
+        self._keys: List[IndexKey] = []
+        self._place_keys: Dict[PlaceKey, List[IndexKey]] = {}
+        self._places: Dict[PlaceKey, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._warmed_at: Optional[float] = None
+        self._refreshing = False
+        # Точечные изменения, сделанные во время перезагрузки из БД: снимок
+        # warm() может их не содержать, load() применяет их поверх снимка
+        self._pending: Optional[Dict[PlaceKey, Optional[Tuple[List[IndexKey], str, str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def load(self, rows: Iterable[Tuple[str, int, str, str]]):
+        """Полная замена содержимого: rows = [(категория, id, название, адрес), ...]"""
+        keys, place_keys, places = [], {}, {}
+        for category, place_id, name, address in rows:
+            place = (category, place_id)
+            place_keys[place] = _index_keys(category, place_id, name, address)
+            places[place] = (name, address)
+            keys.extend(place_keys[place])
+        keys.sort()
+        with self._lock:
+            self._keys, self._place_keys, self._places = keys, place_keys, places
+            pending, self._pending = self._pending, None
+            for place, change in (pending or {}).items():
+                self._remove_locked(place)
+                if change is not None:
+                    self._insert_locked(place, *change)
+
+    def warm(self, session_factory: Callable[[], Session]):
+        """Загрузка одобренных мест всех категорий из БД (ошибка не прерывает старт приложения)"""
+        self._warmed_at = time.monotonic()
+        with self._lock:
+            self._pending = {}
+        db = session_factory()
+        try:
+            rows = []
+            for category, (model, approved_status, _) in PLACE_CATEGORIES.items():
+                places = db.query(model.id, model.name, model.address).filter(model.status == approved_status)
+                rows.extend((category, place_id, name, address) for place_id, name, address in places)
+            self.load(rows)
+            logger.info(f"Индекс подсказок загружен: {len(rows)} мест")
+        except Exception as exc:
+            logger.warning(f"Не удалось загрузить индекс подсказок: {exc}")
+        finally:
+            with self._lock:
+                self._pending = None
+            db.close()
+
+    def _refresh_if_stale(self):
+        """Фоновая перезагрузка раз в SUGGEST_INDEX_REFRESH_SECONDS; запрос подсказок ее не ждет"""
+        ttl = settings.SUGGEST_INDEX_REFRESH_SECONDS
+        if ttl <= 0 or self._warmed_at is None or self._refreshing:
+            return
+        if time.monotonic() - self._warmed_at <= ttl:
+            return
+        self._refreshing = True
+
+        def refresh():
+            from app.database import SessionLocal
+            try:
+                self.warm(SessionLocal)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name="suggest-index-refresh", daemon=True).start()
+
+    def upsert(self, category: str, place_id: int, name: Optional[str], address: Optional[str]):
+        """Добавление или обновление места"""
+        place = (category, place_id)
+        keys = _index_keys(category, place_id, name, address)
+        with self._lock:
+            self._remove_locked(place)
+            self._insert_locked(place, keys, name, address)
+            if self._pending is not None:
+                self._pending[place] = (keys, name, address)
+
+    def remove(self, category: str, place_id: int):
+        """Удаление места"""
+        place = (category, place_id)
+        with self._lock:
+            self._remove_locked(place)
+            if self._pending is not None:
+                self._pending[place] = None
+
+    def _insert_locked(self, place: PlaceKey, keys: List[IndexKey], name: Optional[str], address: Optional[str]):
+        for key in keys:
+            insort(self._keys, key)
+        self._place_keys[place] = keys
+        self._places[place] = (name, address)
+
+    def _remove_locked(self, place: PlaceKey):
+        for key in self._place_keys.pop(place, ()):
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+        self._places.pop(place, None)
+
+    def suggest(
+        self,
+        prefix: str,
+        limit: int = 10,
+        categories: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """Места, у которых слово названия или адреса начинается с prefix (с учетом транслитерации)"""
+        self._refresh_if_stale()
+        variants = search_variants(prefix)
+        if not variants:
+            return []
+
+        best: Dict[PlaceKey, Tuple[int, int]] = {}
+        with self._lock:
+            for variant in variants:
+                position = bisect_left(self._keys, (variant,))
+                end = min(position + _SCAN_LIMIT, len(self._keys))
+                while position < end and self._keys[position][0].startswith(variant):
+                    _, priority, category, place_id = self._keys[position]
+                    position += 1
+                    if categories and category not in categories:
+                        continue
+                    place = (category, place_id)
+                    rank = (priority, len(self._places[place][0] or ""))
+                    if place not in best or rank < best[place]:
+                        best[place] = rank
+            ranked = sorted(best, key=lambda place: (best[place], self._places[place][0] or ""))[:limit]
+            return [
+                {
+                    "category": category,
+                    "id": place_id,
+                    "name": self._places[(category, place_id)][0],
+                    "address": self._places[(category, place_id)][1],
+                }
+                for category, place_id in ranked
+            ]
+
+    def clear(self):
+        """Очистка без фоновой перезагрузки (например, после пересоздания таблиц)"""
+        with self._lock:
+            self._keys, self._place_keys, self._places = [], {}, {}
+            self._pending = None
+            self._warmed_at = None
+
+
+# Глобальный индекс подсказок
+suggest_index = SuggestIndex()
+
+
+def sync_place_suggestions(place):
+    """Обновление места в индексе подсказок (после создания/изменения/модерации)"""
+    category = type(place).__tablename__
+    _, approved_status, _ = PLACE_CATEGORIES[category]
+    if place.status == approved_status:
+        suggest_index.upsert(category, place.id, place.name, place.address)
+    else:
+        suggest_index.remove(category, place.id)
+
+
+def remove_place_suggestions(model, place_id: int):
+    """Удаление места из индекса подсказок"""
+    suggest_index.remove(model.__tablename__, place_id)
@@ -0,0 +1,121 @@
+"""
+Текстовый поиск мест по названию/адресу/описанию (параметр search_query)
+
+Бэкенд выбирается настройкой TEXT_SEARCH_BACKEND:
+- "like" — ILIKE по подстроке с переносимым ранжированием через CASE
+  (работает везде, включая SQLite-тесты)
+- "trigram" — PostgreSQL pg_trgm: GIN-индексы gin_trgm_ops, оператор <%
+  (word_similarity) для поиска с опечатками и ранжирование по похожести
+  (сначала запустить scripts/enable_trigram_search.py)
+
+Запрос дополнительно ищется в транслитерации (кириллица <-> латиница),
+чтобы "Toshkent" находил "Тошкент" и наоборот.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+# Кириллица -> латиница (узбекская латиница для общих букв)
+_CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya", "ў": "o'", "қ": "q",
+    "ғ": "g'", "ҳ": "h",
+}
+# Латиница -> кириллица: сначала диграфы
+_LATIN_TO_CYRILLIC = [
+    ("o'", "ў"), ("g'", "ғ"), ("sh", "ш"), ("ch", "ч"), ("yo", "ё"),
+    ("yu", "ю"), ("ya", "я"), ("ts", "ц"),
+] + [(latin, cyrillic) for cyrillic, latin in _CYRILLIC_TO_LATIN.items() if len(latin) == 1] + [
+    ("h", "ҳ"), ("c", "к"), ("w", "в"),
+]
+
+_CYRILLIC_RE = re.compile("[а-яёўқғҳ]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_search_query(search_query: Optional[str]) -> str:
+    """Нижний регистр, без лишних пробелов и одинаковые апострофы"""
+    if not search_query:
+        return ""
+    normalized = search_query.strip().lower().replace("ʻ", "'").replace("‘", "'").replace("’", "'")
+    return _SPACES_RE.sub(" ", normalized)
+
+
+def transliterate(term: str) -> str:
+    """Вариант строки в другой письменности (кириллица <-> латиница)"""
+    if _CYRILLIC_RE.search(term):
+        return "".join(_CYRILLIC_TO_LATIN.get(char, char) for char in term)
+    result, position = [], 0
+    while position < len(term):
+        for latin, cyrillic in _LATIN_TO_CYRILLIC:
+            if term.startswith(latin, position):
+                result.append(cyrillic)
+                position += len(latin)
+                break
+        else:
+            result.append(term[position])
+            position += 1
+    return "".join(result)
+
+
+def search_variants(search_query: Optional[str]) -> List[str]:
+    """Нормализованный запрос и его транслитерация (без дубликатов)"""
+    term = normalize_search_query(search_query)
+    if not term:
+        return []
+    variants = [term]
+    alternative = transliterate(term)
+    if alternative and alternative != term:
+        variants.append(alternative)
+    return variants
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like_search(columns: Sequence, variants: List[str]):
+    """ILIKE по подстроке; ранг: совпадение в начале первой колонки > в первой колонке > в остальных"""
+    escaped = [_escape_like(term) for term in variants]
+    primary, others = columns[0], columns[1:]
+    prefix_match = or_(*[primary.ilike(f"{term}%", escape="\\") for term in escaped])
+    primary_match = or_(*[primary.ilike(f"%{term}%", escape="\\") for term in escaped])
+    other_matches = [column.ilike(f"%{term}%", escape="\\") for term in escaped for column in others]
+
+    condition = or_(primary_match, *other_matches)
+    rank = case((prefix_match, 3), (primary_match, 2), else_=1)
+    return condition, rank
+
+
+def _trigram_search(columns: Sequence, variants: List[str]):
+    """pg_trgm: подстрока или word_similarity выше порога (оба условия используют GIN-индекс)"""
+    conditions, similarities = [], []
+    for term in variants:
+        pattern = f"%{_escape_like(term)}%"
+        for column in columns:
+            conditions.append(column.ilike(pattern, escape="\\"))
+            conditions.append(literal(term).op("<%")(column))
+            similarities.append(func.coalesce(func.word_similarity(term, column), 0))
+    return or_(*conditions), func.greatest(*similarities)
+
+
+def text_search(query: Query, columns: Sequence, search_query: Optional[str]) -> Tuple[Query, Optional[object]]:
+    """
+    Добавляет к запросу фильтр текстового поиска по колонкам (первая - основная, обычно name)
+    Возвращает (query, выражение релевантности для ORDER BY ... DESC) или (query, None) для пустого запроса
+    """
+    variants = search_variants(search_query)
+    if not variants:
+        return query, None
+    if settings.TEXT_SEARCH_BACKEND == "trigram":
+        condition, rank = _trigram_search(columns, variants)
+    else:
+        condition, rank = _like_search(columns, variants)
+    return query.filter(condition), rank
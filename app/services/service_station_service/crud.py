@@ -1,11 +1,10 @@
 """
 CRUD операции для Service Station Service
 """
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from math import radians, cos, sin, asin, sqrt
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_
 
 from app.models.service_station import (
     ServiceStation,
@@ -24,24 +23,26 @@ from app.schemas.service_station import (
     ServiceStationReviewCreate,
     ServiceStationReviewUpdate,
 )
+from app.core.response_cache import response_cache
+from app.core.pagination import paginate_by_created
+from app.core.counting import CountMode, count_rows
+from app.services.search_service import text_search, sync_place_suggestions, remove_place_suggestions
+from app.services.geo_service import (
+    radius_search,
+    nearest_search,
+    approved_places_loader,
+    get_cluster_layer,
+    sync_place_location,
+    remove_place_location,
+)
 
 
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Вычисляет расстояние между двумя точками на Земле в километрах
-    используя формулу гаверсинуса
-    """
-    R = 6371  # Радиус Земли в километрах
-    
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-    
-    a = sin(delta_lat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    
-    return R * c
+# План загрузки связей для списков: все коллекции, которые читает сериализация
+# ответа, подгружаются одним запросом на связь вместо ленивой загрузки по месту
+LIST_LOAD_PLAN = (
+    selectinload(ServiceStation.service_prices),
+    selectinload(ServiceStation.photos),
+)
 
 
 # ==================== Service Station CRUD ====================
@@ -81,6 +82,9 @@ def create_service_station(
     
     db.commit()
     db.refresh(db_station)
+    sync_place_location(db_station)
+    sync_place_suggestions(db_station)
+    response_cache.bump(ServiceStation.__tablename__)
     return db_station
 
 
@@ -93,8 +97,10 @@ def get_service_stations(
     db: Session,
     skip: int = 0,
     limit: int = 100,
-    filters: Optional[ServiceStationFilter] = None
-) -> Tuple[List[ServiceStation], int]:
+    filters: Optional[ServiceStationFilter] = None,
+    load_plan: Sequence = LIST_LOAD_PLAN,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[ServiceStation], Optional[int]]:
     """Получение списка СТО с фильтрацией"""
     query = db.query(ServiceStation)
     
@@ -149,44 +155,62 @@ def get_service_stations(
     if filters and filters.accepts_cards is not None:
         query = query.filter(ServiceStation.accepts_cards == filters.accepts_cards)
     
-    # Поиск по названию или адресу
+    # Текстовый поиск по названию, адресу или описанию (с ранжированием по релевантности)
+    search_rank = None
     if filters and filters.search_query:
-        search_term = f"%{filters.search_query}%"
-        query = query.filter(
-            or_(
-                ServiceStation.name.ilike(search_term),
-                ServiceStation.address.ilike(search_term),
-                ServiceStation.description.ilike(search_term)
-            )
-        )
+        query, search_rank = text_search(query, (ServiceStation.name, ServiceStation.address, ServiceStation.description), filters.search_query)
     
     # Поиск по близости
     if filters and filters.latitude and filters.longitude and filters.radius_km:
-        all_stations = query.all()
-        filtered_stations = []
-        for station in all_stations:
-            distance = haversine_distance(
-                filters.latitude,
-                filters.longitude,
-                station.latitude,
-                station.longitude
-            )
-            if distance <= filters.radius_km:
-                filtered_stations.append(station)
-        
-        total = len(filtered_stations)
-        stations = filtered_stations[skip:skip + limit]
-        return stations, total
+        return radius_search(
+            query,
+            ServiceStation,
+            filters.latitude,
+            filters.longitude,
+            filters.radius_km,
+            skip=skip,
+            limit=limit,
+            options=load_plan,
+            count=count,
+            cache_category=ServiceStation.__tablename__
+        )
     
-    # Подсчет общего количества
-    total = query.count()
+    # Подсчет общего количества (estimate - кешируется до следующей записи в категорию)
+    total = count_rows(query, count, cache_category=ServiceStation.__tablename__)
     
     # Применяем пагинацию
-    stations = query.order_by(ServiceStation.rating.desc(), ServiceStation.reviews_count.desc()).offset(skip).limit(limit).all()
+    order_by = [ServiceStation.rating.desc(), ServiceStation.reviews_count.desc()]
+    if search_rank is not None:
+        order_by.insert(0, search_rank.desc())
+    stations = query.options(*load_plan).order_by(*order_by).offset(skip).limit(limit).all()
     
     return stations, total
 
 
+def get_nearest_service_stations(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    k: int = 10
+) -> List[Tuple[ServiceStation, float]]:
+    """Получение k ближайших одобренных СТО с расстояниями в км"""
+    query = db.query(ServiceStation).filter(ServiceStation.status == ServiceStationStatus.APPROVED)
+    return nearest_search(query, ServiceStation, latitude, longitude, k, options=LIST_LOAD_PLAN)
+
+
+def get_service_station_clusters(
+    db: Session,
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    zoom: int
+) -> List[dict]:
+    """Кластеры одобренных СТО для viewport карты"""
+    layer = get_cluster_layer(ServiceStation, approved_places_loader(ServiceStation, ServiceStationStatus.APPROVED))
+    return layer.clusters(db, min_lat, min_lon, max_lat, max_lon, zoom)
+
+
 def update_service_station(
     db: Session,
     station_id: int,
@@ -203,6 +227,9 @@ def update_service_station(
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(ServiceStation.__tablename__)
     return station
 
 
@@ -214,6 +241,9 @@ def delete_service_station(db: Session, station_id: int) -> bool:
     
     db.delete(station)
     db.commit()
+    remove_place_location(ServiceStation, station_id)
+    remove_place_suggestions(ServiceStation, station_id)
+    response_cache.bump(ServiceStation.__tablename__)
     return True
 
 
@@ -228,6 +258,9 @@ def approve_service_station(db: Session, station_id: int) -> Optional[ServiceSta
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(ServiceStation.__tablename__)
     return station
 
 
@@ -241,6 +274,9 @@ def reject_service_station(db: Session, station_id: int) -> Optional[ServiceStat
     
     db.commit()
     db.refresh(station)
+    sync_place_location(station)
+    sync_place_suggestions(station)
+    response_cache.bump(ServiceStation.__tablename__)
     return station
 
 
@@ -266,6 +302,7 @@ def create_or_update_service_price(
     db.add(service_price)
     db.commit()
     db.refresh(service_price)
+    response_cache.bump(ServiceStation.__tablename__)
     return service_price
 
 
@@ -290,6 +327,7 @@ def update_service_price(
     
     db.commit()
     db.refresh(service_price)
+    response_cache.bump(ServiceStation.__tablename__)
     return service_price
 
 
@@ -325,6 +363,7 @@ def delete_service_price(db: Session, price_id: int) -> bool:
     
     db.delete(service_price)
     db.commit()
+    response_cache.bump(ServiceStation.__tablename__)
     return True
 
 
@@ -358,6 +397,7 @@ def add_service_station_photo(
     db.add(photo)
     db.commit()
     db.refresh(photo)
+    response_cache.bump(ServiceStation.__tablename__)
     return photo
 
 
@@ -376,6 +416,7 @@ def delete_service_station_photo(db: Session, photo_id: int) -> bool:
     
     db.delete(photo)
     db.commit()
+    response_cache.bump(ServiceStation.__tablename__)
     return True
 
 
@@ -401,6 +442,7 @@ def set_main_photo(db: Session, station_id: int, photo_id: int) -> Optional[Serv
     photo.is_main = True
     db.commit()
     db.refresh(photo)
+    response_cache.bump(ServiceStation.__tablename__)
     return photo
 
 
@@ -450,12 +492,14 @@ def get_reviews_by_station(
     db: Session,
     station_id: int,
     skip: int = 0,
-    limit: int = 50
-) -> Tuple[List[ServiceStationReview], int]:
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    count: CountMode = CountMode.EXACT
+) -> Tuple[List[ServiceStationReview], Optional[int]]:
     """Получение отзывов по СТО"""
     query = db.query(ServiceStationReview).filter(ServiceStationReview.service_station_id == station_id)
-    total = query.count()
-    reviews = query.order_by(ServiceStationReview.created_at.desc()).offset(skip).limit(limit).all()
+    total = count_rows(query, count)
+    reviews = paginate_by_created(query, ServiceStationReview, skip=skip, limit=limit, cursor=cursor).all()
     return reviews, total
 
 
@@ -525,6 +569,7 @@ def _recalculate_station_rating(db: Session, station_id: int):
         station.rating = round(rating, 2)
         station.reviews_count = count
         db.commit()
+        response_cache.bump(ServiceStation.__tablename__)
 
 
 
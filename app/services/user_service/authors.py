@@ -0,0 +1,79 @@
+"""
+Имена и аватары авторов сообщений
+
+Списки сообщений (глобальный чат, догрузка, поиск) получают профили всех
+авторов страницы одним запросом UserExtended.user_id IN (...) вместо
+запроса на каждое сообщение. Пары (name, avatar) кешируются в процессе на
+AUTHOR_CACHE_TTL_SECONDS; create/update_user_extended сбрасывают запись
+пользователя, в остальных воркерах изменение видно не позже чем через TTL.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user_extended import UserExtended
+
+Author = Tuple[Optional[str], Optional[str]]
+
+
+class AuthorCache:
+    """(name, avatar) по user_id с коротким TTL"""
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[int, Tuple[float, Author]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, user_ids: Iterable[int]) -> Dict[int, Author]:
+        """Авторы по user_id; отсутствующие в кеше загружаются одним IN-запросом"""
+        now = time.monotonic()
+        authors: Dict[int, Author] = {}
+        missing = set()
+        with self._lock:
+            for user_id in set(user_ids):
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[0] > now:
+                    authors[user_id] = entry[1]
+                else:
+                    missing.add(user_id)
+        if not missing:
+            return authors
+
+        loaded = {user_id: (None, None) for user_id in missing}
+        rows = db.query(UserExtended.user_id, UserExtended.name, UserExtended.avatar).filter(
+            UserExtended.user_id.in_(missing)
+        )
+        for user_id, name, avatar in rows:
+            loaded[user_id] = (name, avatar)
+        authors.update(loaded)
+
+        if self.ttl_seconds > 0:
+            expires_at = now + self.ttl_seconds
+            with self._lock:
+                if len(self._entries) + len(loaded) > self.max_entries:
+                    self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) + len(loaded) <= self.max_entries:
+                    self._entries.update((user_id, (expires_at, author)) for user_id, author in loaded.items())
+        return authors
+
+    def invalidate(self, user_id: int):
+        """Сброс после изменения профиля"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Глобальный кеш авторов
+author_cache = AuthorCache(ttl_seconds=settings.AUTHOR_CACHE_TTL_SECONDS)
+
+
+def resolve_authors(db: Session, user_ids: Iterable[int]) -> Dict[int, Author]:
+    """(name, avatar) авторов страницы сообщений"""
+    return author_cache.resolve(db, user_ids)
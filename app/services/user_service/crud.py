@@ -7,6 +7,7 @@ from sqlalchemy import and_
 
 from app.models.user_extended import UserExtended
 from app.schemas.user_extended import UserExtendedCreate, UserExtendedUpdate
+from app.services.user_service.authors import author_cache
 
 
 def get_user_extended_by_id(db: Session, user_id: int) -> Optional[UserExtended]:
@@ -25,6 +26,7 @@ def create_user_extended(db: Session, user_extended: UserExtendedCreate) -> User
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    author_cache.invalidate(db_user.user_id)
     return db_user
 
 
@@ -44,6 +46,7 @@ def update_user_extended(
     
     db.commit()
     db.refresh(user)
+    author_cache.invalidate(user_id)
     return user
 
 
@@ -0,0 +1,46 @@
+"""
+Включает PostGIS: расширение, geography-колонки location и GiST-индексы
+для мест и водителей. После запуска можно выставить GEO_SEARCH_BACKEND=postgis.
+Запуск: python scripts/enable_postgis.py
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+from app.database import engine
+from app.models.geography import location_expression
+
+# (таблица, колонка широты, колонка долготы, имя GiST-индекса)
+TABLES = [
+    ("gas_stations", "latitude", "longitude", "idx_gas_station_geog"),
+    ("restaurants", "latitude", "longitude", "idx_restaurant_geog"),
+    ("electric_stations", "latitude", "longitude", "idx_electric_station_geog"),
+    ("service_stations", "latitude", "longitude", "idx_service_station_geog"),
+    ("car_washes", "latitude", "longitude", "idx_car_wash_geog"),
+    ("drivers", "current_latitude", "current_longitude", "idx_driver_geog"),
+]
+
+
+def main():
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        for table, lat_column, lon_column, index_name in TABLES:
+            conn.execute(text(f"""
+                ALTER TABLE {table}
+                ADD COLUMN IF NOT EXISTS location geography(Point,4326)
+                GENERATED ALWAYS AS ({location_expression(lat_column, lon_column)}) STORED
+            """))
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS {index_name}
+                ON {table} USING GIST (location)
+            """))
+            print(f"OK: {table}.location")
+        conn.commit()
+    print("OK: PostGIS enabled. Set GEO_SEARCH_BACKEND=postgis.")
+
+
+if __name__ == "__main__":
+    main()
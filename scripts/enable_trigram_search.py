@@ -0,0 +1,41 @@
+"""
+Включает pg_trgm: расширение и GIN-индексы по названию/адресу/описанию мест.
+После запуска можно выставить TEXT_SEARCH_BACKEND=trigram.
+Запуск: python scripts/enable_trigram_search.py
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import text
+from app.database import engine
+from app.models.text_search import trigram_index_name
+
+# (таблица, префикс имени индекса, колонки)
+TABLES = [
+    ("gas_stations", "idx_gas_station", ("name", "address")),
+    ("restaurants", "idx_restaurant", ("name", "address", "description")),
+    ("electric_stations", "idx_electric_station", ("name", "address", "description")),
+    ("service_stations", "idx_service_station", ("name", "address", "description")),
+    ("car_washes", "idx_car_wash", ("name", "address", "description")),
+]
+
+
+def main():
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table, prefix, columns in TABLES:
+            for column in columns:
+                conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS {trigram_index_name(prefix, column)}
+                    ON {table} USING GIN ({column} gin_trgm_ops)
+                """))
+            print(f"OK: {table} ({', '.join(columns)})")
+        conn.commit()
+    print("OK: pg_trgm enabled. Set TEXT_SEARCH_BACKEND=trigram.")
+
+
+if __name__ == "__main__":
+    main()
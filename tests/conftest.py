@@ -3,19 +3,25 @@
 """
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db, get_read_db
 from app.main import app
 from app.core.security import create_access_token, get_password_hash
 from app.models.user import User
 from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.services.search_service import suggest_index
+from app.services.user_service.authors import author_cache
 
 
-# Тестовая база данных в памяти
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Тестовая база данных в памяти: shared cache, чтобы синхронная (get_db)
+# и асинхронная (get_async_db, aiosqlite) сессии видели одни и те же данные
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:pocho_test?mode=memory&cache=shared&uri=true"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///file:pocho_test?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -24,10 +30,30 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# База живет, пока открыто соединение StaticPool синхронного движка;
+# асинхронные соединения открываются на каждую сессию (event loop у TestClient свой)
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _read_uncommitted(dbapi_connection, connection_record):
+    """Чтение без блокировок таблиц shared cache (открытая транзакция теста не блокирует запрос)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA read_uncommitted = 1")
+    cursor.close()
+
 
 @pytest.fixture(scope="function")
 def db_session():
     """Создает новую сессию БД для каждого теста"""
+    # Кеш ответов, индекс подсказок и кеш авторов переживают пересоздание таблиц - сбрасываем их вместе с БД
+    response_cache.clear()
+    suggest_index.clear()
+    author_cache.clear()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -46,7 +72,13 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
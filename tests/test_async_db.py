@@ -0,0 +1,51 @@
+"""
+Тесты асинхронной сессии БД (get_async_db) и переведенных на нее эндпоинтов
+"""
+from app.database import async_database_url
+from app.models.gas_station import GasStation, StationStatus
+from app.models.notification import Notification
+
+
+class TestAsyncDatabaseUrl:
+    """Тесты выбора асинхронного драйвера"""
+
+    def test_driver_replaced(self):
+        """Синхронный драйвер заменяется на asyncpg/aiosqlite"""
+        assert async_database_url("postgresql://u:p@localhost:5432/db") == "postgresql+asyncpg://u:p@localhost:5432/db"
+        assert async_database_url("postgresql+psycopg2://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+        assert async_database_url("sqlite:///./pocho.db") == "sqlite+aiosqlite:///./pocho.db"
+
+
+class TestAsyncEndpoints:
+    """Эндпоинты на асинхронной сессии видят данные синхронной"""
+
+    def test_list_stations(self, client, db_session, user_token):
+        """Список заправок с главной фотографией через run_sync"""
+        db_session.add(GasStation(
+            name="Async", address="address", latitude=41.3, longitude=69.2, status=StationStatus.APPROVED,
+        ))
+        db_session.commit()
+
+        response = client.get("/api/v1/gas-stations/", headers={"Authorization": f"Bearer {user_token}"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["stations"][0]["name"] == "Async"
+
+    def test_notifications(self, client, db_session, test_user, user_token):
+        """Уведомления и счетчик непрочитанных"""
+        db_session.add(Notification(user_id=test_user.id, title="Title", message="Body"))
+        db_session.commit()
+
+        response = client.get("/api/v1/notifications", headers={"Authorization": f"Bearer {user_token}"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1 and data["unread_count"] == 1
+
+    def test_blocked_user_rejected(self, client, db_session, test_user, user_token):
+        """Асинхронная зависимость проверяет блокировку так же, как синхронная"""
+        test_user.is_blocked = True
+        db_session.commit()
+
+        response = client.get("/api/v1/notifications", headers={"Authorization": f"Bearer {user_token}"})
+        assert response.status_code == 403
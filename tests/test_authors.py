@@ -0,0 +1,108 @@
+"""
+Тесты пакетной загрузки авторов сообщений
+"""
+from sqlalchemy import event
+
+from app.models.global_chat import GlobalChatMessage
+from app.models.user import User
+from app.schemas.user_extended import UserExtendedCreate, UserExtendedUpdate
+from app.services.user_service.authors import AuthorCache
+from app.services.user_service.crud import create_user_extended, update_user_extended
+from tests.conftest import async_engine, engine
+
+
+class StatementCounter:
+    """Подсчет SQL-выражений к users_extended на синхронном и асинхронном движках"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if "FROM users_extended" in statement:
+            self.count += 1
+
+    def __enter__(self):
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", self)
+
+
+def create_authors(db_session, count):
+    users = []
+    for i in range(count):
+        user = User(phone_number=f"+99891000000{i}", fullname=f"Автор {i}", is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        create_user_extended(db_session, UserExtendedCreate(
+            user_id=user.id, phone=user.phone_number, name=f"Автор {i}", avatar=f"/a/{i}.png"
+        ))
+        users.append(user)
+    return users
+
+
+class TestAuthorCache:
+    """Тесты кеша (name, avatar)"""
+
+    def test_resolve_batches_and_caches(self, db_session):
+        """Все авторы - одним запросом, повторно - из кеша; нет профиля - (None, None)"""
+        users = create_authors(db_session, 3)
+        cache = AuthorCache(ttl_seconds=60)
+        ids = [user.id for user in users] + [999999]
+
+        with StatementCounter() as counter:
+            authors = cache.resolve(db_session, ids + ids)
+            assert cache.resolve(db_session, ids) == authors
+        assert counter.count == 1
+        assert authors[users[1].id] == ("Автор 1", "/a/1.png")
+        assert authors[999999] == (None, None)
+
+    def test_invalidated_by_profile_update(self, db_session, client, test_user, user_token):
+        """Смена имени в профиле сразу видна в ответах чата"""
+        create_user_extended(db_session, UserExtendedCreate(
+            user_id=test_user.id, phone=test_user.phone_number, name="Старое имя"
+        ))
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.post("/api/v1/global-chat/messages", json={"message": "Привет"}, headers=headers)
+        assert response.json()["user_name"] == "Старое имя"
+
+        client.patch("/api/v1/profile/name", json={"name": "Новое имя"}, headers=headers)
+        messages = client.get("/api/v1/global-chat/messages", headers=headers).json()["messages"]
+        assert messages[0]["user_name"] == "Новое имя"
+
+    def test_crud_update_invalidates(self, db_session):
+        """update_user_extended сбрасывает запись автора"""
+        from app.services.user_service.authors import author_cache
+
+        user = create_authors(db_session, 1)[0]
+        assert author_cache.resolve(db_session, [user.id])[user.id][0] == "Автор 0"
+        update_user_extended(db_session, user.id, UserExtendedUpdate(name="Переименован"))
+        assert author_cache.resolve(db_session, [user.id])[user.id][0] == "Переименован"
+
+
+class TestChatAuthors:
+    """Списки сообщений чата без запроса профиля на каждое сообщение"""
+
+    def test_message_list_single_author_query(self, db_session, client, user_token):
+        """Страница из сообщений трех авторов - один запрос к users_extended"""
+        users = create_authors(db_session, 3)
+        db_session.add_all([
+            GlobalChatMessage(user_id=users[i % 3].id, message=f"Сообщение {i}") for i in range(9)
+        ])
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        with StatementCounter() as counter:
+            response = client.get("/api/v1/global-chat/messages?count=none", headers=headers)
+        assert response.status_code == 200
+        assert counter.count == 1
+        names = {message["user_name"] for message in response.json()["messages"]}
+        assert names == {"Автор 0", "Автор 1", "Автор 2"}
+
+        with StatementCounter() as counter:
+            response = client.get("/api/v1/global-chat/messages/search?query=Сообщение", headers=headers)
+        assert response.json()["total"] == 9
+        assert counter.count == 0
@@ -0,0 +1,165 @@
+"""
+Тесты догрузки сообщений глобального чата после разрыва
+"""
+import asyncio
+
+from app.api.v1.global_chat import GlobalChatConnectionManager
+from app.core.presence import Presence
+from app.core.security import create_access_token
+from app.core.ws_bus import LocalBus
+from app.models.global_chat import GlobalChatMessage
+from app.services.global_chat_service.crud import block_user, hide_message_for_user
+from app.services.global_chat_service.recent import RecentMessages
+from tests.conftest import TestingSessionLocal
+
+
+def add_messages(db_session, user, count):
+    messages = [GlobalChatMessage(user_id=user.id, message=f"Сообщение {i}") for i in range(count)]
+    db_session.add_all(messages)
+    db_session.commit()
+    return [message.id for message in messages]
+
+
+class FakeConnection:
+    """Соединение, запоминающее поставленные в очередь кадры"""
+
+    def __init__(self):
+        self.frames = []
+
+    def send_json(self, data):
+        self.frames.append(data)
+        return True
+
+
+class TestRecentMessages:
+    """Тесты кольцевого буфера"""
+
+    def test_since_and_eviction(self):
+        """Догрузка из буфера, пока разрыв не старше вытесненных сообщений"""
+        recent = RecentMessages(max_size=3)
+        assert recent.since(0) is None
+
+        recent.load([{"id": 1}, {"id": 2}], floor=0)
+        for message_id in (4, 3, 5):
+            recent.add({"id": message_id})
+
+        # 1 и 2 вытеснены: догрузка после 1 уже требует БД
+        assert recent.since(1) is None
+        assert [message["id"] for message in recent.since(2)] == [3, 4, 5]
+        assert recent.since(5) == []
+        assert recent.last_id == 5
+
+        recent.discard(4)
+        assert [message["id"] for message in recent.since(2)] == [3, 5]
+
+    def test_unloaded_buffer_starts_at_first_message(self):
+        """Без загрузки из БД буфер отвечает только за сообщения после первого увиденного"""
+        recent = RecentMessages()
+        recent.add({"id": 10})
+        assert recent.since(8) is None
+        assert [message["id"] for message in recent.since(9)] == [10]
+
+    def test_invalidate_until_next_message(self):
+        """После потери событий шины разрыв до следующего сообщения догружается из БД"""
+        recent = RecentMessages()
+        recent.load([{"id": 1}, {"id": 2}], floor=0)
+        recent.invalidate()
+        assert recent.since(2) is None
+        assert recent.last_id == 2
+
+        recent.add({"id": 5})
+        assert recent.since(3) is None
+        assert [message["id"] for message in recent.since(4)] == [5]
+
+    def test_late_message_below_floor(self):
+        """Запоздавшее сообщение ниже floor поднимает floor до последнего известного"""
+        recent = RecentMessages()
+        recent.add({"id": 10})
+        recent.add({"id": 11})
+        recent.add({"id": 9})
+        assert recent.since(10) is None
+        assert recent.since(11) == []
+
+
+class TestSyncEndpoint:
+    """Тесты GET /global-chat/messages/sync"""
+
+    def test_messages_after_since_id(self, client, db_session, test_user, user_token):
+        """Только сообщения после since_id, по возрастанию, с has_more по limit"""
+        ids = add_messages(db_session, test_user, 5)
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        response = client.get(f"/api/v1/global-chat/messages/sync?since_id={ids[1]}&limit=2", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [message["id"] for message in data["messages"]] == ids[2:4]
+        assert data["last_id"] == ids[3]
+        assert data["has_more"] is True
+
+        data = client.get(f"/api/v1/global-chat/messages/sync?since_id={data['last_id']}", headers=headers).json()
+        assert [message["id"] for message in data["messages"]] == ids[4:]
+        assert data["has_more"] is False
+
+
+class TestWebSocketResume:
+    """Тесты догрузки при подключении к /global-chat/ws с since_id"""
+
+    def test_resume_from_buffer(self, client, test_user, admin_token):
+        """Пропущенные сообщения приходят одним кадром sync"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        first = client.post("/api/v1/global-chat/messages", json={"message": "раз"}, headers=headers).json()
+        second = client.post("/api/v1/global-chat/messages", json={"message": "два"}, headers=headers).json()
+
+        token = create_access_token(data={"sub": f"{test_user.phone_number}:{test_user.id}"})
+        with client.websocket_connect(f"/api/v1/global-chat/ws?token={token}&since_id={first['id']}") as websocket:
+            welcome = websocket.receive_json()
+            assert welcome["last_id"] == second["id"]
+            sync = websocket.receive_json()
+
+        assert sync["type"] == "sync"
+        assert [message["message"] for message in sync["messages"]] == ["два"]
+        assert sync["last_id"] == second["id"]
+        assert sync["has_more"] is False
+
+    def test_bus_gap_falls_back_to_db(self, db_session, test_user):
+        """Потеря событий шины: догрузка из БД, даже если буфер выглядит полным"""
+        bus = LocalBus()
+        manager = GlobalChatConnectionManager(bus=bus, presence=Presence())
+        manager.warm(TestingSessionLocal)
+        ids = add_messages(db_session, test_user, 2)
+        bus._notify_gap()
+        connection = FakeConnection()
+
+        asyncio.run(manager.replay(connection, test_user.id, 0, session_factory=TestingSessionLocal))
+
+        assert [message["id"] for message in connection.frames[0]["messages"]] == ids
+
+    def test_resume_falls_back_to_db(self, db_session, test_user):
+        """Разрыв старше буфера догружается из БД"""
+        ids = add_messages(db_session, test_user, 3)
+        manager = GlobalChatConnectionManager(bus=LocalBus(), presence=Presence())
+        connection = FakeConnection()
+
+        asyncio.run(manager.replay(connection, test_user.id, ids[0], session_factory=TestingSessionLocal))
+
+        frame = connection.frames[0]
+        assert frame["type"] == "sync"
+        assert [message["id"] for message in frame["messages"]] == ids[1:]
+        assert frame["messages"][0]["message"] == "Сообщение 1"
+
+    def test_buffer_replay_skips_blocked_and_hidden(self, db_session, test_user, test_admin):
+        """Из буфера не догружаются сообщения заблокированных авторов и скрытые"""
+        own_ids = add_messages(db_session, test_user, 2)
+        add_messages(db_session, test_admin, 1)
+        block_user(db_session, test_user.id, test_admin.id)
+        hide_message_for_user(db_session, own_ids[1], test_user.id)
+
+        manager = GlobalChatConnectionManager(bus=LocalBus(), presence=Presence())
+        manager.warm(TestingSessionLocal)
+        assert manager.recent.since(0) is not None
+        connection = FakeConnection()
+
+        asyncio.run(manager.replay(connection, test_user.id, 0, session_factory=TestingSessionLocal))
+
+        frame = connection.frames[0]
+        assert [message["id"] for message in frame["messages"]] == own_ids[:1]
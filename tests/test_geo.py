@@ -0,0 +1,396 @@
+"""
+Тесты для геопоиска мест
+"""
+import pytest
+from sqlalchemy import literal, select
+
+from app.core.config import settings
+from app.core.counting import CountMode
+from app.models.gas_station import GasStation, StationStatus, FuelType
+from app.schemas.gas_station import GasStationFilter, GasStationUpdate, FuelPriceCreate
+from app.services.gas_station_service.crud import (
+    get_gas_stations,
+    get_nearest_gas_stations,
+    get_gas_station_clusters,
+    get_gas_stations_along_route,
+    create_or_update_fuel_price,
+    update_gas_station,
+    delete_gas_station,
+)
+from app.services.geo_service import (
+    GeoGridIndex,
+    PointArrays,
+    haversine_distance,
+    haversine_many,
+    nearest_points,
+    reset_geo_indexes,
+    reset_cluster_layers,
+    bounding_box,
+    corridor_points,
+)
+from app.services.geo_service.search import filter_ids
+from app.services.geo_service.sql import distance_expression
+
+# Центр Ташкента
+TASHKENT = (41.3111, 69.2797)
+
+
+@pytest.fixture(autouse=True)
+def clean_geo_indexes():
+    """Индексы глобальные, а БД пересоздается для каждого теста"""
+    reset_geo_indexes()
+    reset_cluster_layers()
+    yield
+    reset_geo_indexes()
+    reset_cluster_layers()
+
+
+def make_station(db, name, latitude, longitude, status=StationStatus.APPROVED):
+    station = GasStation(
+        name=name,
+        address=f"{name} address",
+        latitude=latitude,
+        longitude=longitude,
+        status=status,
+    )
+    db.add(station)
+    db.commit()
+    db.refresh(station)
+    return station
+
+
+class TestDistanceKernel:
+    """Тесты пакетного расчета расстояний"""
+
+    def test_haversine_many_matches_scalar(self):
+        """Пакетный расчет совпадает со скалярным"""
+        latitudes = [41.3111, 39.6542, 40.1000, -33.8688]
+        longitudes = [69.2797, 66.9597, 71.0000, 151.2093]
+        distances = haversine_many(*TASHKENT, latitudes, longitudes)
+        for distance, lat, lon in zip(distances, latitudes, longitudes):
+            assert distance == pytest.approx(haversine_distance(*TASHKENT, lat, lon))
+
+    def test_nearest_points_limit_and_radius(self):
+        """Ближайшие точки отсортированы, ограничены радиусом и лимитом"""
+        points = PointArrays.from_rows([
+            (10, 41.4000, 69.2797),
+            (11, 41.3120, 69.2797),
+            (12, 39.6542, 66.9597),
+            (13, None, None),
+            (14, 41.3300, 69.2797),
+        ])
+        assert len(points) == 4
+        assert [i for i, _ in nearest_points(points, *TASHKENT, limit=2)] == [11, 14]
+        assert [i for i, _ in nearest_points(points, *TASHKENT, radius_km=15)] == [11, 14, 10]
+        assert nearest_points(points, *TASHKENT, limit=0) == []
+
+
+class TestGeoGridIndex:
+    """Тесты сеточного индекса"""
+
+    def test_query_radius_sorted_by_distance(self):
+        """Точки в радиусе возвращаются по возрастанию расстояния"""
+        index = GeoGridIndex(cell_size_deg=0.05)
+        index.load([
+            (1, 41.3111, 69.2797),
+            (2, 41.3300, 69.2797),
+            (3, 41.4000, 69.2797),
+            (4, 40.1000, 71.0000),
+        ])
+        hits = index.query_radius(*TASHKENT, radius_km=15)
+        assert [place_id for place_id, _ in hits] == [1, 2, 3]
+        assert hits[0][1] == pytest.approx(0.0)
+
+    def test_upsert_moves_point(self):
+        """Повторный upsert перемещает точку между ячейками"""
+        index = GeoGridIndex(cell_size_deg=0.05)
+        index.upsert(1, *TASHKENT)
+        index.upsert(1, 40.1000, 71.0000)
+        assert index.query_radius(*TASHKENT, radius_km=5) == []
+        assert len(index) == 1
+
+    def test_remove(self):
+        """Удаленная точка не находится"""
+        index = GeoGridIndex()
+        index.upsert(1, *TASHKENT)
+        index.remove(1)
+        assert index.query_radius(*TASHKENT, radius_km=5) == []
+
+
+class TestFilterIds:
+    """Тесты проверки кандидатов индекса порциями"""
+
+    def test_stops_when_enough_and_reuses_checked(self, db_session, monkeypatch):
+        """Проверка останавливается на needed совпадениях, проверенные id не запрашиваются снова"""
+        monkeypatch.setattr(settings, "GEO_FILTER_CHUNK_SIZE", 2)
+        ids = [make_station(db_session, f"S{i}", *TASHKENT).id for i in range(5)]
+        query = db_session.query(GasStation).filter(GasStation.id != ids[0])
+        checked = {}
+
+        assert filter_ids(query, GasStation, ids, needed=2, checked=checked) == ids[1:4]
+        assert sorted(checked) == ids[:4]
+        assert filter_ids(query, GasStation, ids[::-1], checked=checked) == ids[:0:-1]
+        assert len(checked) == 5
+
+
+class TestBoundingBox:
+    """Тесты bounding box для SQL-фильтра"""
+
+    def test_box_contains_circle(self):
+        """Точки на границе радиуса попадают в прямоугольник"""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(*TASHKENT, radius_km=10)
+        assert haversine_distance(*TASHKENT, min_lat, TASHKENT[1]) == pytest.approx(10, rel=1e-2)
+        assert haversine_distance(*TASHKENT, TASHKENT[0], max_lon) >= 10
+
+    def test_antimeridian(self):
+        """У антимеридиана ограничивается только широта"""
+        assert bounding_box(0.0, 179.99, radius_km=50)[2:] == (-180.0, 180.0)
+
+    def test_sql_distance_matches_python(self, db_session):
+        """SQL-гаверсинус совпадает с haversine_distance, в т.ч. для антиподов"""
+        for latitude, longitude in [TASHKENT, (-TASHKENT[0], TASHKENT[1] - 180.0)]:
+            expression = distance_expression(literal(latitude), literal(longitude), *TASHKENT)
+            distance = db_session.execute(select(expression)).scalar()
+            assert distance == pytest.approx(haversine_distance(*TASHKENT, latitude, longitude), abs=1e-6)
+
+
+class TestCorridorKernel:
+    """Тесты проекции точек на маршрут"""
+
+    def test_offset_and_position_along_route(self):
+        """Расстояние до маршрута и позиция вдоль него на ломаной"""
+        route = [(41.0, 69.0), (41.0, 70.0), (42.0, 70.0)]
+        points = PointArrays.from_rows([
+            (1, 41.01, 69.5),   # у первого отрезка, ~1.1 км
+            (2, 41.5, 70.01),   # у второго отрезка
+            (3, 41.2, 69.5),    # ~22 км от маршрута
+            (4, 40.995, 68.99),  # рядом с началом, до первой точки
+        ])
+        hits = corridor_points(points, route, buffer_km=5)
+
+        assert [place_id for place_id, _, _ in hits] == [4, 1, 2]
+        first_leg = haversine_distance(41.0, 69.0, 41.0, 70.0)
+        assert hits[1][1] == pytest.approx(1.11, abs=0.02)
+        assert hits[1][2] == pytest.approx(first_leg / 2, rel=1e-2)
+        assert hits[2][2] == pytest.approx(first_leg + 55.66, rel=1e-2)
+        assert hits[0][2] == pytest.approx(0.0)
+
+
+@pytest.fixture(params=["index", "sql"])
+def geo_backend(request, monkeypatch):
+    """Радиусный поиск проверяется на обоих бэкендах"""
+    monkeypatch.setattr(settings, "GEO_SEARCH_BACKEND", request.param)
+    return request.param
+
+
+@pytest.mark.usefixtures("geo_backend")
+class TestRadiusSearch:
+    """Тесты радиусного поиска заправок"""
+
+    def test_radius_filter_and_order(self, db_session):
+        """Поиск возвращает только близкие одобренные станции по расстоянию"""
+        far = make_station(db_session, "Far", 41.4000, 69.2797)
+        near = make_station(db_session, "Near", 41.3120, 69.2797)
+        make_station(db_session, "Samarkand", 39.6542, 66.9597)
+        make_station(db_session, "Pending", 41.3111, 69.2800, status=StationStatus.PENDING)
+
+        filters = GasStationFilter(latitude=TASHKENT[0], longitude=TASHKENT[1], radius_km=20)
+        stations, total = get_gas_stations(db_session, filters=filters)
+
+        assert total == 2
+        assert [s.id for s in stations] == [near.id, far.id]
+
+    def test_pagination(self, db_session):
+        """Пагинация применяется после сортировки по расстоянию"""
+        ids = [make_station(db_session, f"S{i}", 41.3111 + i * 0.001, 69.2797).id for i in range(5)]
+        filters = GasStationFilter(latitude=TASHKENT[0], longitude=TASHKENT[1], radius_km=5)
+        stations, total = get_gas_stations(db_session, skip=1, limit=2, filters=filters)
+        assert total == 5
+        assert [s.id for s in stations] == ids[1:3]
+
+    def test_count_modes(self, db_session):
+        """count=none не считает total, estimate - точный total из кеша категории"""
+        ids = [make_station(db_session, f"S{i}", 41.3111 + i * 0.001, 69.2797).id for i in range(3)]
+        filters = GasStationFilter(latitude=TASHKENT[0], longitude=TASHKENT[1], radius_km=5)
+
+        stations, total = get_gas_stations(db_session, limit=2, filters=filters, count=CountMode.NONE)
+        assert total is None
+        assert [s.id for s in stations] == ids[:2]
+
+        for _ in range(2):
+            assert get_gas_stations(db_session, limit=2, filters=filters, count=CountMode.ESTIMATE)[1] == 3
+
+    def test_small_filter_chunks(self, db_session, monkeypatch):
+        """Кандидаты проверяются порциями: порядок, пагинация и total не меняются"""
+        monkeypatch.setattr(settings, "GEO_FILTER_CHUNK_SIZE", 2)
+        ids = []
+        for i in range(6):
+            status = StationStatus.PENDING if i % 3 == 1 else StationStatus.APPROVED
+            station = make_station(db_session, f"S{i}", 41.3111 + i * 0.001, 69.2797, status=status)
+            if status == StationStatus.APPROVED:
+                ids.append(station.id)
+        filters = GasStationFilter(latitude=TASHKENT[0], longitude=TASHKENT[1], radius_km=5)
+
+        stations, total = get_gas_stations(db_session, skip=1, limit=2, filters=filters)
+        assert total == 4
+        assert [s.id for s in stations] == ids[1:3]
+        assert [s.id for s, _ in get_nearest_gas_stations(db_session, *TASHKENT, k=3)] == ids[:3]
+
+    def test_index_follows_updates_and_deletes(self, db_session):
+        """Индекс обновляется при изменении координат и удалении"""
+        station = make_station(db_session, "Moving", *TASHKENT)
+        filters = GasStationFilter(latitude=TASHKENT[0], longitude=TASHKENT[1], radius_km=5)
+        assert get_gas_stations(db_session, filters=filters)[1] == 1
+
+        update_gas_station(db_session, station.id, GasStationUpdate(latitude=39.6542, longitude=66.9597))
+        assert get_gas_stations(db_session, filters=filters)[1] == 0
+
+        update_gas_station(db_session, station.id, GasStationUpdate(latitude=TASHKENT[0], longitude=TASHKENT[1]))
+        delete_gas_station(db_session, station.id)
+        assert get_gas_stations(db_session, filters=filters)[1] == 0
+
+
+@pytest.mark.usefixtures("geo_backend")
+class TestNearestSearch:
+    """Тесты поиска k ближайших заправок"""
+
+    def test_nearest_ignores_radius_and_skips_unapproved(self, db_session):
+        """Возвращаются k ближайших одобренных станций с расстояниями"""
+        samarkand = make_station(db_session, "Samarkand", 39.6542, 66.9597)
+        near = make_station(db_session, "Near", 41.3120, 69.2797)
+        make_station(db_session, "Pending", 41.3111, 69.2797, status=StationStatus.PENDING)
+        far = make_station(db_session, "Far", 41.4000, 69.2797)
+
+        nearest = get_nearest_gas_stations(db_session, *TASHKENT, k=3)
+
+        assert [station.id for station, _ in nearest] == [near.id, far.id, samarkand.id]
+        assert nearest[0][1] == pytest.approx(0.1, abs=0.01)
+        assert nearest[2][1] > 250
+
+    def test_nearest_endpoint(self, client, db_session, user_token):
+        """Эндпоинт /nearest отдает станции с distance_km"""
+        near = make_station(db_session, "Near", 41.3120, 69.2797)
+        make_station(db_session, "Far", 41.4000, 69.2797)
+
+        response = client.get(
+            "/api/v1/gas-stations/nearest",
+            params={"latitude": TASHKENT[0], "longitude": TASHKENT[1], "k": 1},
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["stations"][0]["id"] == near.id
+        assert data["stations"][0]["distance_km"] == pytest.approx(0.1, abs=0.01)
+
+
+class TestMapClusters:
+    """Тесты кластеризации маркеров для карты"""
+
+    def test_clusters_merge_on_low_zoom(self, db_session):
+        """На малом zoom близкие станции сливаются, на большом - разделяются"""
+        first = make_station(db_session, "A", 41.3111, 69.2797)
+        make_station(db_session, "B", 41.3120, 69.2810)
+        make_station(db_session, "Samarkand", 39.6542, 66.9597)
+        make_station(db_session, "Pending", 41.3115, 69.2800, status=StationStatus.PENDING)
+
+        clusters = get_gas_station_clusters(db_session, 41.0, 69.0, 41.6, 69.6, zoom=8)
+        assert len(clusters) == 1
+        assert clusters[0]["count"] == 2
+        assert clusters[0]["latitude"] == pytest.approx(41.31155)
+
+        clusters = get_gas_station_clusters(db_session, 41.0, 69.0, 41.6, 69.6, zoom=20)
+        assert sorted(c["count"] for c in clusters) == [1, 1]
+        assert first.id in {c["place_id"] for c in clusters}
+
+    def test_min_price_follows_fuel_prices(self, db_session):
+        """Минимальная цена пересчитывается после изменения цен"""
+        first = make_station(db_session, "A", 41.3111, 69.2797)
+        second = make_station(db_session, "B", 41.3120, 69.2810)
+        create_or_update_fuel_price(db_session, first.id, FuelPriceCreate(fuel_type=FuelType.AI_95, price=11000))
+        create_or_update_fuel_price(db_session, second.id, FuelPriceCreate(fuel_type=FuelType.AI_91, price=9000))
+
+        viewport = (41.0, 69.0, 41.6, 69.6)
+        assert get_gas_station_clusters(db_session, *viewport, zoom=8)[0]["min_price"] == 9000
+        assert get_gas_station_clusters(
+            db_session, *viewport, zoom=8, fuel_type=FuelType.AI_95
+        )[0]["min_price"] == 11000
+
+        create_or_update_fuel_price(db_session, first.id, FuelPriceCreate(fuel_type=FuelType.AI_95, price=8000))
+        assert get_gas_station_clusters(db_session, *viewport, zoom=8)[0]["min_price"] == 8000
+
+    def test_clusters_endpoint(self, client, db_session, user_token):
+        """Эндпоинт /clusters отдает кластеры и проверяет viewport"""
+        make_station(db_session, "A", *TASHKENT)
+        headers = {"Authorization": f"Bearer {user_token}"}
+        params = {"min_lat": 41.0, "min_lon": 69.0, "max_lat": 41.6, "max_lon": 69.6, "zoom": 10}
+
+        response = client.get("/api/v1/restaurants/clusters", params=params, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["total"] == 0
+
+        response = client.get("/api/v1/gas-stations/clusters", params=params, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+
+        response = client.get(
+            "/api/v1/gas-stations/clusters",
+            params={**params, "min_lat": 42.0},
+            headers=headers
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.usefixtures("geo_backend")
+class TestCorridorSearch:
+    """Тесты поиска заправок вдоль маршрута"""
+
+    ROUTE = [(41.3111, 69.2797), (40.5, 68.0), (39.6542, 66.9597)]  # Ташкент -> Самарканд
+
+    def test_stations_ordered_along_route(self, db_session):
+        """Станции в коридоре возвращаются в порядке следования по маршруту"""
+        samarkand = make_station(db_session, "Samarkand", 39.6600, 66.9700)
+        middle = make_station(db_session, "Middle", 40.5050, 68.0000)
+        start = make_station(db_session, "Start", 41.3000, 69.2700)
+        make_station(db_session, "Off route", 40.9000, 69.5000)
+        make_station(db_session, "Pending", 40.5000, 68.0010, status=StationStatus.PENDING)
+
+        found = get_gas_stations_along_route(db_session, self.ROUTE, buffer_km=3)
+
+        assert [station.id for station, _, _ in found] == [start.id, middle.id, samarkand.id]
+        assert all(distance_km <= 3 for _, distance_km, _ in found)
+        assert found[0][2] < found[1][2] < found[2][2]
+
+    def test_fuel_type_and_limit(self, db_session):
+        """Фильтр по типу топлива и лимит применяются после сортировки по маршруту"""
+        first = make_station(db_session, "First", 41.3000, 69.2700)
+        second = make_station(db_session, "Second", 40.5050, 68.0000)
+        third = make_station(db_session, "Third", 39.6600, 66.9700)
+        for station in (first, third):
+            create_or_update_fuel_price(db_session, station.id, FuelPriceCreate(fuel_type=FuelType.GAS, price=4000))
+        create_or_update_fuel_price(db_session, second.id, FuelPriceCreate(fuel_type=FuelType.AI_95, price=11000))
+
+        found = get_gas_stations_along_route(db_session, self.ROUTE, buffer_km=3, fuel_type=FuelType.GAS)
+        assert [station.id for station, _, _ in found] == [first.id, third.id]
+
+        found = get_gas_stations_along_route(db_session, self.ROUTE, buffer_km=3, limit=2)
+        assert [station.id for station, _, _ in found] == [first.id, second.id]
+
+    def test_along_route_endpoint(self, client, db_session, user_token):
+        """Эндпоинт /along-route отдает distance_km и route_km"""
+        station = make_station(db_session, "Middle", 40.5050, 68.0000)
+        response = client.post(
+            "/api/v1/gas-stations/along-route",
+            json={
+                "points": [{"latitude": lat, "longitude": lon} for lat, lon in self.ROUTE],
+                "buffer_km": 2,
+            },
+            headers={"Authorization": f"Bearer {user_token}"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [s["id"] for s in data["stations"]] == [station.id]
+        assert data["stations"][0]["distance_km"] < 2
+        assert data["stations"][0]["route_km"] > 100
@@ -0,0 +1,103 @@
+"""
+Тесты плана загрузки связей: количество запросов на страницу списка не зависит от ее размера
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.gas_station import GasStation, GasStationPhoto, FuelPrice, FuelType, StationStatus
+from app.models.electric_station import ElectricStation, ChargingPoint, ConnectorType, ElectricStationStatus
+from app.services.geo_service import reset_geo_indexes
+from tests.conftest import engine
+
+
+@contextmanager
+def count_queries():
+    """Счетчик SQL-запросов к тестовому engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def make_gas_stations(db, count):
+    for i in range(count):
+        station = GasStation(
+            name=f"Station {i}",
+            address="address",
+            latitude=41.3111 + i * 0.001,
+            longitude=69.2797,
+            status=StationStatus.APPROVED,
+        )
+        station.photos = [GasStationPhoto(photo_url=f"http://photo/{i}", is_main=True)]
+        station.fuel_prices = [FuelPrice(fuel_type=FuelType.AI_95, price=11000 + i)]
+        db.add(station)
+    db.commit()
+
+
+def make_electric_stations(db, count):
+    for i in range(count):
+        station = ElectricStation(
+            name=f"EV {i}",
+            address="address",
+            latitude=41.3111 + i * 0.001,
+            longitude=69.2797,
+            status=ElectricStationStatus.APPROVED,
+        )
+        station.charging_points = [ChargingPoint(connector_type=ConnectorType.TYPE_2, power_kw=22)]
+        db.add(station)
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def clean_geo_indexes():
+    reset_geo_indexes()
+    yield
+    reset_geo_indexes()
+
+
+class TestListQueryCount:
+    """Тесты отсутствия N+1 при сериализации списков"""
+
+    def _list_query_count(self, client, token, url, params=None):
+        with count_queries() as statements:
+            response = client.get(url, params=params, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        return len(statements), response.json()
+
+    @pytest.mark.parametrize("params", [None, {"latitude": 41.3111, "longitude": 69.2797, "radius_km": 50}])
+    def test_gas_station_list_constant_queries(self, client, db_session, user_token, monkeypatch, params):
+        """Страница из 3 и из 20 станций загружается одинаковым числом запросов"""
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+        make_gas_stations(db_session, 3)
+        small, data = self._list_query_count(client, user_token, "/api/v1/gas-stations/", params)
+        assert len(data["stations"]) == 3
+        assert data["stations"][0]["main_photo"]
+
+        make_gas_stations(db_session, 17)
+        reset_geo_indexes()  # станции добавлены в обход CRUD
+        large, data = self._list_query_count(client, user_token, "/api/v1/gas-stations/", params)
+        assert len(data["stations"]) == 20
+        assert all(station["fuel_prices"] for station in data["stations"])
+
+        assert large == small
+
+    def test_electric_station_list_constant_queries(self, client, db_session, user_token, monkeypatch):
+        """Зарядные точки подгружаются одним запросом на страницу"""
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+        make_electric_stations(db_session, 2)
+        small, _ = self._list_query_count(client, user_token, "/api/v1/electric-stations/")
+
+        make_electric_stations(db_session, 10)
+        large, data = self._list_query_count(client, user_token, "/api/v1/electric-stations/")
+        assert all(station["charging_points"] for station in data["electric_stations"])
+
+        assert large == small
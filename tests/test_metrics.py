@@ -0,0 +1,58 @@
+"""
+Тесты метрик Prometheus (/metrics)
+"""
+from app.core.config import settings
+from app.core.security import create_access_token
+
+
+def metric_value(text: str, line_prefix: str) -> float:
+    """Значение метрики по началу строки (имя и метки)"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class TestMetricsEndpoint:
+    """Тесты эндпоинта /metrics"""
+
+    def test_route_latency_by_template(self, client, user_token):
+        """Латентность пишется по шаблону маршрута, а не по фактическому пути"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        client.get("/api/v1/gas-stations/999999", headers=headers)
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'route="/api/v1/gas-stations/{station_id}"' in text
+        assert "/api/v1/gas-stations/999999" not in text
+        assert "http_requests_in_progress" in text
+        assert 'db_queries_per_request_count{route="/api/v1/gas-stations/{station_id}"}' in text
+
+    def test_cache_lookups(self, client, user_token):
+        """Промахи и попадания кеша ответов считаются"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        before = client.get("/metrics").text
+        client.get("/api/v1/gas-stations/", headers=headers)
+        client.get("/api/v1/gas-stations/", headers=headers)
+        after = client.get("/metrics").text
+
+        prefix = 'response_cache_lookups_total{result="%s"}'
+        assert metric_value(after, prefix % "miss") - metric_value(before, prefix % "miss") == 1
+        assert metric_value(after, prefix % "hit_local") - metric_value(before, prefix % "hit_local") == 1
+
+    def test_websocket_gauge(self, client, test_user):
+        """Открытые WebSocket учитываются по маршруту"""
+        token = create_access_token(data={"sub": f"{test_user.phone_number}:{test_user.id}"})
+        gauge = 'websocket_connections{route="/api/v1/global-chat/ws"}'
+        with client.websocket_connect(f"/api/v1/global-chat/ws?token={token}") as websocket:
+            assert websocket.receive_json()["type"] == "connection"
+            assert metric_value(client.get("/metrics").text, gauge) == 1
+        assert metric_value(client.get("/metrics").text, gauge) == 0
+
+    def test_token_required(self, client, monkeypatch):
+        """С METRICS_TOKEN метрики отдаются только с токеном"""
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
@@ -0,0 +1,180 @@
+"""
+Тесты keyset (курсорной) пагинации и режимов подсчета total
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.counting import CountMode, _Explain, planner_estimate
+from app.core.pagination import decode_cursor, encode_cursor, next_cursor
+from app.core.response_cache import response_cache
+from app.crud.user import get_all_users
+from app.models.gas_station import GasStation, StationStatus
+from app.models.global_chat import GlobalChatMessage
+from app.models.restaurant import CuisineType, Restaurant, RestaurantReview, RestaurantStatus
+from app.models.user import User
+from app.services.gas_station_service.crud import get_gas_stations
+from app.services.global_chat_service.crud import get_messages
+
+
+def make_messages(db, user, count, start=datetime(2026, 1, 1, 12, 0, 0)):
+    """Сообщения с попарно одинаковым created_at (проверка разрешения по id)"""
+    messages = []
+    for index in range(count):
+        message = GlobalChatMessage(
+            user_id=user.id,
+            message=f"message {index}",
+            created_at=start + timedelta(minutes=index // 2),
+        )
+        db.add(message)
+        messages.append(message)
+    db.commit()
+    return messages
+
+
+class TestCursor:
+    """Тесты кодирования курсора"""
+
+    def test_roundtrip(self):
+        """Курсор восстанавливает (created_at, id)"""
+        created_at = datetime(2026, 1, 1, 12, 30, 15, 123456)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_invalid_cursor(self):
+        """Некорректный курсор - ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestKeysetPagination:
+    """Тесты постраничного обхода по курсору"""
+
+    def test_chat_pages_cover_feed_without_duplicates(self, db_session, test_user):
+        """Обход по курсору дает ту же ленту, что и OFFSET, при совпадающих created_at"""
+        make_messages(db_session, test_user, 7)
+        expected, total = get_messages(db_session, test_user.id, limit=100)
+        assert total == 7
+
+        seen, cursor = [], None
+        while True:
+            page, page_total = get_messages(
+                db_session, test_user.id, limit=3, cursor=cursor, count=CountMode.NONE
+            )
+            assert page_total is None
+            seen.extend(page)
+            cursor = next_cursor(page, 3)
+            if cursor is None:
+                break
+
+        assert [m.id for m in seen] == [m.id for m in expected]
+
+    def test_users_cursor(self, db_session):
+        """Курсор работает и для списка пользователей"""
+        for index in range(5):
+            db_session.add(User(
+                phone_number=f"+99890000010{index}",
+                created_at=datetime(2026, 1, 1) + timedelta(days=index),
+            ))
+        db_session.commit()
+
+        first, total = get_all_users(db_session, limit=2)
+        second, _ = get_all_users(db_session, limit=2, cursor=next_cursor(first, 2), count=CountMode.NONE)
+        assert total == 5
+        assert [u.phone_number for u in first + second] == [
+            "+998900000104", "+998900000103", "+998900000102", "+998900000101",
+        ]
+
+    def test_endpoint_returns_next_cursor_and_rejects_bad_cursor(self, client, db_session, test_user, user_token):
+        """Эндпоинт чата отдает next_cursor, некорректный курсор - 400"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        make_messages(db_session, test_user, 3)
+
+        response = client.get("/api/v1/global-chat/messages", params={"limit": 2}, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3 and data["next_cursor"]
+
+        response = client.get(
+            "/api/v1/global-chat/messages",
+            params={"limit": 2, "cursor": data["next_cursor"], "count": "none"},
+            headers=headers,
+        )
+        data = response.json()
+        assert len(data["messages"]) == 1
+        assert data["total"] is None and data["next_cursor"] is None
+
+        response = client.get("/api/v1/global-chat/messages", params={"cursor": "bad"}, headers=headers)
+        assert response.status_code == 400
+
+    def test_restaurant_reviews_cursor(self, client, db_session, user_token):
+        """Карточка ресторана отдает курсор отзывов, /reviews листает дальше по нему"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        restaurant = Restaurant(
+            name="R", address="address", latitude=41.3, longitude=69.2,
+            cuisine_type=CuisineType.UZBEK, status=RestaurantStatus.APPROVED,
+        )
+        db_session.add(restaurant)
+        db_session.commit()
+        for index in range(52):
+            author = User(phone_number=f"+99890100{index:04d}")
+            db_session.add(author)
+            db_session.flush()
+            db_session.add(RestaurantReview(
+                restaurant_id=restaurant.id, user_id=author.id, rating=5,
+                created_at=datetime(2026, 1, 1) + timedelta(minutes=index),
+            ))
+        db_session.commit()
+
+        detail = client.get(f"/api/v1/restaurants/{restaurant.id}", headers=headers).json()
+        assert len(detail["reviews"]) == 50 and detail["reviews_next_cursor"]
+
+        response = client.get(
+            f"/api/v1/restaurants/{restaurant.id}/reviews",
+            params={"cursor": detail["reviews_next_cursor"], "count": "none"},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None and data["next_cursor"] is None
+        seen = [r["id"] for r in detail["reviews"] + data["items"]]
+        assert len(seen) == len(set(seen)) == 52
+
+        response = client.get(f"/api/v1/restaurants/{restaurant.id}/reviews", params={"cursor": "bad"}, headers=headers)
+        assert response.status_code == 400
+
+
+class TestCountModes:
+    """Тесты режимов подсчета total (count=exact|estimate|none)"""
+
+    def test_estimate_cached_until_write(self, db_session):
+        """estimate для мест кешируется до следующей записи в категорию"""
+        def add_station(name):
+            db_session.add(GasStation(
+                name=name, address="address", latitude=41.3, longitude=69.2, status=StationStatus.APPROVED,
+            ))
+            db_session.commit()
+
+        add_station("A")
+        add_station("B")
+        assert get_gas_stations(db_session, count=CountMode.ESTIMATE)[1] == 2
+
+        # Запись в обход CRUD не увеличивает версию - оценка остается прежней
+        add_station("C")
+        assert get_gas_stations(db_session, count=CountMode.ESTIMATE)[1] == 2
+        assert get_gas_stations(db_session, count=CountMode.EXACT)[1] == 3
+
+        response_cache.bump(GasStation.__tablename__)
+        assert get_gas_stations(db_session, count=CountMode.ESTIMATE)[1] == 3
+
+        stations, total = get_gas_stations(db_session, count=CountMode.NONE)
+        assert total is None and len(stations) == 3
+
+    def test_planner_estimate(self, db_session):
+        """Оценка планировщика только для PostgreSQL; EXPLAIN компилируется с параметрами"""
+        query = db_session.query(GasStation).filter(GasStation.status == StationStatus.APPROVED)
+        assert planner_estimate(query) is None
+
+        sql = str(_Explain(query.statement).compile(dialect=postgresql.dialect()))
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "%(status_1)s" in sql
@@ -0,0 +1,91 @@
+"""
+Тесты метрик пула соединений
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.pool_metrics import Histogram, InstrumentedQueuePool, pool_metrics
+from app.core.request_context import current_scope, route_label
+
+
+def make_engine(tmp_path, name, **options):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / name}.db",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        **options,
+    )
+    pool_metrics.register(name, engine)
+    return engine
+
+
+class TestPoolMetrics:
+    """Тесты сбора метрик через события пула"""
+
+    def test_checkout_and_route_hold(self, tmp_path):
+        """Checkout, ожидание и удержание соединения записываются по маршруту"""
+        engine = make_engine(tmp_path, "test_hold", pool_size=2, max_overflow=0)
+        token = current_scope.set({"route": SimpleNamespace(path="/api/v1/items/{item_id}")})
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                assert pool_metrics.snapshot()["pools"]["test_hold"]["in_use"] == 1
+        finally:
+            current_scope.reset(token)
+
+        snapshot = pool_metrics.snapshot()
+        stats = snapshot["pools"]["test_hold"]
+        assert stats["in_use"] == 0
+        assert stats["checkouts"] == 1 and stats["connects"] == 1
+        assert stats["checkout_wait"]["count"] == 1
+        assert stats["pool_size"] == 2 and stats["idle"] == 1
+        hold = [item for item in snapshot["routes"] if item["pool"] == "test_hold"]
+        assert [item["route"] for item in hold] == ["/api/v1/items/{item_id}"]
+        assert hold[0]["count"] == 1
+
+    def test_timeout_recorded(self, tmp_path):
+        """Таймаут ожидания свободного соединения считается"""
+        engine = make_engine(tmp_path, "test_timeout", pool_size=1, max_overflow=0, pool_timeout=0.05)
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        stats = pool_metrics.snapshot()["pools"]["test_timeout"]
+        assert stats["timeouts"] == 1
+        assert stats["checkout_wait"]["max"] >= 0.05
+
+
+class TestHistogram:
+    """Тесты гистограммы"""
+
+    def test_cumulative_buckets(self):
+        """Корзины накопительные, как в Prometheus"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 5):
+            histogram.observe(seconds)
+        assert histogram.as_dict()["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 3}
+        assert histogram.max == 5
+
+
+class TestRouteLabel:
+    """Тесты шаблона маршрута"""
+
+    def test_labels(self):
+        """Вне запроса - "-", без найденного маршрута - unmatched"""
+        assert route_label(None) == "-"
+        assert route_label({"type": "http"}) == "unmatched"
+
+
+class TestPoolEndpoint:
+    """Тесты эндпоинта метрик пула"""
+
+    def test_admin_only(self, client, user_token, admin_token):
+        """Метрики доступны только администратору"""
+        response = client.get("/api/v1/admin/statistics/db-pool", headers={"Authorization": f"Bearer {user_token}"})
+        assert response.status_code == 403
+
+        response = client.get("/api/v1/admin/statistics/db-pool", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert "primary" in response.json()["pools"]
@@ -0,0 +1,102 @@
+"""
+Тесты присутствия (онлайн) в глобальном чате
+"""
+import asyncio
+
+from app.api.v1.global_chat import GlobalChatConnectionManager
+from app.core.presence import Presence
+from app.core.security import create_access_token
+from app.core.ws_bus import LocalBus
+
+
+class FakeWebSocket:
+    """Сокет, запоминающий отправленное"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+class TestPresence:
+    """Тесты учета онлайн и отложенной рассылки"""
+
+    def test_multiple_tabs(self):
+        """Пользователь онлайн, пока открыта хотя бы одна вкладка"""
+        presence = Presence()
+        assert presence.add(1) is True
+        assert presence.add(1) is False
+        presence.add(2)
+        assert presence.online_count == 2
+
+        assert presence.remove(1) is False
+        assert presence.is_online(1)
+        assert presence.remove(1) is True
+        assert presence.remove(1) is False
+        assert presence.online_count == 1
+
+    def test_flush_coalesces_changes(self):
+        """Волна подключений дает одну рассылку; без изменений рассылки нет"""
+        presence = Presence()
+        counts = []
+
+        async def collect(count):
+            counts.append(count)
+
+        async def scenario():
+            presence.on_change(collect)
+            for user_id in range(50):
+                presence.add(user_id)
+            await presence.flush()
+            await presence.flush()
+            # Переподключение: число онлайн не изменилось
+            presence.remove(7)
+            presence.add(7)
+            await presence.flush()
+            presence.remove(7)
+            await presence.flush()
+
+        asyncio.run(scenario())
+        assert counts == [50, 49]
+
+
+class TestGlobalChatPresence:
+    """Онлайн в менеджере глобального чата"""
+
+    def test_disconnect_one_tab(self):
+        """Закрытие одной вкладки не отключает пользователя"""
+        async def scenario():
+            manager = GlobalChatConnectionManager(bus=LocalBus(), presence=Presence())
+            first = await manager.connect(FakeWebSocket(), 1)
+            second_socket = FakeWebSocket()
+            second = await manager.connect(second_socket, 1)
+            assert manager.get_online_count() == 1
+
+            manager.disconnect(1, first)
+            assert manager.get_online_count() == 1
+            await manager.deliver_message({"id": 1})
+            await asyncio.sleep(0.01)
+
+            manager.disconnect(1, second)
+            assert manager.get_online_count() == 0
+            assert manager.active_connections == {}
+            return second_socket.sent
+
+        assert asyncio.run(scenario()) == ['{"type":"new_message","message":{"id":1}}']
+
+    def test_online_count_with_two_tabs(self, client, test_user, user_token):
+        """Две вкладки одного пользователя - один онлайн; закрытие вкладки его не снимает"""
+        token = create_access_token(data={"sub": f"{test_user.phone_number}:{test_user.id}"})
+        headers = {"Authorization": f"Bearer {user_token}"}
+        with client.websocket_connect(f"/api/v1/global-chat/ws?token={token}") as first:
+            assert first.receive_json()["online_count"] == 1
+            with client.websocket_connect(f"/api/v1/global-chat/ws?token={token}") as second:
+                assert second.receive_json()["online_count"] == 1
+            assert client.get("/api/v1/global-chat/online", headers=headers).json()["online_count"] == 1
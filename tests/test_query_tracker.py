@@ -0,0 +1,53 @@
+"""
+Тесты учета запросов к БД на HTTP-запрос
+"""
+import json
+import logging
+
+from app.core.config import settings
+from app.core.query_tracker import QueryStats
+
+
+class TestQueryStats:
+    """Тесты статистики запросов"""
+
+    def test_keeps_slowest(self):
+        """Хранятся только самые медленные выражения"""
+        stats = QueryStats(keep_slowest=2)
+        for seconds, statement in ((0.01, "a"), (0.3, "b"), (0.02, "c"), (0.2, "d")):
+            stats.record(statement, seconds)
+        assert stats.count == 4
+        assert round(stats.total_ms) == 530
+        assert [statement for _, statement in stats.slowest] == ["b", "d"]
+
+
+class TestQueryTrackerMiddleware:
+    """Тесты заголовка Server-Timing и лога превышения бюджета"""
+
+    def test_server_timing(self, client, user_token, monkeypatch):
+        """Заголовок Server-Timing только при SERVER_TIMING_ENABLED"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = client.get("/api/v1/notifications", headers=headers)
+        assert "server-timing" not in response.headers
+
+        monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+        response = client.get("/api/v1/notifications", headers=headers)
+        timing = response.headers["server-timing"]
+        assert timing.startswith("db;dur=")
+        assert int(timing.split('desc="')[1].split(" ")[0]) > 0
+
+    def test_budget_exceeded_logged(self, client, user_token, monkeypatch, caplog):
+        """Превышение числа запросов - JSON-строка с шаблоном маршрута"""
+        monkeypatch.setattr(settings, "SLOW_REQUEST_QUERY_COUNT", 1)
+        with caplog.at_level(logging.WARNING, logger="app.core.query_tracker"):
+            client.get("/api/v1/notifications", headers={"Authorization": f"Bearer {user_token}"})
+
+        events = [
+            json.loads(record.getMessage())
+            for record in caplog.records
+            if "db_budget_exceeded" in record.getMessage()
+        ]
+        assert len(events) == 1
+        assert events[0]["route"] == "/api/v1/notifications"
+        assert events[0]["queries"] > 1
+        assert events[0]["slowest"]
@@ -0,0 +1,116 @@
+"""
+Тесты маршрутизации чтения на реплики и read-your-writes
+"""
+import pytest
+from sqlalchemy import Column, String, create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core.read_routing import ReplicaSet, RoutingSession, WriteTracker
+
+MarkerBase = declarative_base()
+
+
+class Marker(MarkerBase):
+    __tablename__ = "marker"
+    name = Column(String, primary_key=True)
+
+
+def make_engine(path, name):
+    """БД-файл с таблицей marker, в которой записано имя БД"""
+    engine = create_engine(f"sqlite:///{path / name}.db")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE marker (name VARCHAR)"))
+        connection.execute(text("INSERT INTO marker (name) VALUES (:name)"), {"name": name})
+    return engine
+
+
+def read_marker(session) -> str:
+    return session.execute(text("SELECT name FROM marker")).scalar()
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary = make_engine(tmp_path, "primary")
+    replicas = ReplicaSet([make_engine(tmp_path, "r1"), make_engine(tmp_path, "r2")], retry_seconds=60)
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=replicas)
+    return factory, replicas
+
+
+class TestRoutingSession:
+    """Тесты выбора БД для сессии чтения"""
+
+    def test_round_robin_pinned_per_session(self, databases):
+        """Сессии по очереди получают реплики, внутри сессии реплика не меняется"""
+        factory, _ = databases
+        seen = []
+        for _ in range(4):
+            session = factory()
+            seen.append(read_marker(session))
+            assert read_marker(session) == seen[-1]
+            session.close()
+        assert seen == ["r1", "r2", "r1", "r2"]
+
+    def test_reads_after_flush_go_to_primary(self, databases):
+        """Запись идет в основную БД, и после нее сессия читает оттуда же"""
+        factory, _ = databases
+        session = factory()
+        assert read_marker(session) == "r1"
+        session.add(Marker(name="written"))
+        session.flush()
+        names = session.execute(text("SELECT name FROM marker ORDER BY name")).scalars().all()
+        assert names == ["primary", "written"]
+        session.close()
+
+    def test_replica_down_fallback(self, databases):
+        """Недоступная реплика пропускается, без реплик - основная БД"""
+        factory, replicas = databases
+        replicas.mark_down(replicas.engines[0])
+        assert read_marker(factory()) == "r2"
+        assert read_marker(factory()) == "r2"
+
+        replicas.mark_down(replicas.engines[1])
+        assert read_marker(factory()) == "primary"
+
+    def test_connection_error_marks_replica_down(self, tmp_path):
+        """Ошибка соединения с репликой исключает ее из ротации, чтение повторяется в основной БД"""
+        primary = make_engine(tmp_path, "primary")
+        broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        replicas = ReplicaSet([broken], retry_seconds=60)
+        factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=replicas)
+
+        assert read_marker(factory()) == "primary"
+        assert replicas.choose() is None
+        assert read_marker(factory()) == "primary"
+
+
+    def test_query_error_not_retried(self, databases):
+        """Ошибка самого запроса (реплика доступна) не повторяется"""
+        factory, replicas = databases
+        session = factory()
+        with pytest.raises(DBAPIError):
+            session.execute(text("SELECT missing FROM marker"))
+        assert not replicas.is_down(replicas.engines[0])
+
+
+class TestWriteTracker:
+    """Тесты отметок read-your-writes"""
+
+    def test_mark_and_expire(self, monkeypatch):
+        """Отметка действует sticky_seconds"""
+        tracker = WriteTracker(sticky_seconds=5)
+        assert not tracker.is_recent("token")
+        tracker.mark("token")
+        assert tracker.is_recent("token")
+        assert not tracker.is_recent("other")
+
+        import app.core.read_routing as read_routing
+        now = read_routing.time.monotonic()
+        monkeypatch.setattr(read_routing.time, "monotonic", lambda: now + 6)
+        assert not tracker.is_recent("token")
+
+    def test_disabled(self):
+        """sticky_seconds=0 - без закрепления"""
+        tracker = WriteTracker(sticky_seconds=0)
+        tracker.mark("token")
+        assert not tracker.is_recent("token")
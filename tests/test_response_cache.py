@@ -0,0 +1,221 @@
+"""
+Тесты кеша ответов публичных списков мест и условных GET (ETag)
+"""
+import asyncio
+
+from app.core.etag import content_etag, json_response, make_etag, etag_matches
+from app.core.response_cache import ResponseCache, response_cache
+from app.models.driver import Region
+from app.models.gas_station import GasStation, Review, StationStatus, FuelType
+from app.schemas.gas_station import FuelPriceCreate, GasStationUpdate
+from app.services.gas_station_service.crud import (
+    create_or_update_fuel_price,
+    update_gas_station,
+)
+from app.schemas.user_extended import UserExtendedCreate, UserExtendedUpdate
+from app.services.user_service.crud import create_user_extended, update_user_extended
+
+
+class TestResponseCache:
+    """Тесты версионного LRU-кеша"""
+
+    def test_key_normalizes_params(self):
+        """Порядок параметров и None не влияют на ключ"""
+        cache = ResponseCache()
+        assert cache.key("places", {"a": 1, "b": None, "c": "x"}) == cache.key("places", {"c": "x", "a": 1})
+        assert cache.key("places", {"a": 1}) != cache.key("places", {"a": 2})
+
+    def test_bump_invalidates_category_only(self):
+        """Увеличение версии делает недоступными ответы только своей категории"""
+        cache = ResponseCache()
+        places_key = cache.key("places", {"skip": 0})
+        other_key = cache.key("other", {"skip": 0})
+        cache.set(places_key, "[1]")
+        cache.set(other_key, "[2]")
+
+        cache.bump("places")
+
+        assert cache.get(cache.key("places", {"skip": 0})) is None
+        assert cache.get(cache.key("other", {"skip": 0})) == "[2]"
+
+    def test_lru_eviction(self):
+        """Самая давно использованная запись вытесняется первой"""
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+    def test_etag_same_in_all_workers(self):
+        """ETag по ключу - только с общими версиями Redis; без Redis - по содержимому"""
+        class CounterRedis:
+            def __init__(self):
+                self.values = {}
+
+            def incrby(self, name, amount):
+                self.values[name] = self.values.get(name, 0) + amount
+                return self.values[name]
+
+            def get(self, name):
+                return None
+
+            def setex(self, name, ttl, value):
+                pass
+
+        redis = CounterRedis()
+        workers = [ResponseCache(redis_url="redis://shared/0") for _ in range(2)]
+        for worker in workers:
+            worker._redis = redis
+        etags = {worker.etag(worker.key("places", {"skip": 0})) for worker in workers}
+        assert len(etags) == 1 and None not in etags
+
+        local = [ResponseCache() for _ in range(2)]
+        assert local[0].etag(local[0].key("places", {"skip": 0})) is None
+        assert json_response("[1]", None, None).headers["ETag"] == content_etag("[1]")
+        assert json_response("[1]", None, content_etag("[1]")).status_code == 304
+
+    def test_redis_failure_skips_redis_until_retry(self):
+        """После ошибки Redis не опрашивается до истечения паузы, ответы берутся из LRU"""
+        class FailingRedis:
+            calls = 0
+
+            def __getattr__(self, name):
+                def call(*args):
+                    FailingRedis.calls += 1
+                    raise ConnectionError("redis down")
+                return call
+
+        cache = ResponseCache(redis_url="redis://localhost:1/0", redis_retry_seconds=60)
+        cache._redis = FailingRedis()
+        key = cache.key("places", {"skip": 0})
+        assert FailingRedis.calls == 1
+
+        async def scenario():
+            await cache.set_async(key, "[1]")
+            return await cache.get_async(await cache.key_async("places", {"skip": 0}))
+
+        assert asyncio.run(scenario()) == "[1]"
+        cache.bump("places")
+        assert FailingRedis.calls == 1
+
+
+def make_station(db, name):
+    station = GasStation(
+        name=name,
+        address=f"{name} address",
+        latitude=41.3111,
+        longitude=69.2797,
+        status=StationStatus.APPROVED,
+    )
+    db.add(station)
+    db.commit()
+    db.refresh(station)
+    return station
+
+
+class TestListResponseCache:
+    """Тесты кеширования списка заправок"""
+
+    def test_list_served_from_cache_until_write(self, client, db_session, user_token):
+        """Повторный запрос отдается из кеша, запись через CRUD инвалидирует его"""
+        station = make_station(db_session, "Cached")
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        first = client.get("/api/v1/gas-stations/", headers=headers)
+        assert first.status_code == 200
+        hits = response_cache.hits
+
+        # Изменение в обход CRUD не видно, пока версия категории не изменилась
+        station.name = "Renamed directly"
+        db_session.commit()
+        second = client.get("/api/v1/gas-stations/", headers=headers)
+        assert response_cache.hits == hits + 1
+        assert second.json() == first.json()
+
+        update_gas_station(db_session, station.id, GasStationUpdate(name="Renamed"))
+        third = client.get("/api/v1/gas-stations/", headers=headers)
+        assert third.json()["stations"][0]["name"] == "Renamed"
+
+        create_or_update_fuel_price(db_session, station.id, FuelPriceCreate(fuel_type=FuelType.AI_95, price=11000))
+        fourth = client.get("/api/v1/gas-stations/", headers=headers)
+        assert fourth.json()["stations"][0]["fuel_prices"][0]["price"] == 11000
+
+
+class TestConditionalGet:
+    """Тесты ETag / If-None-Match"""
+
+    def test_etag_matching(self):
+        """Слабое сравнение, списки и * в If-None-Match"""
+        etag = make_etag("v1", 10)
+        assert etag.startswith('W/"')
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", {etag[2:]}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches(make_etag("v2", 10), etag)
+
+    def test_list_and_detail_not_modified(self, client, db_session, user_token):
+        """Неизмененные список и карточка отдают 304, запись меняет ETag"""
+        station = make_station(db_session, "Tagged")
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        for url in ("/api/v1/gas-stations/", f"/api/v1/gas-stations/{station.id}"):
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200
+            etag = response.headers["ETag"]
+
+            response = client.get(url, headers={**headers, "If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.content == b""
+
+        update_gas_station(db_session, station.id, GasStationUpdate(name="Renamed"))
+        response = client.get(
+            f"/api/v1/gas-stations/{station.id}",
+            headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+
+    def test_detail_wildcard_checks_existence(self, client, db_session, user_token):
+        """If-None-Match: * не скрывает 404 для несуществующей и неодобренной карточки"""
+        station = make_station(db_session, "Pending")
+        station.status = StationStatus.PENDING
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {user_token}", "If-None-Match": "*"}
+
+        assert client.get("/api/v1/gas-stations/999999", headers=headers).status_code == 404
+        assert client.get(f"/api/v1/gas-stations/{station.id}", headers=headers).status_code == 404
+
+    def test_detail_etag_follows_reviewer_profile(self, client, db_session, test_user, user_token):
+        """Смена имени автора отзыва меняет ETag карточки"""
+        station = make_station(db_session, "Reviewed")
+        create_user_extended(db_session, UserExtendedCreate(
+            user_id=test_user.id, phone=test_user.phone_number, name="Старое имя"
+        ))
+        db_session.add(Review(gas_station_id=station.id, user_id=test_user.id, rating=5))
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {user_token}"}
+        url = f"/api/v1/gas-stations/{station.id}"
+
+        etag = client.get(url, headers=headers).headers["ETag"]
+        update_user_extended(db_session, test_user.id, UserExtendedUpdate(name="Новое имя"))
+
+        response = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["reviews"][0]["user_name"] == "Новое имя"
+
+    def test_regions_not_modified(self, client, db_session):
+        """Список регионов отдает 304, пока регионы не изменились"""
+        db_session.add(Region(name_uz="Toshkent", name_ru="Ташкент"))
+        db_session.commit()
+
+        response = client.get("/api/v1/regions")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert client.get("/api/v1/regions", headers={"If-None-Match": etag}).status_code == 304
+
+        db_session.add(Region(name_uz="Samarqand", name_ru="Самарканд"))
+        db_session.commit()
+        assert client.get("/api/v1/regions", headers={"If-None-Match": etag}).status_code == 200
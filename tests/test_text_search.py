@@ -0,0 +1,240 @@
+"""
+Тесты текстового поиска мест (search_query)
+"""
+from app.models.car_wash import CarWash, CarWashStatus
+from app.models.gas_station import GasStation, StationStatus
+from app.models.restaurant import CuisineType, Restaurant, RestaurantStatus
+from app.schemas.gas_station import GasStationCreate, GasStationFilter, GasStationUpdate
+from app.schemas.restaurant import RestaurantFilter
+from app.services.gas_station_service.crud import (
+    approve_gas_station,
+    create_gas_station,
+    delete_gas_station,
+    get_gas_stations,
+    update_gas_station,
+)
+from app.services.restaurant_service.crud import get_restaurants
+from app.services.search_service import (
+    SuggestIndex,
+    normalize_search_query,
+    search_places,
+    search_variants,
+    suggest_index,
+    transliterate,
+)
+
+
+def make_station(db, name, address="address", rating=0.0, latitude=41.3111, longitude=69.2797):
+    station = GasStation(
+        name=name,
+        address=address,
+        latitude=latitude,
+        longitude=longitude,
+        rating=rating,
+        status=StationStatus.APPROVED,
+    )
+    db.add(station)
+    db.commit()
+    db.refresh(station)
+    return station
+
+
+class TestSearchQueryNormalization:
+    """Тесты нормализации и транслитерации запроса"""
+
+    def test_normalize(self):
+        """Регистр, пробелы и апострофы приводятся к одному виду"""
+        assert normalize_search_query("  O‘zbekiston   Shell ") == "o'zbekiston shell"
+        assert normalize_search_query(None) == ""
+
+    def test_transliteration_both_ways(self):
+        """Кириллица и латиница переводятся друг в друга"""
+        assert transliterate("тошкент") == "toshkent"
+        assert transliterate("chilonzor") == "чилонзор"
+        assert search_variants("Тошкент") == ["тошкент", "toshkent"]
+        assert search_variants("123") == ["123"]
+
+
+class TestPlaceTextSearch:
+    """Тесты поиска мест через search_query"""
+
+    def test_ranking_prefix_then_name_then_address(self, db_session):
+        """Совпадение в начале названия выше, чем в середине названия или в адресе"""
+        in_address = make_station(db_session, "Petrol", address="Shell street", rating=5.0)
+        in_name = make_station(db_session, "Best Shell", rating=4.0)
+        prefix = make_station(db_session, "Shell Chilonzor", rating=1.0)
+        make_station(db_session, "Lukoil", rating=5.0)
+
+        stations, total = get_gas_stations(db_session, filters=GasStationFilter(search_query="shell"))
+
+        assert total == 3
+        assert [s.id for s in stations] == [prefix.id, in_name.id, in_address.id]
+
+    def test_transliterated_query_and_like_escaping(self, db_session):
+        """Латинский запрос находит кириллическое название; % не работает как шаблон"""
+        station = make_station(db_session, "Заправка тошкент")
+        make_station(db_session, "100% fuel")
+
+        stations, _ = get_gas_stations(db_session, filters=GasStationFilter(search_query="Toshkent"))
+        assert [s.id for s in stations] == [station.id]
+
+        stations, _ = get_gas_stations(db_session, filters=GasStationFilter(search_query="0%"))
+        assert [s.name for s in stations] == ["100% fuel"]
+        _, total = get_gas_stations(db_session, filters=GasStationFilter(search_query="1%f"))
+        assert total == 0
+
+    def test_description_searched_for_restaurants(self, db_session):
+        """Для ресторанов поиск идет и по описанию"""
+        restaurant = Restaurant(
+            name="Oqtepa",
+            address="address",
+            description="Lavash and burgers",
+            cuisine_type=CuisineType.UZBEK,
+            latitude=41.3111,
+            longitude=69.2797,
+            status=RestaurantStatus.APPROVED,
+        )
+        db_session.add(restaurant)
+        db_session.commit()
+
+        restaurants, total = get_restaurants(db_session, filters=RestaurantFilter(search_query="lavash"))
+        assert total == 1
+        assert restaurants[0].id == restaurant.id
+
+
+class TestUnifiedSearch:
+    """Тесты единого поиска по категориям (/search)"""
+
+    def test_merged_ranking_and_per_category_cap(self, db_session):
+        """Результаты разных категорий объединяются; ближнее место выше при равной релевантности"""
+        far = make_station(db_session, "Moyka fuel", latitude=41.5, longitude=69.5)
+        for index in range(3):
+            make_station(db_session, f"Station moyka {index}", latitude=41.3111, longitude=69.2797)
+        wash = CarWash(
+            name="Moyka Premium",
+            address="address",
+            latitude=41.3112,
+            longitude=69.2798,
+            status=CarWashStatus.APPROVED,
+        )
+        db_session.add(wash)
+        db_session.commit()
+
+        found = search_places(
+            db_session, "moyka", latitude=41.3111, longitude=69.2797, per_category=2
+        )
+
+        assert found["categories"]["gas_stations"] == 2
+        assert found["categories"]["car_washes"] == 1
+        assert found["categories"]["restaurants"] == 0
+        first = found["results"][0]
+        assert (first["category"], first["id"]) == ("car_washes", wash.id)
+        # Префиксное совпадение далеко (~30 км) уступает совпадению рядом
+        assert [(place["category"], place["id"]) for place in found["results"]][2] == ("gas_stations", far.id)
+        assert len(found["results"]) == 3
+
+    def test_endpoint_with_categories_and_etag(self, client, db_session, user_token):
+        """Эндпоинт фильтрует категории, отдает ETag и 304"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        station = make_station(db_session, "Tatneft")
+
+        response = client.get(
+            "/api/v1/search/",
+            params={"q": "татнефт", "categories": ["gas_stations", "unknown"]},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["categories"] == {"gas_stations": 1}
+        assert data["results"][0]["id"] == station.id
+        assert data["results"][0]["distance_km"] is None
+
+        cached = client.get(
+            "/api/v1/search/",
+            params={"q": "татнефт", "categories": ["gas_stations"]},
+            headers={**headers, "If-None-Match": response.headers["ETag"]},
+        )
+        assert cached.status_code == 304
+
+
+class TestSuggestIndex:
+    """Тесты префиксного индекса подсказок"""
+
+    def test_prefix_ranking_and_transliteration(self):
+        """Начало названия выше слова названия, название выше адреса; латиница находит кириллицу"""
+        index = SuggestIndex()
+        index.load([
+            ("gas_stations", 1, "Best Shell", "Navoi 1"),
+            ("gas_stations", 2, "Shell Chilonzor", "Bunyodkor 5"),
+            ("car_washes", 1, "Moyka", "Shell street"),
+            ("restaurants", 1, "Чайхана", "Тошкент"),
+        ])
+
+        assert [(s["category"], s["id"]) for s in index.suggest("she")] == [
+            ("gas_stations", 2), ("gas_stations", 1), ("car_washes", 1),
+        ]
+        assert [s["id"] for s in index.suggest("sh", categories=["car_washes"])] == [1]
+        assert [s["name"] for s in index.suggest("chay")] == ["Чайхана"]
+        assert index.suggest("xyz") == []
+
+    def test_incremental_upsert_and_remove(self):
+        """Точечные изменения без перезагрузки индекса"""
+        index = SuggestIndex()
+        index.upsert("gas_stations", 1, "Lukoil", "Navoi 1")
+        index.upsert("gas_stations", 1, "Tatneft", "Navoi 1")
+
+        assert index.suggest("luk") == []
+        assert [s["name"] for s in index.suggest("tat")] == ["Tatneft"]
+
+        index.remove("gas_stations", 1)
+        assert index.suggest("tat") == [] and len(index) == 0
+
+    def test_refresh_keeps_changes_made_during_load(self, db_session):
+        """Изменения, пришедшие пока warm() читает БД, не теряются при замене индекса"""
+        kept = make_station(db_session, "Tatneft")
+        removed = make_station(db_session, "Lukoil")
+
+        class RacingIndex(SuggestIndex):
+            def load(self, rows):
+                rows = list(rows)
+                # Снимок уже прочитан, CRUD в это время меняет места
+                self.upsert("gas_stations", kept.id, "Uzbekneftegaz", "address")
+                self.remove("gas_stations", removed.id)
+                super().load(rows)
+
+        index = RacingIndex()
+        index.warm(lambda: db_session)
+
+        assert index.suggest("tat") == [] and index.suggest("luk") == []
+        assert [s["id"] for s in index.suggest("uzb")] == [kept.id]
+        assert len(index) == 1 and index._pending is None
+
+    def test_crud_paths_update_index(self, db_session):
+        """Создание, модерация, изменение и удаление обновляют подсказки"""
+        station = create_gas_station(
+            db_session,
+            GasStationCreate(name="Tatneft", address="Navoi 1", latitude=41.3, longitude=69.2),
+        )
+        # На модерации - не подсказывается
+        assert suggest_index.suggest("tat") == []
+
+        approve_gas_station(db_session, station.id)
+        assert [s["id"] for s in suggest_index.suggest("tat")] == [station.id]
+
+        update_gas_station(db_session, station.id, GasStationUpdate(name="Uzbekneftegaz"))
+        assert suggest_index.suggest("tat") == []
+        assert [s["name"] for s in suggest_index.suggest("uzb")] == ["Uzbekneftegaz"]
+
+        delete_gas_station(db_session, station.id)
+        assert suggest_index.suggest("uzb") == []
+
+    def test_endpoint_without_auth(self, client, db_session):
+        """Эндпоинт подсказок отвечает без авторизации"""
+        station = make_station(db_session, "Tatneft")
+        suggest_index.warm(lambda: db_session)
+
+        response = client.get("/api/v1/search/suggest", params={"q": "Тат"})
+        assert response.status_code == 200
+        assert response.json()["suggestions"] == [
+            {"category": "gas_stations", "id": station.id, "name": "Tatneft", "address": "address"}
+        ]
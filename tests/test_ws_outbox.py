@@ -0,0 +1,114 @@
+"""
+Тесты исходящих очередей WebSocket-соединений
+"""
+import asyncio
+
+from app.api.v1.global_chat import GlobalChatConnectionManager
+from app.core.config import settings
+from app.core.presence import Presence
+from app.core.ws_bus import LocalBus
+from app.core.ws_outbox import SLOW_CONSUMER_CLOSE_CODE, ClientConnection, _close_tasks
+
+
+class FakeWebSocket:
+    """Сокет, отправка в который может зависать"""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.unblocked.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=None):
+        self.closed_with = code
+
+
+class TestClientConnection:
+    """Тесты очереди и задачи-писателя"""
+
+    def test_messages_sent_in_order(self):
+        """Сообщения уходят в сокет в порядке постановки"""
+        async def scenario():
+            websocket = FakeWebSocket()
+            connection = ClientConnection(websocket, max_queue=10)
+            connection.start()
+            for i in range(3):
+                assert connection.send_json({"n": i})
+            await asyncio.sleep(0.01)
+            connection.stop()
+            return websocket.sent
+
+        assert asyncio.run(scenario()) == ['{"n":0}', '{"n":1}', '{"n":2}']
+
+    def test_slow_consumer_dropped(self):
+        """При переполнении очереди клиент отключается с кодом 1013"""
+        async def scenario():
+            websocket = FakeWebSocket(blocked=True)
+            connection = ClientConnection(websocket, max_queue=2)
+            connection.start()
+            await asyncio.sleep(0)
+            results = [connection.send_text(str(i)) for i in range(2)]
+            await asyncio.sleep(0)
+            results += [connection.send_text(str(i)) for i in range(2, 5)]
+            # Задача закрытия удерживается до завершения
+            pending = len(_close_tasks)
+            await asyncio.sleep(0.01)
+            return results, connection.closed, websocket.closed_with, pending
+
+        results, closed, code, pending = asyncio.run(scenario())
+        # Первое сообщение забрал писатель, два лежат в очереди
+        assert results == [True, True, True, False, False]
+        assert closed
+        assert code == SLOW_CONSUMER_CLOSE_CODE
+        assert pending == 1 and not _close_tasks
+
+    def test_send_timeout(self):
+        """Зависшая отправка отключает клиента по таймауту"""
+        async def scenario():
+            websocket = FakeWebSocket(blocked=True)
+            connection = ClientConnection(websocket, max_queue=10, send_timeout=0.01)
+            connection.start()
+            connection.send_text("x")
+            await asyncio.sleep(0.05)
+            return connection.closed, websocket.closed_with
+
+        assert asyncio.run(scenario()) == (True, SLOW_CONSUMER_CLOSE_CODE)
+
+
+class TestGlobalChatBroadcast:
+    """Рассылка глобального чата не ждет медленных клиентов"""
+
+    def test_slow_client_does_not_block_others(self, monkeypatch):
+        """Зависший клиент не задерживает остальных и отключается"""
+        monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 3)
+
+        async def scenario():
+            manager = GlobalChatConnectionManager(bus=LocalBus(), presence=Presence())
+            slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+            await manager.connect(slow, 1)
+            await manager.connect(fast, 2)
+
+            for i in range(5):
+                await manager.send_message({"id": i})
+                await asyncio.sleep(0.001)
+            await asyncio.sleep(0.01)
+            for connections in list(manager.active_connections.values()):
+                for connection in connections:
+                    connection.stop()
+            return manager, fast.sent, slow.closed_with
+
+        manager, fast_sent, slow_code = asyncio.run(scenario())
+        assert [text for text in fast_sent if '"new_message"' in text] == [
+            '{"type":"new_message","message":{"id":%d}}' % i for i in range(5)
+        ]
+        assert slow_code == SLOW_CONSUMER_CLOSE_CODE
+        assert list(manager.active_connections) == [2]
+        assert manager.get_online_count() == 1